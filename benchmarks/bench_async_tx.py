@@ -0,0 +1,57 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Line utilization benchmark for pipelined ASYNC transmit.
+#
+# Sends a large payload on the simulated loopback card at several ASYNC
+# data rates. It compares writing MAX_ASYNC_TRANSMIT chunks and waiting
+# for each to be sent (Port.write() + Port.flush()) against
+# Port.write_stream(), which keeps the next chunk queued. It reports
+# throughput as a fraction of the line rate.
+#
+# usage: python benchmarks/bench_async_tx.py [kilobytes]
+#
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgapi
+import mgsim
+from mgapi import Port, MAX_ASYNC_TRANSMIT
+
+
+def write_flush(port, data) -> float:
+    """Return seconds to send data one flushed chunk at a time."""
+    start = time.monotonic()
+    for i in range(0, len(data), MAX_ASYNC_TRANSMIT):
+        assert port.write(data[i:i + MAX_ASYNC_TRANSMIT]), \
+            str.format("short write")
+        port.flush()
+    return time.monotonic() - start
+
+
+def main():
+    kilobytes = float(sys.argv[1]) if len(sys.argv) > 1 else 64
+    data = os.urandom(int(kilobytes * 1024))
+    mgapi.set_backend(mgsim.SimBackend())
+    port = Port('MGMP1P1')
+    port.open()
+    print('rate     flush(util)  stream(util)  writes')
+    for rate in (115200, 460800, 921600):
+        settings = Port.Settings()
+        settings.protocol = Port.ASYNC
+        settings.async_data_rate = rate
+        port.apply_settings(settings)
+        line_rate = port._stream_byte_rate()
+        flush = len(data) / write_flush(port, data) / line_rate
+        stats = port.write_stream(data)
+        print('%6d  %11.3f  %12.3f  %6d' %
+              (rate, flush, stats.utilization, stats.writes))
+    port.close()
+
+
+if __name__ == '__main__':
+    main()
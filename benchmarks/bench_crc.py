@@ -0,0 +1,76 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Throughput benchmark for frame check sequence calculation in mgcrc.
+#
+# Compares a byte table CRC16 loop written in Python against
+# mgcrc.crc16, and reports mgcrc.crc32 and the batch verify_frames()
+# throughput for several frame sizes.
+#
+# usage: python benchmarks/bench_crc.py [megabytes]
+#
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgcrc
+from mgapi import Port
+
+
+def _table16() -> list:
+    table = []
+    for i in range(256):
+        crc = i
+        for bit in range(8):
+            crc = (crc >> 1) ^ 0x8408 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_TABLE16 = _table16()
+
+
+def loop_crc16(data) -> int:
+    """Byte table CRC16 calculated one byte at a time in Python."""
+    crc = 0xffff
+    table = _TABLE16
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xff]
+    return crc ^ 0xffff
+
+
+def rate(func, frames) -> float:
+    """Return MB/s of calling func for each frame."""
+    size = sum(len(frame) for frame in frames)
+    start = time.perf_counter()
+    for frame in frames:
+        func(frame)
+    return size / (time.perf_counter() - start) / 1e6
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print('size   loop16(MB/s)  crc16(MB/s)  crc32(MB/s)  verify16(MB/s)')
+    for size in (64, 1500, 65536):
+        count = max(1, int(megabytes * 1e6) // size)
+        frames = [memoryview(os.urandom(size)) for i in range(count)]
+        checked = [frame.tobytes() + mgcrc.fcs(frame, Port.CRC16)
+                   for frame in frames]
+        assert loop_crc16(frames[0]) == mgcrc.crc16(frames[0]), \
+            str.format("CRC16 mismatch")
+        # Python loop is slow, measure on fraction of data
+        loop = rate(loop_crc16, frames[:max(1, count // 16)])
+        crc16 = rate(mgcrc.crc16, frames)
+        crc32 = rate(mgcrc.crc32, frames)
+        start = time.perf_counter()
+        assert all(mgcrc.verify_frames(checked, Port.CRC16))
+        verify = size * count / (time.perf_counter() - start) / 1e6
+        print('%5d  %12.1f  %11.1f  %11.1f  %14.1f' %
+              (size, loop, crc16, crc32, verify))
+
+
+if __name__ == '__main__':
+    main()
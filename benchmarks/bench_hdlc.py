@@ -0,0 +1,76 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Throughput benchmark for the software HDLC codec in mgframe.
+#
+# Encodes a batch of random frames with HdlcEncoder and decodes the
+# resulting bit stream with HdlcDecoder, reporting throughput in Mbit/s
+# of frame data for each frame size and CRC type. Random data exercises
+# the table driven stuffing path, all ones data forces maximum stuffing.
+# Before timing, checks that frames encoded with a flush() or abort()
+# after each frame decode unchanged.
+#
+# usage: python benchmarks/bench_hdlc.py [frames]
+#
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgframe
+from mgapi import Port, RxStatus_OK
+
+
+def check():
+    """Check frames flushed or aborted one at a time decode unchanged."""
+    frames = [b'\xff' * 3, b'hello', b'\xff' * 3, b'world', b'\x7e\x3f']
+    for crc in (Port.OFF, Port.CRC16, Port.CRC32):
+        encoder = mgframe.HdlcEncoder(crc)
+        stream = b''.join([encoder.encode(frame) + encoder.flush()
+                           for frame in frames])
+        stream += encoder.abort() + encoder.encode(b'xyz') + encoder.flush()
+        decoded = mgframe.HdlcDecoder(crc).decode(stream)
+        assert [frame for frame, status in decoded
+                if status == RxStatus_OK] == frames + [b'xyz'], \
+            str.format("flushed frames do not match crc={}", crc)
+
+
+def bench(frames, crc):
+    """Return (encode Mbit/s, decode Mbit/s) of frame data."""
+    bits = sum(len(frame) for frame in frames) * 8
+    encoder = mgframe.HdlcEncoder(crc)
+    start = time.perf_counter()
+    stream = b''.join([encoder.encode(frame) for frame in frames])
+    stream += encoder.flush()
+    encode_time = time.perf_counter() - start
+
+    decoder = mgframe.HdlcDecoder(crc)
+    start = time.perf_counter()
+    decoded = decoder.decode(stream)
+    decode_time = time.perf_counter() - start
+    assert [frame for frame, status in decoded if status == RxStatus_OK] \
+        == frames, str.format("decoded frames do not match")
+    return bits / encode_time / 1e6, bits / decode_time / 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    check()
+    rnd = random.Random(0)
+    print('data    size  crc     encode(Mbit/s)  decode(Mbit/s)')
+    for size in (64, 512, 4096):
+        for desc, make in (
+                ('random', lambda: bytes(rnd.getrandbits(8) for i in range(size))),
+                ('ones', lambda: b'\xff' * size)):
+            frames = [make() for i in range(max(1, count * 64 // size))]
+            for crc_desc, crc in (('CRC16', Port.CRC16), ('CRC32', Port.CRC32)):
+                encode, decode = bench(frames, crc)
+                print('%-6s %5d  %-5s  %14.1f  %14.1f' %
+                      (desc, size, crc_desc, encode, decode))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Import time benchmark for mgapi.
+#
+# Runs python -X importtime -c "import mgapi" in fresh interpreters and
+# reports the median self and cumulative import time of mgapi and the
+# modules contributing most to it. DLLs are not loaded by the import,
+# so the numbers track the cost paid by tools that only enumerate ports
+# or format settings. Bytecode is compiled first so that source
+# compilation is not measured.
+#
+# usage: python benchmarks/bench_import.py [runs] [module]
+#
+
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def import_times(module: str) -> dict:
+    """Return dictionary of module name: (self us, cumulative us)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_us = int(fields[0])
+            cumulative_us = int(fields[1])
+        except ValueError:
+            # column header
+            continue
+        times[fields[2].strip()] = (self_us, cumulative_us)
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    module = sys.argv[2] if len(sys.argv) > 2 else 'mgapi'
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+    samples = [import_times(module) for i in range(runs)]
+
+    def median(name, column):
+        return statistics.median(s[name][column] for s in samples if name in s)
+
+    print('import %s, median of %d runs' % (module, runs))
+    print('self(us)  cumulative(us)')
+    print('%8d  %14d' % (median(module, 0), median(module, 1)))
+    print()
+    print('largest contributors   cumulative(us)')
+    names = [name for name in samples[0] if name != module]
+    names.sort(key=lambda name: median(name, 1), reverse=True)
+    for name in names[:10]:
+        print('%-22s %14d' % (name, median(name, 1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Throughput benchmark for the line encoding model in mglinecode.
+#
+# Encodes random data bits with each Settings.encoding value and decodes
+# the line levels, reporting Mbit/s of data bits. A bit at a time Python
+# NRZI decoder is included for comparison.
+#
+# usage: python benchmarks/bench_linecode.py [megabits]
+#
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mglinecode
+from mgapi import Port
+
+ENCODINGS = (
+    ('NRZ', Port.NRZ),
+    ('NRZB', Port.NRZB),
+    ('NRZI_MARK', Port.NRZI_MARK),
+    ('NRZI_SPACE', Port.NRZI_SPACE),
+    ('FM1', Port.FM1),
+    ('FM0', Port.FM0),
+    ('MANCHESTER', Port.MANCHESTER),
+    ('DIFF_BIPHASE_LEVEL', Port.DIFF_BIPHASE_LEVEL),
+)
+
+
+def loop_decode_nrzi(levels) -> list:
+    """Decode NRZI (space) one level at a time in Python."""
+    bits = []
+    previous = 0
+    for level in levels:
+        bits.append(1 - (level ^ previous))
+        previous = level
+    return bits
+
+
+def main():
+    megabits = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    bits = mglinecode.unpack_bits(os.urandom(int(megabits * 1e6) // 8))
+    count = len(bits)
+
+    # Python loop is slow, measure on fraction of data
+    levels = mglinecode.encode(bits, Port.NRZI).tolist()[:count // 16]
+    start = time.perf_counter()
+    loop_decode_nrzi(levels)
+    loop = len(levels) / (time.perf_counter() - start) / 1e6
+    print('python loop NRZI decode: %.1f Mbit/s' % loop)
+
+    print('encoding            encode(Mbit/s)  decode(Mbit/s)')
+    for name, encoding in ENCODINGS:
+        start = time.perf_counter()
+        levels = mglinecode.encode(bits, encoding)
+        encode = count / (time.perf_counter() - start) / 1e6
+        start = time.perf_counter()
+        decoded = mglinecode.decode(levels, encoding)
+        decode = count / (time.perf_counter() - start) / 1e6
+        assert (decoded == bits).all(), str.format("{} mismatch", name)
+        print('%-18s  %14.1f  %14.1f' % (name, encode, decode))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Microbenchmark of buffer marshalling overhead for MgslRead/MgslWrite.
+#
+# Compares the original approach of building a new ctypes array type
+# for every call against the cached marshalling used by mgapi.
+# Only the Python side of a call is measured, the DLL is not called.
+#
+# Read-only buffers are passed by address, held through the buffer
+# protocol for the call (after column). The copy column is the cost of
+# copying them instead, which applications can opt in to for small
+# buffers with mgapi.READONLY_COPY_SIZE.
+#
+# usage: python benchmarks/bench_marshal.py [iterations]
+#
+
+import ctypes
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgapi
+
+
+def old_marshal(buf):
+    """Original per call marshalling (new array type for every call)."""
+    char_array = ctypes.c_char * len(buf)
+    return char_array.from_buffer(buf)
+
+
+def new_marshal(buf):
+    """Cached marshalling used by MgslRead/MgslWrite."""
+    ptr, size, held = mgapi._buffer_pointer(buf, False)
+    if held is not None:
+        mgapi._release_buffer(held)
+    return ptr
+
+
+def copy_marshal(buf):
+    """Copy read-only buffer (mgapi.READONLY_COPY_SIZE opt in)."""
+    return bytes(buf)
+
+
+def bench(func, args, iterations):
+    """Return best average time per call in nanoseconds of 5 runs."""
+    number = max(1, iterations // 5)
+    t = min(timeit.repeat(lambda: func(*args), repeat=5, number=number))
+    return t * 1e9 / number
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print('buffer                   size    before(ns)  after(ns)   copy(ns)')
+    for size in (16, 128, 4096, 65535):
+        data = bytes(range(256)) * (size // 256 + 1)
+        buffers = [
+            ('bytearray', bytearray(data[:size])),
+            ('bytes', data[:size]),
+            ('memoryview[bytearray]', memoryview(bytearray(data))[1:size + 1]),
+            ('memoryview[bytes]', memoryview(data)[1:size + 1]),
+            ('ctypes array (reused)',
+             mgapi._char_array(size).from_buffer(bytearray(data[:size]))),
+        ]
+        for desc, buf in buffers:
+            readonly = memoryview(buf).readonly
+            if readonly and type(buf) is not bytes and \
+               len(memoryview(buf)) >= mgapi.READONLY_COPY_SIZE:
+                # held by address, include release
+                after = bench(new_marshal, (buf,), iterations)
+            else:
+                after = bench(mgapi._buffer_pointer, (buf, False), iterations)
+            try:
+                before = '%10.1f' % bench(old_marshal, (buf,), iterations)
+            except TypeError:
+                # original code rejects read-only buffers
+                before = '  rejected'
+            copy = ''
+            if readonly and type(buf) is not bytes:
+                copy = '%10.1f' % bench(copy_marshal, (buf,), iterations)
+            print('%-23s %6d  %s  %9.1f  %s' % (desc, size, before, after,
+                                                copy))
+
+
+if __name__ == '__main__':
+    main()
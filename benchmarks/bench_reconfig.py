@@ -0,0 +1,76 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Reconfiguration latency benchmark for Port.apply_settings.
+#
+# Measures the time of apply_settings() for common reconfiguration
+# patterns, comparing a full reconfiguration (force=True, the original
+# behavior of always running the PIO work around and MgslSetParams)
+# against the incremental default that only issues the calls needed.
+# A protocol change is applied in full by both, so protocol_toggle
+# times should match within run to run noise.
+# Uses the backend selected by MGAPI_BACKEND (hardware DLL on Windows,
+# simulated devices otherwise).
+#
+# usage: python benchmarks/bench_reconfig.py [iterations] [port name]
+#
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgapi
+
+
+def rate_sweep(port, settings, i):
+    """Change only the internal clock rate (rate sweep tests)."""
+    settings.internal_clock_rate = 9600 * (1 + i % 32)
+
+
+def no_change(port, settings, i):
+    """Reapply the same settings."""
+    pass
+
+
+def protocol_toggle(port, settings, i):
+    """Alternate between HDLC and RAW protocols."""
+    settings.protocol = mgapi.Port.RAW if i % 2 else mgapi.Port.HDLC
+
+
+def bench(port, change, force, iterations):
+    """Return average time per apply_settings call in microseconds."""
+    settings = port.get_settings()
+    settings.protocol = mgapi.Port.HDLC
+    settings.transmit_clock = mgapi.Port.INTERNAL
+    settings.receive_clock = mgapi.Port.INTERNAL
+    settings.internal_clock_rate = 9600
+    port.apply_settings(settings, force=True)
+    elapsed = 0
+    for i in range(iterations):
+        change(port, settings, i)
+        start = time.perf_counter()
+        port.apply_settings(settings, force)
+        elapsed += time.perf_counter() - start
+    return elapsed * 1e6 / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    name = sys.argv[2] if len(sys.argv) > 2 else 'MGMP1P1'
+    port = mgapi.Port(name)
+    port.open()
+    try:
+        print('%s, %d iterations' % (name, iterations))
+        print('change             full(us)  incremental(us)')
+        for change in (rate_sweep, no_change, protocol_toggle):
+            full = bench(port, change, True, iterations)
+            incremental = bench(port, change, False, iterations)
+            print('%-16s %10.1f  %15.1f' % (change.__name__, full, incremental))
+    finally:
+        port.close()
+
+
+if __name__ == '__main__':
+    main()
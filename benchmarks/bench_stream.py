@@ -0,0 +1,75 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# CPU cost benchmark for adaptive ASYNC reads (Port.StreamReader).
+#
+# Sends data between the two ports of the simulated loopback card at
+# several ASYNC data rates and receives it with per byte Port.read()
+# calls and with Port.stream_reader(), reporting receive CPU time per
+# kilobyte and driver read calls.
+#
+# usage: python benchmarks/bench_stream.py [kilobytes]
+#
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgapi
+import mgsim
+from mgapi import Port, MAX_ASYNC_TRANSMIT
+
+
+def receive(port, size, reader) -> (float, int):
+    """Return (receive CPU seconds, read calls) for size bytes."""
+    received = 0
+    reads = 0
+    start = time.thread_time()
+    while received < size:
+        if reader is None:
+            data = port.read()
+            reads += 1
+        else:
+            data = reader.read()
+        received += len(data)
+    if reader is not None:
+        reads = reader.reads
+    return time.thread_time() - start, reads
+
+
+def main():
+    kilobytes = float(sys.argv[1]) if len(sys.argv) > 1 else 16
+    size = int(kilobytes * 1024)
+    mgapi.set_backend(mgsim.SimBackend())
+    tx = Port('MGMP1P1')
+    rx = Port('MGMP1P2')
+    tx.open()
+    rx.open()
+    print('rate     mode    cpu(ms/KB)  reads')
+    for rate in (115200, 460800, 921600):
+        settings = Port.Settings()
+        settings.protocol = Port.ASYNC
+        settings.async_data_rate = rate
+        tx.apply_settings(settings)
+        rx.apply_settings(settings)
+        rx.enable_receiver()
+        for mode in ('byte', 'stream'):
+            data = os.urandom(size)
+            reader = rx.stream_reader() if mode == 'stream' else None
+            sender = threading.Thread(target=tx.write_many, args=(
+                [data[i:i + MAX_ASYNC_TRANSMIT]
+                 for i in range(0, size, MAX_ASYNC_TRANSMIT)],))
+            sender.start()
+            cpu, reads = receive(rx, size, reader)
+            sender.join()
+            print('%6d  %-6s  %10.3f  %5d' %
+                  (rate, mode, cpu * 1000 / kilobytes, reads))
+    tx.close()
+    rx.close()
+
+
+if __name__ == '__main__':
+    main()
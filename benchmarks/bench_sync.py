@@ -0,0 +1,77 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Throughput benchmark for the sync pattern hunter in mgsync.
+#
+# Builds a RAW capture of random data with sync words inserted at a
+# fixed bit alignment and compares a bit at a time Python hunter against
+# SyncHunter.search() called with receive sized chunks, reporting
+# throughput in Mbit/s for 8 and 16 bit patterns.
+#
+# usage: python benchmarks/bench_sync.py [megabytes]
+#
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgsync
+
+
+def capture(size, pattern, bits, alignment) -> bytes:
+    """Return size bytes of random data with a sync word every 64 bytes."""
+    rnd = random.Random(0)
+    shift = 512 - alignment - bits
+    clear = ~(((1 << bits) - 1) << shift)
+    blocks = [((rnd.getrandbits(512) & clear) | (pattern << shift))
+              .to_bytes(64, 'big') for i in range(-(-size // 64))]
+    return b''.join(blocks)[:size]
+
+
+def loop_hunt(data, pattern, bits) -> list:
+    """Return bit offsets of pattern, shifting in one bit at a time."""
+    offsets = []
+    mask = (1 << bits) - 1
+    register = 0
+    position = 0
+    for b in data:
+        for i in range(7, -1, -1):
+            register = ((register << 1) | ((b >> i) & 1)) & mask
+            position += 1
+            if position >= bits and register == pattern:
+                offsets.append(position - bits)
+    return offsets
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    size = int(megabytes * 1e6)
+    print('bits  loop(Mbit/s)  hunter(Mbit/s)  alignment')
+    for pattern, bits in ((0x16, 8), (0xeb90, 16)):
+        data = capture(size, pattern, bits, 5)
+        # Python loop is slow, measure on fraction of data
+        part = data[:size // 64]
+        start = time.perf_counter()
+        expected = loop_hunt(part, pattern, bits)
+        loop = len(part) * 8 / (time.perf_counter() - start) / 1e6
+
+        hunter = mgsync.SyncHunter(pattern, bits)
+        view = memoryview(data)
+        start = time.perf_counter()
+        offsets = [hunter.search(view[i:i + 65536])
+                   for i in range(0, size, 65536)]
+        offsets.append(hunter.flush())
+        rate = size * 8 / (time.perf_counter() - start) / 1e6
+        found = [int(x) for a in offsets for x in a]
+        end = len(part) * 8 - bits
+        assert [x for x in found if x <= end] == expected, \
+            str.format("hunter mismatch")
+        print('%4d  %12.1f  %14.1f  %9d' %
+              (bits, loop, rate, hunter.alignment))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Throughput benchmark for the TDM slot channelizer in mgtdm.
+#
+# Compares splitting TDM frames into slot channels one sample at a time
+# in Python against TdmChannelizer.demux(), and reports mux() throughput,
+# for byte aligned and unaligned slot widths. Before timing, checks that
+# demux() and mux() round trip for 8, 12 and 24 bit slots in both bit
+# orders and that LSB first 8 bit slots keep their byte values.
+#
+# usage: python benchmarks/bench_tdm.py [frames]
+#
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import mgtdm
+
+
+def check():
+    """Check demux() and mux() round trip in both bit orders."""
+    tdm = mgtdm.TdmChannelizer(2, 8)
+    assert tdm.demux(bytes([1, 2, 3, 4])).T.reshape(-1).tolist() == \
+        [1, 2, 3, 4], str.format("8 bit LSB first slots not byte values")
+    for slot_bits in (8, 12, 24):
+        for msb_first in (False, True):
+            tdm = mgtdm.TdmChannelizer(4, slot_bits, 8, msb_first)
+            data = os.urandom(tdm.frame_size)
+            assert tdm.mux(tdm.demux(data)) == data, \
+                str.format("round trip mismatch slot_bits={} msb_first={}",
+                           slot_bits, msb_first)
+
+
+def loop_demux(data, slot_count, slot_bits) -> list:
+    """
+    Split data into slot channels one sample at a time in Python
+    (MSB first bit order).
+    """
+    count = len(data) * 8 // slot_bits // slot_count * slot_count
+    mask = (1 << slot_bits) - 1
+    channels = [[] for i in range(slot_count)]
+    bits = 0
+    nbits = 0
+    slot = 0
+    for b in data:
+        bits = (bits << 8) | b
+        nbits += 8
+        while nbits >= slot_bits and count:
+            nbits -= slot_bits
+            channels[slot].append((bits >> nbits) & mask)
+            bits &= (1 << nbits) - 1
+            slot = slot + 1 if slot + 1 < slot_count else 0
+            count -= 1
+    return channels
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    check()
+    print('slots  bits  loop(MB/s)  demux(MB/s)  mux(MB/s)')
+    for slot_count in (32, 384):
+        for slot_bits in (8, 12, 16, 24, 28):
+            tdm = mgtdm.TdmChannelizer(slot_count, slot_bits, frames, True)
+            data = os.urandom(tdm.frame_size)
+            # Python loop is slow, measure on fraction of data
+            part = data[:len(data) // 16]
+            start = time.perf_counter()
+            channels = loop_demux(part, slot_count, slot_bits)
+            loop = len(part) / (time.perf_counter() - start) / 1e6
+            start = time.perf_counter()
+            demuxed = tdm.demux(data)
+            demux = len(data) / (time.perf_counter() - start) / 1e6
+            assert (demuxed[:, :len(channels[0])] == channels).all(), \
+                str.format("demux mismatch")
+            start = time.perf_counter()
+            muxed = tdm.mux(demuxed)
+            mux = len(data) / (time.perf_counter() - start) / 1e6
+            assert muxed == data, str.format("mux mismatch")
+            print('%5d  %4d  %10.1f  %11.1f  %9.1f' %
+                  (slot_count, slot_bits, loop, demux, mux))
+
+
+if __name__ == '__main__':
+    main()
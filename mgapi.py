@@ -6,15 +6,21 @@
 #
 
 import ctypes
+import os
+import threading
+import time
+import _thread
 from ctypes import wintypes
-from copy import deepcopy
+from collections import deque
+from functools import lru_cache
+from operator import attrgetter
+
+import mgbits
 
 #
 # Win32 definitions
 #
 
-kernel32_dll = ctypes.windll.LoadLibrary("kernel32.dll")
-
 ERROR_ACCESS_DENIED = 5
 ERROR_NOT_READY = 21
 ERROR_GEN_FAILURE = 31
@@ -28,6 +34,7 @@ INFINITE = 0xFFFFFFFF
 WAIT_ABANDONED = 0x80
 WAIT_OBJECT_0 = 0
 WAIT_TIMEOUT = 0x102
+MAXIMUM_WAIT_OBJECTS = 64
 
 HANDLE = wintypes.HANDLE
 ULONG = wintypes.ULONG
@@ -59,66 +66,10 @@ class OVERLAPPED(ctypes.Structure):
     def __str__(self):
         return self.__repr__()
 
-
-# DWORD GetLastError();
-c_GetLastError = kernel32_dll.GetLastError
-c_GetLastError.argtypes = []
-c_GetLastError.restype = DWORD
-
-def GetLastError() -> int:
-    """Return last Win32 error code."""
-    return c_GetLastError()
-
-
-# DWORD WaitForSingleObject(HANDLE hHandle, DWORD dwMilliseconds);
-c_WaitForSingleObject = kernel32_dll.WaitForSingleObject
-c_WaitForSingleObject.argtypes = [HANDLE, DWORD]
-c_WaitForSingleObject.restype = DWORD
-
-def WaitForSingleObject(handle: HANDLE, timeout: int) -> int:
-    """Wait for Win32 object to be signalled."""
-    return c_WaitForSingleObject(handle, DWORD(timeout))
-
-
-# HANDLE CreateEventA(LPSECURITY_ATTRIBUTES lpEventAttributes,
-#            BOOL bManualReset, BOOL bInitialState, LPCSTR lpName);
-c_CreateEvent = kernel32_dll.CreateEventA
-c_CreateEvent.argtypes = [wintypes.LPVOID, wintypes.BOOL,
-                          wintypes.BOOL, wintypes.LPCSTR]
-c_CreateEvent.restype = HANDLE
-
-def CreateEvent(manual_reset: bool, initial_state: bool) -> HANDLE:
-    """Create Win32 event object."""
-    return c_CreateEvent(wintypes.LPVOID(0), wintypes.BOOL(manual_reset),
-            wintypes.BOOL(initial_state), wintypes.LPCSTR(0))
-
-
-# BOOL ResetEvent(HANDLE hEvent);
-c_ResetEvent = kernel32_dll.ResetEvent
-c_ResetEvent.argtypes = [HANDLE]
-c_ResetEvent.restype = wintypes.BOOL
-
-def ResetEvent(handle: HANDLE) -> int:
-    """Reset Win32 event object."""
-    return c_ResetEvent(handle)
-
-
-# BOOL CloseHandle(HANDLE hObject);
-c_CloseHandle = kernel32_dll.CloseHandle
-c_CloseHandle.argtypes = [HANDLE]
-c_CloseHandle.restype = wintypes.BOOL
-
-def CloseHandle(handle: HANDLE) -> int:
-    """Close handle to Win32 object."""
-    return c_CloseHandle(handle)
-
-
 #
 # Microgate API definitions
 #
 
-mghdlc_dll = ctypes.windll.LoadLibrary("mghdlc.dll")
-
 MGSL_MAX_PORTS = 200
 HDLC_MAX_FRAME_SIZE = 65535
 MAX_ASYNC_TRANSMIT = 4096
@@ -708,6 +659,17 @@ MGSL_OPT_TX_IDLE_COUNT = 22
 MGSL_OPT_DPLL_RESET = 23
 MGSL_OPT_RS422_OE = 24
 
+# options that change without MgslSetOption (counters) or trigger an
+# action, Port.get_option always reads these from the driver
+MGSL_VOLATILE_OPTIONS = frozenset((
+    MGSL_OPT_RX_COUNT,
+    MGSL_OPT_TX_COUNT,
+    MGSL_OPT_CUSTOM,
+    MGSL_OPT_UNDERRUN_COUNT,
+    MGSL_OPT_TX_IDLE_COUNT,
+    MGSL_OPT_DPLL_RESET,
+))
+
 #
 # Returned status values for MgslReceive
 #
@@ -720,6 +682,9 @@ RxStatus_BufferOverrun = 5
 RxStatus_Cancel = 6
 RxStatus_BufferTooSmall = 7
 
+# status set before MgslReadWithStatus to detect no status returned
+_RX_STATUS_NONE = INT(-1).value
+
 #
 # Event bit flags for use with MgslWaitEvent
 #
@@ -785,115 +750,6 @@ SerialSignal_DSR = 0x40  # Data Set Ready (input)
 SerialSignal_DTR = 0x80  # Data Terminal Ready (output)
 
 
-#
-# Device Access Functions
-#
-
-# ULONG __stdcall MgslOpen(ULONG PortID, PHANDLE pHandle);
-c_MgslOpen = mghdlc_dll.MgslOpen
-c_MgslOpen.argtypes = [ULONG, LPVOID]
-c_MgslOpen.restype = ULONG
-
-def MgslOpen(port_id: int, port: HANDLE) -> int:
-    """Open handle to port identified by integer port ID."""
-    return c_MgslOpen(ULONG(port_id), ctypes.byref(port))
-
-
-# ULONG __stdcall MgslOpenByName(char *PortName, PHANDLE pHandle);
-c_MgslOpenByName = mghdlc_dll.MgslOpenByName
-c_MgslOpenByName.argtypes = [LPCSTR, LPVOID]
-c_MgslOpenByName.restype = ULONG
-
-def MgslOpenByName(name: str, port: HANDLE) -> int:
-    """Open handle to port identified by name."""
-    return c_MgslOpenByName(LPCSTR(name.encode('utf-8')), ctypes.byref(port))
-
-
-# ULONG __stdcall MgslClose(HANDLE hDevice);
-c_MgslClose = mghdlc_dll.MgslClose
-c_MgslClose.argtypes = [LPVOID]
-c_MgslClose.restype = ULONG
-
-def MgslClose(port: HANDLE) -> int:
-    """Close port identified by open handle."""
-    rc = c_MgslClose(port)
-    if rc == 0:
-        port.value = MGSL_INVALID_HANDLE
-    return rc
-
-
-#
-# Device Configuration Functions
-#
-
-# ULONG __stdcall MgslSetParams(HANDLE hDevice, PMGSL_PARAMS pParams);
-c_MgslSetParams = mghdlc_dll.MgslSetParams
-c_MgslSetParams.argtypes = [LPVOID, LPVOID]
-c_MgslSetParams.restype = ULONG
-
-def MgslSetParams(port: HANDLE, params: MGSL_PARAMS) -> int:
-    """Set configuration parameters for open port."""
-    return c_MgslSetParams(port, ctypes.byref(params))
-
-
-# ULONG __stdcall MgslGetParams(HANDLE hDevice, PMGSL_PARAMS pParams);
-c_MgslGetParams = mghdlc_dll.MgslGetParams
-c_MgslGetParams.argtypes = [LPVOID, LPVOID]
-c_MgslGetParams.restype = ULONG
-
-def MgslGetParams(port: HANDLE, params: MGSL_PARAMS) -> int:
-    """Get configuration parameters for open port."""
-    return c_MgslGetParams(port, ctypes.byref(params))
-
-
-# ULONG __stdcall MgslSetOption(HANDLE hDevice, UINT option_id, UINT value);
-c_MgslSetOption = mghdlc_dll.MgslSetOption
-c_MgslSetOption.argtypes = [HANDLE, wintypes.UINT, wintypes.UINT]
-c_MgslSetOption.restype = ULONG
-
-def MgslSetOption(port: HANDLE, option_id: int, option_value: int) -> int:
-    """Set option value for specified option ID."""
-    return c_MgslSetOption(port, wintypes.UINT(option_id),
-                           wintypes.UINT(option_value))
-
-
-# ULONG __stdcall MgslGetOption(HANDLE hDevice, UINT option_id, UINT *value);
-c_MgslGetOption = mghdlc_dll.MgslGetOption
-c_MgslGetOption.argtypes = [HANDLE, wintypes.UINT, LPVOID]
-c_MgslGetOption.restype = ULONG
-
-def MgslGetOption(port: HANDLE, option_id: int, option_value: INT) -> int:
-    """Get option value for specified option ID."""
-    return c_MgslGetOption(port, wintypes.UINT(option_id),
-                           ctypes.byref(option_value))
-
-
-# ULONG __stdcall MgslGetPortConfigEx(ULONG PortID, PMGSL_PORT_CONFIG_EX pConfig);
-c_MgslGetPortConfigEx = mghdlc_dll.MgslGetPortConfigEx
-c_MgslGetPortConfigEx.argtypes = [ULONG, LPVOID]
-c_MgslGetPortConfigEx.restype = ULONG
-
-def MgslGetPortConfigEx(port_id: int, port_config: MGSL_PORT_CONFIG_EX) -> int:
-    """Get driver load time options for port."""
-    port_config.Size = ctypes.sizeof(port_config)
-    return c_MgslGetPortConfigEx(ULONG(port_id), ctypes.byref(port_config))
-
-
-# ULONG __stdcall MgslSetPortConfigEx(ULONG PortID, PMGSL_PORT_CONFIG_EX pConfig);
-c_MgslSetPortConfigEx = mghdlc_dll.MgslSetPortConfigEx
-c_MgslSetPortConfigEx.argtypes = [ULONG, LPVOID]
-c_MgslSetPortConfigEx.restype = ULONG
-
-def MgslSetPortConfigEx(port_id: int, port_config: MGSL_PORT_CONFIG_EX) -> int:
-    """Set driver load time options for port."""
-    port_config.Size = ctypes.sizeof(port_config)
-    return c_MgslSetPortConfigEx(ULONG(port_id), ctypes.byref(port_config))
-
-
-#
-# Device Control/Status Functions
-#
-
 def serial_signals_str(signals: int) -> str:
     """Return string representation of serial signal value."""
     d = '(' + hex(signals) + ')'
@@ -916,322 +772,985 @@ def serial_signals_str(signals: int) -> str:
     return d
 
 
-# ULONG __stdcall MgslSetSerialSignals(HANDLE hDevice, UCHAR NewSignals);
-c_MgslSetSerialSignals = mghdlc_dll.MgslSetSerialSignals
-c_MgslSetSerialSignals.argtypes = [LPVOID, UCHAR]
-c_MgslSetSerialSignals.restype = ULONG
+#
+# Buffer marshalling for read/write functions
+#
+# Send and receive buffers are passed to the DLL by reference. bytes
+# objects are passed directly. Writable buffers (bytearray, memoryview
+# and slices of either) are wrapped with a char array type cached by
+# size, instead of building a new array type for every call. ctypes char
+# arrays are passed as is, so a buffer used for many calls can be wrapped
+# once with _char_array(size).from_buffer() and reused with no
+# marshalling.
+#
+# Read-only buffers other than bytes (memoryview of bytes) cannot be
+# wrapped by ctypes. Their address is taken through the Python buffer
+# protocol and the buffer is held until the DLL call returns, so they
+# are not copied. Holding costs more than copying a small buffer (see
+# benchmarks/bench_marshal.py). Applications sending many small frames
+# from read-only buffers can opt in to copying read-only buffers smaller
+# than READONLY_COPY_SIZE bytes (default 0, never copy).
+#
 
-def MgslSetSerialSignals(port: HANDLE, signals: int) -> int:
-    """Set control output states for open port."""
-    return c_MgslSetSerialSignals(port, UCHAR(signals))
+@lru_cache(maxsize=256)
+def _char_array(size: int):
+    """Return ctypes char array type of specified size."""
+    return ctypes.c_char * size
 
 
-# ULONG __stdcall MgslGetSerialSignals(HANDLE hDevice, PUCHAR pReturnedSignals);
-c_MgslGetSerialSignals = mghdlc_dll.MgslGetSerialSignals
-c_MgslGetSerialSignals.argtypes = [LPVOID, LPVOID]
-c_MgslGetSerialSignals.restype = ULONG
+class _Py_buffer(ctypes.Structure):
+    """Python buffer protocol view (Py_buffer)."""
+    _fields_ = [
+        ("buf", ctypes.c_void_p),
+        ("obj", ctypes.c_void_p),
+        ("len", ctypes.c_ssize_t),
+        ("itemsize", ctypes.c_ssize_t),
+        ("readonly", ctypes.c_int),
+        ("ndim", ctypes.c_int),
+        ("format", ctypes.c_char_p),
+        ("shape", ctypes.c_void_p),
+        ("strides", ctypes.c_void_p),
+        ("suboffsets", ctypes.c_void_p),
+        ("internal", ctypes.c_void_p)
+    ]
 
-def MgslGetSerialSignals(port: HANDLE, signals: INT) -> int:
-    """Get control and status signal states for open port."""
-    local_signals = UCHAR(signals.value)
-    rc = c_MgslGetSerialSignals(port, ctypes.byref(local_signals))
-    signals.value = local_signals.value & 0xff
-    return rc
 
+PyBUF_SIMPLE = 0
 
-# ULONG __stdcall MgslWaitEvent(HANDLE hDevice, ULONG EventMask,
-# 			PULONG pEvents, LPOVERLAPPED pOverlapped);
-c_MgslWaitEvent = mghdlc_dll.MgslWaitEvent
-c_MgslWaitEvent.argtypes = [LPVOID, ULONG, LPVOID, LPVOID]
-c_MgslWaitEvent.restype = ULONG
+# read-only buffers smaller than this are copied instead of held,
+# 0 (default) passes all read-only buffers by address
+READONLY_COPY_SIZE = 0
 
-def MgslWaitEvent(port: HANDLE, event_mask: int, events: INT, ol: OVERLAPPED) -> int:
-    """Wait for serial port event."""
-    return c_MgslWaitEvent(port, ULONG(event_mask), ctypes.byref(events), ctypes.byref(ol))
+# int PyObject_GetBuffer(PyObject *exporter, Py_buffer *view, int flags);
+c_PyObject_GetBuffer = ctypes.pythonapi.PyObject_GetBuffer
+c_PyObject_GetBuffer.argtypes = [ctypes.py_object, ctypes.c_void_p, ctypes.c_int]
+c_PyObject_GetBuffer.restype = ctypes.c_int
 
+# void PyBuffer_Release(Py_buffer *view);
+c_PyBuffer_Release = ctypes.pythonapi.PyBuffer_Release
+c_PyBuffer_Release.argtypes = [ctypes.c_void_p]
+c_PyBuffer_Release.restype = None
 
-# ULONG __stdcall MgslCancelWaitEvent(HANDLE hDevice);
-c_MgslCancelWaitEvent = mghdlc_dll.MgslCancelWaitEvent
-c_MgslCancelWaitEvent.argtypes = [LPVOID]
-c_MgslCancelWaitEvent.restype = ULONG
+def _hold_buffer(buf) -> _Py_buffer:
+    """
+    Return Py_buffer view of contiguous buffer with its address in buf.
+    The buffer is held (cannot be resized or freed) until released
+    with _release_buffer().
+    """
+    view = _Py_buffer()
+    if c_PyObject_GetBuffer(buf, ctypes.byref(view), PyBUF_SIMPLE):
+        raise BufferError('cannot get address of buffer')
+    return view
 
-def MgslCancelWaitEvent(port: HANDLE) -> int:
-    """Cancel wait for serial port event."""
-    return c_MgslCancelWaitEvent(port)
 
+def _release_buffer(view: _Py_buffer):
+    """Release buffer held by _hold_buffer()."""
+    c_PyBuffer_Release(ctypes.byref(view))
 
+
+def _buffer_pointer(buf, writable: bool):
+    """
+    Return (argument, size, held) passing buf to the DLL.
+    buf = bytes, bytearray, memoryview (including slices) or ctypes char array
+    writable = True if the DLL stores data into buf
+    size is the buffer length in bytes
+    held is None or a Py_buffer view the caller must release with
+    _release_buffer() after the DLL call
+    Read-only buffers smaller than READONLY_COPY_SIZE are copied,
+    all other buffers are passed by reference.
+    """
+    buf_type = type(buf)
+    if buf_type is bytes and not writable:
+        return buf, len(buf), None
+    if buf_type is bytearray:
+        size = len(buf)
+        return _char_array(size).from_buffer(buf), size, None
+    if buf_type is memoryview:
+        view = buf
+    elif isinstance(buf, ctypes.Array):
+        return buf, ctypes.sizeof(buf), None
+    else:
+        view = memoryview(buf)
+    size = view.nbytes
+    if view.readonly:
+        if writable:
+            raise TypeError('receive buffer is read-only')
+        if size < READONLY_COPY_SIZE:
+            # opted in: copy is cheaper than holding small buffers
+            return bytes(view), size, None
+        held = _hold_buffer(view)
+        return _char_array(size).from_address(held.buf), size, held
+    return _char_array(size).from_buffer(view), size, None
+
+
+#
+# Driver backends
+#
+# The Win32 and Microgate API functions (GetLastError, MgslOpen, MgslRead...)
+# are provided by a driver backend object with a method for each name in
+# BACKEND_FUNCTIONS. set_backend() binds the module level function names to
+# the backend methods so calls dispatch with no extra indirection. Modules
+# that import these names directly (from mgapi import MgslRead) must do so
+# after selecting the backend.
 #
-# General Purpose I/O Control/Status Functions
+# DllBackend calls the Microgate DLL (Windows with SyncLink hardware).
+# mgsim.SimBackend simulates SyncLink devices in process (any platform).
+#
+# If no backend is selected before the first call, the backend named by
+# the MGAPI_BACKEND environment variable ('dll' or 'sim') is used. The
+# default is 'dll' on Windows and 'sim' elsewhere.
 #
 
-# ULONG __stdcall MgslSetGpio(HANDLE hDevice, GPIO_DESC *gpio);
-c_MgslSetGpio = mghdlc_dll.MgslSetGpio
-c_MgslSetGpio.argtypes = [LPVOID, LPVOID]
-c_MgslSetGpio.restype = ULONG
+BACKEND_FUNCTIONS = (
+    'GetLastError',
+    'WaitForSingleObject',
+    'WaitForMultipleObjects',
+    'CreateEvent',
+    'ResetEvent',
+    'CloseHandle',
+    'MgslOpen',
+    'MgslOpenByName',
+    'MgslClose',
+    'MgslSetParams',
+    'MgslGetParams',
+    'MgslSetOption',
+    'MgslGetOption',
+    'MgslGetPortConfigEx',
+    'MgslSetPortConfigEx',
+    'MgslSetSerialSignals',
+    'MgslGetSerialSignals',
+    'MgslWaitEvent',
+    'MgslCancelWaitEvent',
+    'MgslSetGpio',
+    'MgslGetGpio',
+    'MgslWaitGpio',
+    'MgslCancelWaitGpio',
+    'MgslCancelTransmit',
+    'MgslEnableTransmitter',
+    'MgslSetIdleMode',
+    'MgslWrite',
+    'MgslWaitAllSent',
+    'MgslCancelReceive',
+    'MgslEnableReceiver',
+    'MgslRead',
+    'MgslReadWithStatus',
+    'MgslGetAssignedResources',
+    'MgslEnumeratePorts'
+)
+
+_backend = None
+# threading module is not imported to keep import mgapi fast
+_backend_lock = _thread.allocate_lock()
+
+
+def _bind_backend(backend):
+    global _backend
+    names = globals()
+    for name in BACKEND_FUNCTIONS:
+        names[name] = getattr(backend, name)
+    _backend = backend
+
+
+def set_backend(backend):
+    """
+    Select driver backend used by all API functions and Port objects.
+    Ports opened with the previous backend must be closed first.
+    """
+    with _backend_lock:
+        _bind_backend(backend)
+    # ports of previous backend
+    port_registry.clear()
 
-def MgslSetGpio(port: HANDLE, gpio: GPIO_DESC) -> int:
-    """Set GPIO states."""
-    return c_MgslSetGpio(port, ctypes.byref(gpio))
 
+def get_backend():
+    """
+    Return selected driver backend.
+    If none is selected, select the backend named by MGAPI_BACKEND.
+    """
+    with _backend_lock:
+        if _backend is None:
+            name = os.environ.get('MGAPI_BACKEND')
+            if not name:
+                name = 'dll' if hasattr(ctypes, 'windll') else 'sim'
+            if name == 'dll':
+                _bind_backend(DllBackend())
+            elif name == 'sim':
+                import mgsim
+                _bind_backend(mgsim.SimBackend())
+            else:
+                raise ValueError('unknown MGAPI_BACKEND = ' + name)
+        return _backend
 
-# ULONG __stdcall MgslGetGpio( HANDLE hDevice, GPIO_DESC *gpio );
-c_MgslGetGpio = mghdlc_dll.MgslGetGpio
-c_MgslGetGpio.argtypes = [LPVOID, LPVOID]
-c_MgslGetGpio.restype = ULONG
 
-def MgslGetGpio(port: HANDLE, gpio: GPIO_DESC) -> int:
-    """Get GPIO states."""
-    return c_MgslGetGpio(port, ctypes.byref(gpio))
+def _unbound_function(name: str):
+    """Return placeholder that selects the default backend on first call."""
+    def call(*args):
+        return getattr(get_backend(), name)(*args)
+    call.__name__ = name
+    return call
 
 
-# ULONG __stdcall MgslWaitGpio(HANDLE hDevice, GPIO_DESC *gpio, LPOVERLAPPED ol);
-c_MgslWaitGpio = mghdlc_dll.MgslWaitGpio
-c_MgslWaitGpio.argtypes = [LPVOID, LPVOID, LPVOID]
-c_MgslWaitGpio.restype = ULONG
+for _name in BACKEND_FUNCTIONS:
+    globals()[_name] = _unbound_function(_name)
+del _name
 
-def MgslWaitGpio(port: HANDLE, gpio: GPIO_DESC, ol: OVERLAPPED) -> int:
-    """Wait for general purpose I/O event."""
-    return c_MgslWaitGpio(port, ctypes.byref(gpio), ctypes.byref(ol))
 
+# ctypes function prototypes bound on first use by DllBackend
+# name: (DLL, exported symbol, argtypes, restype)
+_DLL_PROTOTYPES = {
+    # DWORD GetLastError();
+    'GetLastError': ('kernel32', 'GetLastError', [], DWORD),
 
-# ULONG __stdcall MgslCancelWaitGpio(HANDLE hDevice);
-c_MgslCancelWaitGpio = mghdlc_dll.MgslCancelWaitGpio
-c_MgslCancelWaitGpio.argtypes = [LPVOID]
-c_MgslCancelWaitGpio.restype = ULONG
+    # DWORD WaitForSingleObject(HANDLE hHandle, DWORD dwMilliseconds);
+    'WaitForSingleObject': ('kernel32', 'WaitForSingleObject', [HANDLE, DWORD], DWORD),
 
-def MgslCancelWaitGpio(port: HANDLE) -> int:
-    """Cancel wait for general purpose I/O event."""
-    return c_MgslCancelWaitGpio(port)
+    # DWORD WaitForMultipleObjects(DWORD nCount, const HANDLE *lpHandles,
+    #            BOOL bWaitAll, DWORD dwMilliseconds);
+    'WaitForMultipleObjects': ('kernel32', 'WaitForMultipleObjects',
+                               [DWORD, LPVOID, BOOL, DWORD], DWORD),
 
+    # HANDLE CreateEventA(LPSECURITY_ATTRIBUTES lpEventAttributes,
+    #            BOOL bManualReset, BOOL bInitialState, LPCSTR lpName);
+    'CreateEvent': ('kernel32', 'CreateEventA',
+                    [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCSTR],
+                    HANDLE),
 
-#
-# Data Communication Functions
-#
+    # BOOL ResetEvent(HANDLE hEvent);
+    'ResetEvent': ('kernel32', 'ResetEvent', [HANDLE], wintypes.BOOL),
 
-# ULONG __stdcall MgslCancelTransmit(HANDLE hDevice);
-c_MgslCancelTransmit = mghdlc_dll.MgslCancelTransmit
-c_MgslCancelTransmit.argtypes = [HANDLE]
-c_MgslCancelTransmit.restype = ULONG
+    # BOOL CloseHandle(HANDLE hObject);
+    'CloseHandle': ('kernel32', 'CloseHandle', [HANDLE], wintypes.BOOL),
 
-def MgslCancelTransmit(port: HANDLE) -> int:
-    """Cancel blocked write."""
-    return c_MgslCancelTransmit(port)
+    # ULONG __stdcall MgslOpen(ULONG PortID, PHANDLE pHandle);
+    'MgslOpen': ('mghdlc', 'MgslOpen', [ULONG, LPVOID], ULONG),
 
+    # ULONG __stdcall MgslOpenByName(char *PortName, PHANDLE pHandle);
+    'MgslOpenByName': ('mghdlc', 'MgslOpenByName', [LPCSTR, LPVOID], ULONG),
 
-# ULONG __stdcall MgslEnableTransmitter(HANDLE hDevice, BOOL EnableFlag);
-c_MgslEnableTransmitter = mghdlc_dll.MgslEnableTransmitter
-c_MgslEnableTransmitter.argtypes = [HANDLE, BOOL]
-c_MgslEnableTransmitter.restype = ULONG
+    # ULONG __stdcall MgslClose(HANDLE hDevice);
+    'MgslClose': ('mghdlc', 'MgslClose', [LPVOID], ULONG),
 
-def MgslEnableTransmitter(port: HANDLE, enable: int) -> int:
-    """Enable or disable transmitter for open port."""
-    return c_MgslEnableTransmitter(port, BOOL(enable))
+    # ULONG __stdcall MgslSetParams(HANDLE hDevice, PMGSL_PARAMS pParams);
+    'MgslSetParams': ('mghdlc', 'MgslSetParams', [LPVOID, LPVOID], ULONG),
 
+    # ULONG __stdcall MgslGetParams(HANDLE hDevice, PMGSL_PARAMS pParams);
+    'MgslGetParams': ('mghdlc', 'MgslGetParams', [LPVOID, LPVOID], ULONG),
 
-# ULONG __stdcall MgslSetIdleMode(HANDLE hDevice, ULONG IdleMode);
-c_MgslSetIdleMode = mghdlc_dll.MgslSetIdleMode
-c_MgslSetIdleMode.argtypes = [HANDLE, ULONG]
-c_MgslSetIdleMode.restype = ULONG
+    # ULONG __stdcall MgslSetOption(HANDLE hDevice, UINT option_id, UINT value);
+    'MgslSetOption': ('mghdlc', 'MgslSetOption', [HANDLE, wintypes.UINT, wintypes.UINT], ULONG),
 
-def MgslSetIdleMode(port: HANDLE, mode: int) -> int:
-    """Select transmit idle mode or sync pattern (monosync/bisync)."""
-    return c_MgslSetIdleMode(port, mode)
+    # ULONG __stdcall MgslGetOption(HANDLE hDevice, UINT option_id, UINT *value);
+    'MgslGetOption': ('mghdlc', 'MgslGetOption', [HANDLE, wintypes.UINT, LPVOID], ULONG),
 
+    # ULONG __stdcall MgslGetPortConfigEx(ULONG PortID, PMGSL_PORT_CONFIG_EX pConfig);
+    'MgslGetPortConfigEx': ('mghdlc', 'MgslGetPortConfigEx', [ULONG, LPVOID], ULONG),
 
-# int __stdcall MgslWrite(HANDLE hDevice, unsigned char *buf, int size);
-c_MgslWrite = mghdlc_dll.MgslWrite
-c_MgslWrite.argtypes = [HANDLE, LPCSTR, ctypes.c_int]
-c_MgslWrite.restype = ctypes.c_int
+    # ULONG __stdcall MgslSetPortConfigEx(ULONG PortID, PMGSL_PORT_CONFIG_EX pConfig);
+    'MgslSetPortConfigEx': ('mghdlc', 'MgslSetPortConfigEx', [ULONG, LPVOID], ULONG),
 
-def MgslWrite(port: HANDLE, buf: bytearray, size: int) -> int:
-    """Send data on open port."""
-    char_array = ctypes.c_char * len(buf)
-    if size > len(buf):
-        size = len(buf)
-    return c_MgslWrite(port, char_array.from_buffer(buf), size)
+    # ULONG __stdcall MgslSetSerialSignals(HANDLE hDevice, UCHAR NewSignals);
+    'MgslSetSerialSignals': ('mghdlc', 'MgslSetSerialSignals', [LPVOID, UCHAR], ULONG),
 
+    # ULONG __stdcall MgslGetSerialSignals(HANDLE hDevice, PUCHAR pReturnedSignals);
+    'MgslGetSerialSignals': ('mghdlc', 'MgslGetSerialSignals', [LPVOID, LPVOID], ULONG),
 
-# int __stdcall MgslWaitAllSent(HANDLE hDevice);
-c_MgslWaitAllSent = mghdlc_dll.MgslWaitAllSent
-c_MgslWaitAllSent.argtypes = [HANDLE]
-c_MgslWaitAllSent.restype = ctypes.c_int
+    # ULONG __stdcall MgslWaitEvent(HANDLE hDevice, ULONG EventMask,
+    # 			PULONG pEvents, LPOVERLAPPED pOverlapped);
+    'MgslWaitEvent': ('mghdlc', 'MgslWaitEvent', [LPVOID, ULONG, LPVOID, LPVOID], ULONG),
 
-def MgslWaitAllSent(port: HANDLE) -> int:
-    """Wait for all send data to complete on port."""
-    return c_MgslWaitAllSent(port)
+    # ULONG __stdcall MgslCancelWaitEvent(HANDLE hDevice);
+    'MgslCancelWaitEvent': ('mghdlc', 'MgslCancelWaitEvent', [LPVOID], ULONG),
 
+    # ULONG __stdcall MgslSetGpio(HANDLE hDevice, GPIO_DESC *gpio);
+    'MgslSetGpio': ('mghdlc', 'MgslSetGpio', [LPVOID, LPVOID], ULONG),
 
-# ULONG __stdcall MgslCancelReceive(HANDLE hDevice);
-c_MgslCancelReceive = mghdlc_dll.MgslCancelReceive
-c_MgslCancelReceive.argtypes = [LPVOID]
-c_MgslCancelReceive.restype = ULONG
+    # ULONG __stdcall MgslGetGpio( HANDLE hDevice, GPIO_DESC *gpio );
+    'MgslGetGpio': ('mghdlc', 'MgslGetGpio', [LPVOID, LPVOID], ULONG),
 
-def MgslCancelReceive(port: HANDLE) -> int:
-    """Cancel blocked read."""
-    return c_MgslCancelReceive(port)
+    # ULONG __stdcall MgslWaitGpio(HANDLE hDevice, GPIO_DESC *gpio, LPOVERLAPPED ol);
+    'MgslWaitGpio': ('mghdlc', 'MgslWaitGpio', [LPVOID, LPVOID, LPVOID], ULONG),
 
+    # ULONG __stdcall MgslCancelWaitGpio(HANDLE hDevice);
+    'MgslCancelWaitGpio': ('mghdlc', 'MgslCancelWaitGpio', [LPVOID], ULONG),
 
-# ULONG __stdcall MgslEnableReceiver(HANDLE hDevice, BOOL EnableFlag);
-c_MgslEnableReceiver = mghdlc_dll.MgslEnableReceiver
-c_MgslEnableReceiver.argtypes = [HANDLE, BOOL]
-c_MgslEnableReceiver.restype = ULONG
+    # ULONG __stdcall MgslCancelTransmit(HANDLE hDevice);
+    'MgslCancelTransmit': ('mghdlc', 'MgslCancelTransmit', [HANDLE], ULONG),
 
-def MgslEnableReceiver(port: HANDLE, enable: int) -> int:
-    return c_MgslEnableReceiver(port, enable)
+    # ULONG __stdcall MgslEnableTransmitter(HANDLE hDevice, BOOL EnableFlag);
+    'MgslEnableTransmitter': ('mghdlc', 'MgslEnableTransmitter', [HANDLE, BOOL], ULONG),
 
+    # ULONG __stdcall MgslSetIdleMode(HANDLE hDevice, ULONG IdleMode);
+    'MgslSetIdleMode': ('mghdlc', 'MgslSetIdleMode', [HANDLE, ULONG], ULONG),
 
-# int __stdcall MgslRead(HANDLE hDevice, unsigned char *buf, int size);
-c_MgslRead = mghdlc_dll.MgslRead
-c_MgslRead.argtypes = [HANDLE, LPCSTR, ctypes.c_int]
-c_MgslRead.restype = ctypes.c_int
+    # int __stdcall MgslWrite(HANDLE hDevice, unsigned char *buf, int size);
+    'MgslWrite': ('mghdlc', 'MgslWrite', [HANDLE, LPCSTR, ctypes.c_int], ctypes.c_int),
 
-def MgslRead(port: HANDLE, buf: bytearray, size: int) -> int:
-    """Receive data from open port."""
-    char_array = ctypes.c_char * len(buf)
-    if size > len(buf):
-        size = len(buf)
-    return c_MgslRead(port, char_array.from_buffer(buf), size)
+    # int __stdcall MgslWaitAllSent(HANDLE hDevice);
+    'MgslWaitAllSent': ('mghdlc', 'MgslWaitAllSent', [HANDLE], ctypes.c_int),
 
+    # ULONG __stdcall MgslCancelReceive(HANDLE hDevice);
+    'MgslCancelReceive': ('mghdlc', 'MgslCancelReceive', [LPVOID], ULONG),
 
-# int __stdcall MgslReadWithStatus(HANDLE hDevice, unsigned char *buf,
-#                   int size, int *status);
-c_MgslReadWithStatus = mghdlc_dll.MgslReadWithStatus
-c_MgslReadWithStatus.argtypes = [HANDLE, LPCSTR, ctypes.c_int, LPVOID]
-c_MgslReadWithStatus.restype = ctypes.c_int
+    # ULONG __stdcall MgslEnableReceiver(HANDLE hDevice, BOOL EnableFlag);
+    'MgslEnableReceiver': ('mghdlc', 'MgslEnableReceiver', [HANDLE, BOOL], ULONG),
 
-def MgslReadWithStatus(port: HANDLE, buf: bytearray,
-                       size: int, status: INT) -> int:
-    char_array = ctypes.c_char * len(buf)
-    if size > len(buf):
-        size = len(buf)
-    return c_MgslReadWithStatus(port, char_array.from_buffer(buf),
-                                size, ctypes.byref(status))
+    # int __stdcall MgslRead(HANDLE hDevice, unsigned char *buf, int size);
+    'MgslRead': ('mghdlc', 'MgslRead', [HANDLE, LPCSTR, ctypes.c_int], ctypes.c_int),
+
+    # int __stdcall MgslReadWithStatus(HANDLE hDevice, unsigned char *buf,
+    #                   int size, int *status);
+    'MgslReadWithStatus': ('mghdlc', 'MgslReadWithStatus', [HANDLE, LPCSTR, ctypes.c_int, LPVOID], ctypes.c_int),
+
+    # ULONG __stdcall MgslGetAssignedResources(HANDLE hDevice,
+    #                     PMGSL_ASSIGNED_RESOURCES pRes);
+    'MgslGetAssignedResources': ('mghdlc', 'MgslGetAssignedResources', [HANDLE, LPVOID], ULONG),
+
+    # ULONG __stdcall MgslEnumeratePorts(PMGSL_PORT pPorts,
+    #                     ULONG BufferSize, PULONG pPortCount);
+    'MgslEnumeratePorts': ('mghdlc', 'MgslEnumeratePorts', [LPVOID, ULONG, LPVOID], ULONG)
+}
+
+
+class DllBackend():
+    """
+    Driver backend calling the Microgate serial API DLL through ctypes.
+    DLLs are loaded and function prototypes bound on first use, so
+    creating the backend (and importing mgapi) does not touch the DLL.
+    """
+
+    def __init__(self):
+        self._dlls = {}
+
+    def _load_dll(self, dll: str):
+        """Return loaded DLL, loading on first use."""
+        lib = self._dlls.get(dll)
+        if lib is None:
+            lib = ctypes.windll.LoadLibrary(dll + '.dll')
+            self._dlls[dll] = lib
+        return lib
+
+    def __getattr__(self, name: str):
+        # called only for missing attributes: bind c_* prototype and
+        # store it on the instance so later calls skip this method
+        prototype = None
+        if name.startswith('c_'):
+            prototype = _DLL_PROTOTYPES.get(name[2:])
+        if prototype is None:
+            raise AttributeError(name)
+        dll, symbol, argtypes, restype = prototype
+        func = getattr(self._load_dll(dll), symbol)
+        func.argtypes = argtypes
+        func.restype = restype
+        setattr(self, name, func)
+        return func
+
+    # Win32 Functions
+
+    def GetLastError(self) -> int:
+        """Return last Win32 error code."""
+        return self.c_GetLastError()
+
+    def WaitForSingleObject(self, handle: HANDLE, timeout: int) -> int:
+        """Wait for Win32 object to be signalled."""
+        return self.c_WaitForSingleObject(handle, DWORD(timeout))
+
+    def WaitForMultipleObjects(self, handles: list, wait_all: bool, timeout: int) -> int:
+        """
+        Wait for one or all of a list of Win32 objects to be signalled.
+        returns WAIT_OBJECT_0 + index of signalled object, WAIT_TIMEOUT or error
+        """
+        handle_array = (HANDLE * len(handles))(*handles)
+        return self.c_WaitForMultipleObjects(DWORD(len(handles)), handle_array,
+                                             BOOL(wait_all), DWORD(timeout))
+
+    def CreateEvent(self, manual_reset: bool, initial_state: bool) -> HANDLE:
+        """Create Win32 event object."""
+        return self.c_CreateEvent(wintypes.LPVOID(0), wintypes.BOOL(manual_reset),
+                                  wintypes.BOOL(initial_state), wintypes.LPCSTR(0))
+
+    def ResetEvent(self, handle: HANDLE) -> int:
+        """Reset Win32 event object."""
+        return self.c_ResetEvent(handle)
+
+    def CloseHandle(self, handle: HANDLE) -> int:
+        """Close handle to Win32 object."""
+        return self.c_CloseHandle(handle)
+
+    # Device Access Functions
+
+    def MgslOpen(self, port_id: int, port: HANDLE) -> int:
+        """Open handle to port identified by integer port ID."""
+        return self.c_MgslOpen(ULONG(port_id), ctypes.byref(port))
+
+    def MgslOpenByName(self, name: str, port: HANDLE) -> int:
+        """Open handle to port identified by name."""
+        return self.c_MgslOpenByName(LPCSTR(name.encode('utf-8')), ctypes.byref(port))
+
+    def MgslClose(self, port: HANDLE) -> int:
+        """Close port identified by open handle."""
+        rc = self.c_MgslClose(port)
+        if rc == 0:
+            port.value = MGSL_INVALID_HANDLE
+        return rc
+
+    # Device Configuration Functions
+
+    def MgslSetParams(self, port: HANDLE, params: MGSL_PARAMS) -> int:
+        """Set configuration parameters for open port."""
+        return self.c_MgslSetParams(port, ctypes.byref(params))
+
+    def MgslGetParams(self, port: HANDLE, params: MGSL_PARAMS) -> int:
+        """Get configuration parameters for open port."""
+        return self.c_MgslGetParams(port, ctypes.byref(params))
+
+    def MgslSetOption(self, port: HANDLE, option_id: int, option_value: int) -> int:
+        """Set option value for specified option ID."""
+        return self.c_MgslSetOption(port, wintypes.UINT(option_id),
+                                    wintypes.UINT(option_value))
+
+    def MgslGetOption(self, port: HANDLE, option_id: int, option_value: INT) -> int:
+        """Get option value for specified option ID."""
+        return self.c_MgslGetOption(port, wintypes.UINT(option_id),
+                                    ctypes.byref(option_value))
+
+    def MgslGetPortConfigEx(self, port_id: int, port_config: MGSL_PORT_CONFIG_EX) -> int:
+        """Get driver load time options for port."""
+        port_config.Size = ctypes.sizeof(port_config)
+        return self.c_MgslGetPortConfigEx(ULONG(port_id), ctypes.byref(port_config))
+
+    def MgslSetPortConfigEx(self, port_id: int, port_config: MGSL_PORT_CONFIG_EX) -> int:
+        """Set driver load time options for port."""
+        port_config.Size = ctypes.sizeof(port_config)
+        return self.c_MgslSetPortConfigEx(ULONG(port_id), ctypes.byref(port_config))
+
+    # Device Control/Status Functions
+
+    def MgslSetSerialSignals(self, port: HANDLE, signals: int) -> int:
+        """Set control output states for open port."""
+        return self.c_MgslSetSerialSignals(port, UCHAR(signals))
+
+    def MgslGetSerialSignals(self, port: HANDLE, signals: INT) -> int:
+        """Get control and status signal states for open port."""
+        local_signals = UCHAR(signals.value)
+        rc = self.c_MgslGetSerialSignals(port, ctypes.byref(local_signals))
+        signals.value = local_signals.value & 0xff
+        return rc
+
+    def MgslWaitEvent(self, port: HANDLE, event_mask: int, events: INT, ol: OVERLAPPED) -> int:
+        """Wait for serial port event."""
+        return self.c_MgslWaitEvent(port, ULONG(event_mask), ctypes.byref(events), ctypes.byref(ol))
+
+    def MgslCancelWaitEvent(self, port: HANDLE) -> int:
+        """Cancel wait for serial port event."""
+        return self.c_MgslCancelWaitEvent(port)
+
+    # General Purpose I/O Control/Status Functions
+
+    def MgslSetGpio(self, port: HANDLE, gpio: GPIO_DESC) -> int:
+        """Set GPIO states."""
+        return self.c_MgslSetGpio(port, ctypes.byref(gpio))
+
+    def MgslGetGpio(self, port: HANDLE, gpio: GPIO_DESC) -> int:
+        """Get GPIO states."""
+        return self.c_MgslGetGpio(port, ctypes.byref(gpio))
+
+    def MgslWaitGpio(self, port: HANDLE, gpio: GPIO_DESC, ol: OVERLAPPED) -> int:
+        """Wait for general purpose I/O event."""
+        return self.c_MgslWaitGpio(port, ctypes.byref(gpio), ctypes.byref(ol))
+
+    def MgslCancelWaitGpio(self, port: HANDLE) -> int:
+        """Cancel wait for general purpose I/O event."""
+        return self.c_MgslCancelWaitGpio(port)
+
+    # Data Communication Functions
+
+    def MgslCancelTransmit(self, port: HANDLE) -> int:
+        """Cancel blocked write."""
+        return self.c_MgslCancelTransmit(port)
+
+    def MgslEnableTransmitter(self, port: HANDLE, enable: int) -> int:
+        """Enable or disable transmitter for open port."""
+        return self.c_MgslEnableTransmitter(port, BOOL(enable))
+
+    def MgslSetIdleMode(self, port: HANDLE, mode: int) -> int:
+        """Select transmit idle mode or sync pattern (monosync/bisync)."""
+        return self.c_MgslSetIdleMode(port, mode)
+
+    def MgslWrite(self, port: HANDLE, buf, size: int) -> int:
+        """Send data on open port."""
+        ptr, length, held = _buffer_pointer(buf, False)
+        if size > length:
+            size = length
+        try:
+            return self.c_MgslWrite(port, ptr, size)
+        finally:
+            if held is not None:
+                _release_buffer(held)
+
+    def MgslWaitAllSent(self, port: HANDLE) -> int:
+        """Wait for all send data to complete on port."""
+        return self.c_MgslWaitAllSent(port)
+
+    def MgslCancelReceive(self, port: HANDLE) -> int:
+        """Cancel blocked read."""
+        return self.c_MgslCancelReceive(port)
+
+    def MgslEnableReceiver(self, port: HANDLE, enable: int) -> int:
+        return self.c_MgslEnableReceiver(port, enable)
+
+    def MgslRead(self, port: HANDLE, buf, size: int) -> int:
+        """Receive data from open port."""
+        ptr, length, held = _buffer_pointer(buf, True)
+        if size > length:
+            size = length
+        return self.c_MgslRead(port, ptr, size)
+
+    def MgslReadWithStatus(self, port: HANDLE, buf, size: int, status: INT) -> int:
+        """Receive data and status from open port."""
+        ptr, length, held = _buffer_pointer(buf, True)
+        if size > length:
+            size = length
+        return self.c_MgslReadWithStatus(port, ptr, size, ctypes.byref(status))
+
+    # Misc Functions
+
+    def MgslGetAssignedResources(self, port: HANDLE, port_res: MGSL_ASSIGNED_RESOURCES) -> int:
+        """Get system assigned resources for port."""
+        return self.c_MgslGetAssignedResources(port, ctypes.byref(port_res))
+
+    def MgslEnumeratePorts(self, ports: []) -> int:
+        """Enumerate configured ports. Listed ports may not be plugged in."""
+        local_ports = (MGSL_PORT * MGSL_MAX_PORTS)()
+        count = ULONG()
+        rc = self.c_MgslEnumeratePorts(ctypes.pointer(local_ports),
+                                       ctypes.sizeof(local_ports), ctypes.byref(count))
+        ports.clear()
+        for i in range(0, count.value):
+            ports.append(local_ports[i])
+        return rc
 
 
 #
 # Misc Functions
 #
 
-# ULONG __stdcall MgslGetAssignedResources(HANDLE hDevice,
-#                     PMGSL_ASSIGNED_RESOURCES pRes);
-c_MgslGetAssignedResources = mghdlc_dll.MgslGetAssignedResources
-c_MgslGetAssignedResources.argtypes = [HANDLE, LPVOID]
-c_MgslGetAssignedResources.restype = ULONG
-
-def MgslGetAssignedResources(port: HANDLE, port_res: MGSL_ASSIGNED_RESOURCES) -> int:
-    """Get system assigned resources for port."""
-    return c_MgslGetAssignedResources(port, ctypes.byref(port_res))
-
-
-# ULONG __stdcall MgslEnumeratePorts(PMGSL_PORT pPorts,
-#                     ULONG BufferSize, PULONG pPortCount);
-c_MgslEnumeratePorts = mghdlc_dll.MgslEnumeratePorts
-c_MgslEnumeratePorts.argtypes = [LPVOID, ULONG, LPVOID]
-c_MgslEnumeratePorts.restype = ULONG
-
-def MgslEnumeratePorts(ports: []) -> int:
-    """Enumerate configured ports. Listed ports may not be plugged in."""
-    local_ports = (MGSL_PORT * MGSL_MAX_PORTS)()
-    count = ULONG()
-    rc = c_MgslEnumeratePorts(ctypes.pointer(local_ports),
-                              ctypes.sizeof(local_ports), ctypes.byref(count))
-    ports.clear()
-    for i in range(0, count.value):
-        ports.append(local_ports[i])
-    return rc
-
-
-def MgslWaitEventTimed(port: HANDLE, event_mask: int, events: INT, timeout: int) -> int:
+def MgslWaitEventTimed(port: HANDLE, event_mask: int, events: INT, timeout: int,
+                       ol: OVERLAPPED = None) -> int:
     """
     Wait for serial port event.
     event_mask = one or more desired events (bitmask)
     events     = if success, contains completion state/events
     timeout    = timeout in milliseconds
+    ol         = optional reusable overlapped structure with manual reset
+                 event, if not specified one is created for this wait
     returns 0 on success, WAIT_TIMEOUT if timeout or error code
     """
 
-    # create Win32 overlapped structure and event to monitor wait progress
-    ol = OVERLAPPED()
-    ol.hEvent = CreateEvent(True, False)
-    if ol.hEvent == 0:
-        return ERROR_GEN_FAILURE
+    if ol is None:
+        # create Win32 overlapped structure and event to monitor wait progress
+        wait_ol = OVERLAPPED()
+        wait_ol.hEvent = CreateEvent(True, False)
+        if not wait_ol.hEvent:
+            return ERROR_GEN_FAILURE
+    else:
+        wait_ol = ol
 
     # MgslWaitEvent returns immediately with code:
     # 0 = in desired state (no wait needed)
     # ERROR_IO_PENDING = wait for desired state (monitor event)
     # other = error, request failed
-    rc = MgslWaitEvent(port, event_mask, events, ol)
+    rc = MgslWaitEvent(port, event_mask, events, wait_ol)
     if rc == ERROR_IO_PENDING:
         # wait for desired state
-        rc = WaitForSingleObject(ol.hEvent, timeout)
+        rc = WaitForSingleObject(wait_ol.hEvent, timeout)
         if rc == WAIT_TIMEOUT:
             # timeout waiting for desired state
             # cancel wait and wait for cancel to complete
             MgslCancelWaitEvent(port)
-            WaitForSingleObject(ol.hEvent, INFINITE)
+            WaitForSingleObject(wait_ol.hEvent, INFINITE)
 
-    CloseHandle(ol.hEvent)
+    if ol is None:
+        CloseHandle(wait_ol.hEvent)
     return rc
 
 
-def MgslWaitGpioTimed(port: HANDLE, gpio: GPIO_DESC, timeout: int) -> int:
+def MgslWaitGpioTimed(port: HANDLE, gpio: GPIO_DESC, timeout: int,
+                      ol: OVERLAPPED = None) -> int:
     """
     Wait for general purpose I/O event.
     gpio = on entry contains desired states
            on success contains completing states
     timeout    = timeout in milliseconds
+    ol         = optional reusable overlapped structure with manual reset
+                 event, if not specified one is created for this wait
     returns 0 on success, WAIT_TIMEOUT if timeout or error code
     """
 
-    # create Win32 overlapped structure and event to monitor wait progress
-    ol = OVERLAPPED()
-    ol.hEvent = CreateEvent(True, False)
-    if ol.hEvent == 0:
-        return ERROR_GEN_FAILURE
+    if ol is None:
+        # create Win32 overlapped structure and event to monitor wait progress
+        wait_ol = OVERLAPPED()
+        wait_ol.hEvent = CreateEvent(True, False)
+        if not wait_ol.hEvent:
+            return ERROR_GEN_FAILURE
+    else:
+        wait_ol = ol
 
     # MgslGpioEvent returns immediately with code:
     # 0 = in desired state (no wait needed)
     # ERROR_IO_PENDING = wait for desired state (monitor event)
     # other = error, request failed
-    rc = MgslWaitGpio(port, gpio, ol)
+    rc = MgslWaitGpio(port, gpio, wait_ol)
     if rc == ERROR_IO_PENDING:
         # wait for desired state
-        rc = WaitForSingleObject(ol.hEvent, timeout)
+        rc = WaitForSingleObject(wait_ol.hEvent, timeout)
         if rc == WAIT_TIMEOUT:
             # timeout waiting for desired state
             # cancel wait and wait for cancel to complete
             MgslCancelWaitGpio(port)
-            WaitForSingleObject(ol.hEvent, INFINITE)
+            WaitForSingleObject(wait_ol.hEvent, INFINITE)
 
-    CloseHandle(ol.hEvent)
+    if ol is None:
+        CloseHandle(wait_ol.hEvent)
     return rc
 
 
+def create_overlapped() -> OVERLAPPED:
+    """
+    Return overlapped structure with manual reset event for reuse
+    across waits, None if event can't be created.
+    Release with CloseHandle(ol.hEvent).
+    """
+    ol = OVERLAPPED()
+    ol.hEvent = CreateEvent(True, False)
+    if not ol.hEvent:
+        return None
+    return ol
+
+
 #
 # Object oriented API
 #
 
 import os.path
 
+
+class PortRegistry():
+    """
+    Process wide cache of configured ports.
+
+    MgslEnumeratePorts lists every configured port of the system.
+    The registry keeps the result so that constructing Port objects
+    does not enumerate the system for every port. Assigned resources
+    are cached by name when read from an open port.
+
+    Use refresh() after adding or removing devices, or changed() to
+    check (and refresh) if the configured ports changed. Both enumerate
+    the system, changed() only saves rebuilding unchanged entries.
+    Port names keep the case reported by MgslEnumeratePorts and are
+    looked up without regard to case.
+    """
+
+    class Entry():
+        """Registry entry for one configured port."""
+        __slots__ = ('name', 'port_id', 'device_id', 'resources')
+
+        def __init__(self, name: str, port_id: int, device_id: int):
+            self.name = name            # port name as enumerated
+            self.port_id = port_id      # numerical port ID
+            self.device_id = device_id  # device ID
+            self.resources = None       # MGSL_ASSIGNED_RESOURCES if known
+
+        def __repr__(self):
+            return 'PortRegistry.Entry(%s, port_id=%#x, device_id=%s)' % \
+                (self.name, self.port_id, device_id_str(self.device_id))
+
+    # minimum seconds between enumerations to look up unknown names
+    MISS_INTERVAL = 1.0
+
+    def __init__(self):
+        self._lock = _thread.allocate_lock()
+        self._entries = None    # upper case name: Entry
+        self._signature = None
+        self._enumerated = None  # time.monotonic() of last enumeration
+        self.generation = 0  # incremented when registry is rebuilt
+
+    def _enumerate(self):
+        """Return (signature, list of MGSL_PORT) of configured ports."""
+        ports = []
+        MgslEnumeratePorts(ports)
+        self._enumerated = time.monotonic()
+        # raw structure contents identify the configuration
+        return b''.join(bytes(p) for p in ports), ports
+
+    def _update(self, signature: bytes, ports: list, keep_resources: bool):
+        # caller holds lock
+        old_entries = self._entries or {}
+        entries = {}
+        for p in ports:
+            entry = self.Entry(p.port_name(), p.PortID, p.DeviceID)
+            key = entry.name.upper()
+            old_entry = old_entries.get(key)
+            if keep_resources and old_entry is not None and \
+               old_entry.port_id == entry.port_id and \
+               old_entry.device_id == entry.device_id:
+                entry.resources = old_entry.resources
+            entries[key] = entry
+        self._entries = entries
+        self._signature = signature
+        self.generation += 1
+
+    def refresh(self) -> bool:
+        """
+        Enumerate configured ports and rebuild registry.
+        Cached resources are discarded.
+        Return True if configured ports changed.
+        """
+        signature, ports = self._enumerate()
+        with self._lock:
+            changed = signature != self._signature
+            self._update(signature, ports, False)
+        return changed
+
+    def changed(self) -> bool:
+        """
+        Enumerate configured ports and return True if they changed since
+        last enumeration. This costs one MgslEnumeratePorts call, only
+        the raw enumeration contents are compared. Entries are rebuilt
+        only on change and keep cached resources of ports with the same
+        port and device ID.
+        """
+        signature, ports = self._enumerate()
+        with self._lock:
+            if signature == self._signature:
+                return False
+            self._update(signature, ports, True)
+        return True
+
+    def _entries_dict(self) -> dict:
+        if self._entries is None:
+            self.changed()
+        return self._entries
+
+    def names(self) -> list:
+        """Return list of configured port names."""
+        return [entry.name for entry in self._entries_dict().values()]
+
+    def entries(self) -> list:
+        """Return list of PortRegistry.Entry objects."""
+        return list(self._entries_dict().values())
+
+    def lookup(self, name: str) -> Entry:
+        """
+        Return PortRegistry.Entry for port name or None if not configured.
+        Unknown names refresh the registry to find new ports, at most
+        once per MISS_INTERVAL seconds.
+        """
+        name = name.upper()
+        entry = self._entries_dict().get(name)
+        if entry is None and \
+           time.monotonic() - self._enumerated >= self.MISS_INTERVAL and \
+           self.changed():
+            entry = self._entries.get(name)
+        return entry
+
+    def set_resources(self, name: str, resources: MGSL_ASSIGNED_RESOURCES):
+        """Cache assigned resources of port name (read from open port)."""
+        entry = self._entries_dict().get(name.upper())
+        if entry is not None:
+            entry.resources = resources
+
+    def clear(self):
+        """Discard cached ports, next use enumerates again."""
+        with self._lock:
+            self._entries = None
+            self._signature = None
+
+
+# process wide port registry used by Port
+port_registry = PortRegistry()
+
+
+class _SlotsValue():
+    """
+    Base for objects with fixed attributes (listed in __slots__)
+    compared, hashed and copied by value.
+    """
+    __slots__ = ()
+
+    def _key(self) -> tuple:
+        """Return tuple of attribute values in __slots__ order."""
+        return self._values(self)
+
+    @classmethod
+    def _from_key(cls, key: tuple):
+        """Return new object with attribute values from _key() tuple."""
+        obj = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, key):
+            setattr(obj, name, value)
+        return obj
+
+    def copy(self):
+        """Return copy of object."""
+        return self._from_key(self._values(self))
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        # attribute values are immutable
+        return self.copy()
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values(self) == other._values(other)
+
+    def __hash__(self):
+        # do not modify objects used as dictionary keys
+        return hash(self._values(self))
+
+
 class Port():
     """Object representing a serial communications port."""
 
     @classmethod
-    def enumerate(cls):
-        """Return list of port names."""
-        ports = []
+    def enumerate(cls, timeout: float = None):
+        """
+        Return list of port names of installed ports.
+        timeout = if specified, probe ports in parallel with probe() and
+                  this per port timeout in seconds
+        Enumeration updates the port registry. Each port is opened
+        to check it is installed.
+        """
+        if timeout is not None:
+            return [result.name for result in cls.probe(timeout=timeout)
+                    if result.status != Port.ProbeResult.BAD_DEVICE]
         names = []
-        MgslEnumeratePorts(ports)
-        for p in ports:
+        port_registry.changed()
+        for name in port_registry.names():
             handle = HANDLE()
-            error = MgslOpenByName(p.port_name(), handle)
+            error = MgslOpenByName(name, handle)
             if error == ERROR_BAD_DEVICE:
                 continue
             if not error:
                 MgslClose(handle)
-            names.append(p.port_name())
+            names.append(name)
         return names
 
+    class ProbeResult():
+        """Result of probing one port with Port.probe()."""
+
+        # probe status
+        PRESENT = 0     # port opened and closed
+        IN_USE = 1      # port installed but opened by another application
+        BAD_DEVICE = 2  # port configured but not installed
+        ERROR = 3       # open failed with other error
+        TIMEOUT = 4     # open did not complete within timeout
+
+        __slots__ = ('name', 'status', 'error', 'seconds')
+
+        def __init__(self, name: str, status: int, error: int, seconds: float):
+            self.name = name        # port name
+            self.status = status    # probe status
+            self.error = error      # MgslOpenByName return code
+            self.seconds = seconds  # probe time
+
+        def status_str(self):
+            return ('PRESENT', 'IN_USE', 'BAD_DEVICE', 'ERROR',
+                    'TIMEOUT')[self.status]
+
+        def __repr__(self):
+            return 'ProbeResult(%s, %s, error=%d, seconds=%.6f)' % \
+                (self.name, self.status_str(), self.error, self.seconds)
+
+    @staticmethod
+    def _probe_port(name: str):
+        """Return (status, error) of opening and closing port name."""
+        handle = HANDLE()
+        error = MgslOpenByName(name, handle)
+        if not error:
+            MgslClose(handle)
+            return Port.ProbeResult.PRESENT, error
+        if error == ERROR_BAD_DEVICE:
+            return Port.ProbeResult.BAD_DEVICE, error
+        if error == ERROR_ACCESS_DENIED or \
+           error == ERROR_DEVICE_IN_USE or \
+           error == ERROR_OPEN_FAILED:
+            return Port.ProbeResult.IN_USE, error
+        return Port.ProbeResult.ERROR, error
+
+    @classmethod
+    def probe(cls, names: list = None, timeout: float = 2.0,
+              max_workers: int = 16) -> list:
+        """
+        Probe ports in parallel and return list of Port.ProbeResult.
+        names = port names to probe, if not specified all configured ports
+        timeout = per port probe timeout in seconds
+        max_workers = maximum number of concurrent probes, not counting
+                      timed out probes that have not returned yet
+        Results are in the order of names. A probe that does not finish
+        within timeout is reported as TIMEOUT and its worker is replaced
+        so a stalled port does not hold up the other probes. A stalled
+        worker exits when its probe completes (closing the port if the
+        open succeeded) instead of taking more work.
+        """
+        if names is None:
+            port_registry.changed()
+            names = port_registry.names()
+        assert max_workers > 0, str.format("max_workers must be > 0")
+        count = len(names)
+        results = [None] * count
+        starts = [None] * count
+        pending = [0]  # next index to probe
+        cond = threading.Condition()
+
+        def worker():
+            while True:
+                with cond:
+                    i = pending[0]
+                    if i >= count:
+                        return
+                    pending[0] += 1
+                    starts[i] = time.perf_counter()
+                status, error = cls._probe_port(names[i])
+                with cond:
+                    if results[i] is not None:
+                        # probe timed out and this worker was replaced,
+                        # exit to stay within max_workers live workers
+                        return
+                    results[i] = cls.ProbeResult(
+                        names[i], status, error,
+                        time.perf_counter() - starts[i])
+                    cond.notify()
+
+        def start_worker():
+            threading.Thread(target=worker, daemon=True,
+                             name='mgapi probe').start()
+
+        for i in range(min(max_workers, count)):
+            start_worker()
+
+        with cond:
+            remaining = count - sum(r is not None for r in results)
+            while remaining:
+                now = time.perf_counter()
+                deadline = None
+                for i in range(pending[0]):
+                    if results[i] is not None:
+                        continue
+                    if now - starts[i] >= timeout:
+                        # abandon stalled probe and replace its worker
+                        results[i] = cls.ProbeResult(
+                            names[i], cls.ProbeResult.TIMEOUT, 0, now - starts[i])
+                        if pending[0] < count:
+                            start_worker()
+                    elif deadline is None or starts[i] + timeout < deadline:
+                        deadline = starts[i] + timeout
+                remaining = count - sum(r is not None for r in results)
+                if remaining:
+                    cond.wait(None if deadline is None else deadline - now)
+        return results
+
     # class constants
 
     # serial signal bit flags
@@ -1300,12 +1819,10 @@ class Port():
 
     def name_to_id(self, name:str) -> int:
         """Convert string name to integer port identifier."""
-        ports = []
-        MgslEnumeratePorts(ports)
-        for p in ports:
-            if p.port_name() == name.upper():
-                return p.PortID
-        return None
+        entry = port_registry.lookup(name)
+        if entry is None:
+            return None
+        return entry.port_id
 
     def events_str(self, events):
         s = ''
@@ -1331,9 +1848,13 @@ class Port():
             s += 'RECEIVE_IDLE'
         return s
 
-    class Defaults():
+    class Defaults(_SlotsValue):
         """Persistent default options."""
 
+        __slots__ = ('max_data_size', 'interface', 'rts_output_enable',
+                     'termination')
+        _values = attrgetter(*__slots__)
+
         def __init__(self):
             self.max_data_size = 4096
             self.interface = Port.OFF
@@ -1364,8 +1885,28 @@ class Port():
         def __str__(self):
             return self.__repr__()
 
-    class Settings():
-        """Port settings."""
+    class Settings(_SlotsValue):
+        """
+        Port settings.
+        Settings compare and hash by value and copy() is cheap.
+        """
+
+        __slots__ = (
+            'protocol', 'encoding', 'msb_first', 'internal_loopback',
+            'crc', 'discard_data_with_error', 'discard_received_crc',
+            'hdlc_address_filter',
+            'transmit_preamble_pattern', 'transmit_preamble_bits',
+            'recovered_clock_divisor', 'internal_clock_rate',
+            'transmit_clock', 'transmit_clock_invert',
+            'receive_clock', 'receive_clock_invert',
+            'auto_cts', 'auto_dcd', 'auto_rts',
+            'async_data_rate', 'async_data_bits', 'async_stop_bits',
+            'async_parity',
+            'tdm_sync_delay', 'tdm_sync_frame', 'tdm_sync_short',
+            'tdm_sync_invert', 'tdm_frame_count', 'tdm_slot_count',
+            'tdm_slot_bits',
+            'sync_pattern')
+        _values = attrgetter(*__slots__)
 
         def protocol_str(self):
             if self.protocol == Port.ASYNC:
@@ -1554,6 +2095,631 @@ class Port():
                 value = 0
             self._port.set_gpio_direction(mask, value)
 
+    class GPIOTransaction():
+        """
+        GPIO output and direction changes applied with one driver call.
+        Create with Port.gpio_transaction() and call commit(), or use
+        as a context manager to commit on exit.
+        """
+
+        def __init__(self, port):
+            self._port = port
+            self.clear()
+
+        def clear(self):
+            """Discard accumulated changes."""
+            self.state = 0
+            self.smask = 0
+            self.dir = 0
+            self.dmask = 0
+
+        def set(self, mask:int, states:int):
+            """
+            Set GPIO outputs to specified state.
+            mask = bit mask of outputs to alter
+            states = bit mask of output states
+            Later changes to a bit override earlier changes.
+            """
+            self.state = (self.state & ~mask) | (states & mask)
+            self.smask |= mask
+            return self
+
+        def set_bit(self, bit:int, state:bool):
+            """Set one GPIO output to specified state."""
+            mask = 1 << bit
+            return self.set(mask, mask if state else 0)
+
+        def set_direction(self, mask:int, dir:int):
+            """
+            Set GPIO signal directions.
+            mask = bit mask of GPIO directions to alter
+            dir = bit mask of signal direction (0=input,1=output)
+            """
+            self.dir = (self.dir & ~mask) | (dir & mask)
+            self.dmask |= mask
+            return self
+
+        def commit(self) -> bool:
+            """
+            Apply accumulated changes and clear them.
+            Returns True if success or nothing to change.
+            """
+            if not (self.smask or self.dmask):
+                return True
+            gpio = GPIO_DESC()
+            gpio.state = self.state
+            gpio.smask = self.smask
+            gpio.dir = self.dir
+            gpio.dmask = self.dmask
+            self.clear()
+            return not MgslSetGpio(self._port._handle, gpio)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            if exc_type is None:
+                self.commit()
+            return False
+
+    class GPIOWaveform():
+        """
+        Precomputed sequence of GPIO output steps for Port.play_gpio().
+        steps = iterable of (mask, states), one driver call per step
+        Steps that do not change outputs set by earlier steps
+        are removed.
+        """
+
+        def __init__(self, steps):
+            self._steps = []
+            known = 0  # bits set by earlier steps
+            current = 0  # states of known bits
+            for mask, states in steps:
+                states &= mask
+                if not (mask & ~known) and (current & mask) == states:
+                    continue
+                gpio = GPIO_DESC()
+                gpio.state = states
+                gpio.smask = mask
+                self._steps.append(gpio)
+                known |= mask
+                current = (current & ~mask) | states
+
+        def __len__(self):
+            """Return number of driver calls to play waveform."""
+            return len(self._steps)
+
+    class Signals(int):
+        """
+        Snapshot of all serial signals from one driver call.
+        Bit mask of Port.DTR, Port.RTS, ... with boolean properties.
+        """
+
+        __slots__ = ()
+
+        @property
+        def dcd(self) -> bool:
+            return bool(self & Port.DCD)
+
+        @property
+        def txd(self) -> bool:
+            return bool(self & Port.TXD)
+
+        @property
+        def ri(self) -> bool:
+            return bool(self & Port.RI)
+
+        @property
+        def rxd(self) -> bool:
+            return bool(self & Port.RXD)
+
+        @property
+        def cts(self) -> bool:
+            return bool(self & Port.CTS)
+
+        @property
+        def rts(self) -> bool:
+            return bool(self & Port.RTS)
+
+        @property
+        def dsr(self) -> bool:
+            return bool(self & Port.DSR)
+
+        @property
+        def dtr(self) -> bool:
+            return bool(self & Port.DTR)
+
+        def __repr__(self):
+            return 'Signals ' + serial_signals_str(self)
+
+        def __str__(self):
+            return self.__repr__()
+
+    class SignalWatcher():
+        """
+        Thread waiting for input signal changes with MgslWaitEvent.
+        Create with Port.watch_signals().
+        """
+
+        # (signal, active event, inactive event)
+        _EVENTS = (
+            (SerialSignal_DSR, MgslEvent_DsrActive, MgslEvent_DsrInactive),
+            (SerialSignal_CTS, MgslEvent_CtsActive, MgslEvent_CtsInactive),
+            (SerialSignal_DCD, MgslEvent_DcdActive, MgslEvent_DcdInactive),
+            (SerialSignal_RI, MgslEvent_RiActive, MgslEvent_RiInactive)
+        )
+
+        def __init__(self, port, callback, signals:int):
+            self._port = port
+            self._callback = callback
+            self._events = [e for e in self._EVENTS if e[0] & signals]
+            self._mask = 0  # watched signals
+            for signal, active, inactive in self._events:
+                self._mask |= signal
+            self._ol = create_overlapped()
+            if self._ol is None:
+                raise OSError
+            self._running = True
+            self.signals = port.signals_snapshot()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='signal_watcher ' + port.name)
+            self._thread.start()
+
+        @property
+        def running(self) -> bool:
+            return self._running
+
+        def _run(self):
+            try:
+                self._watch()
+            finally:
+                # thread owns the wait event, close it however it ends
+                self._running = False
+                CloseHandle(self._ol.hEvent)
+
+        def _watch(self):
+            port = self._port
+            events = INT()
+            while self._running:
+                # wait for each watched signal to leave its current state
+                mask = 0
+                for signal, active, inactive in self._events:
+                    mask |= inactive if self.signals & signal else active
+                events.value = 0
+                rc = MgslWaitEventTimed(port._handle, mask, events,
+                                        INFINITE, self._ol)
+                if not self._running or rc:
+                    # stopped, or wait failed (port closed)
+                    break
+                if not events.value:
+                    # wait cancelled by another thread
+                    continue
+                old = self.signals
+                new = port.signals_snapshot()
+                self.signals = new
+                # ignore changes of signals that are not watched
+                if (new ^ old) & self._mask:
+                    self._callback(old, new)
+
+        def stop(self):
+            """Stop watching signals."""
+            self._running = False
+            while self._thread.is_alive():
+                MgslCancelWaitEvent(self._port._handle)
+                self._thread.join(0.1)
+
+    class RxStats():
+        """
+        Receive statistics of frames read with status.
+        Updated by read_with_status() and the receive pump.
+
+        Frames longer than the driver maximum frame size are returned
+        truncated with status RxStatus_BufferOverrun and counted as
+        TOO_LARGE. With rx_discard_too_large set the driver drops them
+        instead, and as the driver keeps no count of dropped frames
+        (there is no MGSL_OPT counter) they cannot be counted here.
+        """
+
+        # status value: name of status class
+        STATUS_NAMES = ('OK', 'CRC_ERROR', 'FIFO_OVERRUN', 'SHORT_FRAME',
+                        'ABORT', 'TOO_LARGE', 'CANCEL',
+                        'BUFFER_TOO_SMALL', 'OTHER')
+        TOO_LARGE = RxStatus_BufferOverrun  # count index for too large frames
+        OTHER = 8  # count index for unknown status values
+
+        class Snapshot():
+            """
+            Receive statistics at a point in time or between two points.
+            Attributes are plain values not updated after creation.
+            """
+            __slots__ = ('time', 'frames', 'bytes', 'counts')
+
+            def __init__(self, time:float, frames:int, bytes:int, counts:tuple):
+                self.time = time      # time.monotonic() or interval
+                self.frames = frames  # frames read
+                self.bytes = bytes    # bytes read
+                self.counts = counts  # frame count indexed by status
+
+            def count(self, status:int) -> int:
+                """Return number of frames with status."""
+                return self.counts[min(status, Port.RxStats.OTHER)]
+
+            @property
+            def too_large(self) -> int:
+                """Return number of frames longer than maximum frame size."""
+                return self.counts[Port.RxStats.TOO_LARGE]
+
+            @property
+            def errors(self) -> int:
+                """Return number of frames with status other than OK."""
+                return self.frames - self.counts[RxStatus_OK]
+
+            @property
+            def error_rate(self) -> float:
+                """Return fraction of frames with errors."""
+                return self.errors / self.frames if self.frames else 0.0
+
+            def __sub__(self, other):
+                return Port.RxStats.Snapshot(
+                    self.time - other.time, self.frames - other.frames,
+                    self.bytes - other.bytes,
+                    tuple(a - b for a, b in zip(self.counts, other.counts)))
+
+            def as_dict(self) -> dict:
+                """Return dictionary of status name: frame count."""
+                return dict(zip(Port.RxStats.STATUS_NAMES, self.counts))
+
+            def __repr__(self):
+                fields = ['time=%.3f' % self.time, 'frames=%d' % self.frames,
+                          'bytes=%d' % self.bytes]
+                fields += ['%s=%d' % item for item in self.as_dict().items()
+                           if item[1]]
+                return 'Snapshot(' + ', '.join(fields) + ')'
+
+
+        def __init__(self):
+            self.reset()
+
+        def reset(self):
+            """Clear counters."""
+            self.frames = 0
+            self.bytes = 0
+            self.counts = [0] * len(self.STATUS_NAMES)
+
+        def record(self, status:int, count:int):
+            """Count frame of count bytes received with status."""
+            self.frames += 1
+            self.bytes += count
+            try:
+                self.counts[status] += 1
+            except IndexError:
+                self.counts[self.OTHER] += 1
+
+        def snapshot(self) -> Snapshot:
+            """Return Port.RxStats.Snapshot of current counters."""
+            return self.Snapshot(time.monotonic(), self.frames, self.bytes,
+                                 tuple(self.counts))
+
+        def delta(self, previous:Snapshot) -> Snapshot:
+            """
+            Return Port.RxStats.Snapshot of counter changes since previous
+            snapshot, time is the interval in seconds.
+            """
+            return self.snapshot() - previous
+
+        def __repr__(self):
+            fields = ['frames=%d' % self.frames, 'bytes=%d' % self.bytes]
+            fields += ['%s=%d' % (name, count) for name, count in
+                       zip(self.STATUS_NAMES, self.counts) if count]
+            return 'RxStats(' + ', '.join(fields) + ')'
+
+
+    class RxPump():
+        """
+        Background receive thread draining a port into a preallocated
+        ring of frame slots. Create with Port.start_rx_pump().
+        """
+
+        # policy when capacity unread frames are waiting
+        DROP_OLDEST = 0  # discard oldest unread frame
+        DROP_NEWEST = 1  # discard newly received frame
+        BLOCK = 2  # stop reading until a slot is free
+
+        def __init__(self, port, capacity:int, frame_size:int, policy:int):
+            assert capacity > 0 and frame_size > 0, \
+                str.format("capacity and frame_size must be > 0")
+            assert policy in (self.DROP_OLDEST, self.DROP_NEWEST, self.BLOCK), \
+                str.format("unknown policy")
+            self._port = port
+            self.capacity = capacity
+            self.frame_size = frame_size
+            self.policy = policy
+
+            # slots for unread frames plus one held by get()
+            # and one receiving the next frame from the driver
+            slots = capacity + 2
+            self._storage = bytearray(frame_size * slots)
+            self._view = memoryview(self._storage)
+            self._slot_args = [
+                _char_array(frame_size).from_buffer(self._storage, i * frame_size)
+                for i in range(0, slots)]
+            self._lengths = [0] * slots
+            self._status = [RxStatus_OK] * slots
+            self._free = list(range(0, slots))
+            self._ready = deque()
+            self._held = None
+            self._cond = threading.Condition()
+            self._running = True
+
+            # overflow accounting
+            self.frames = 0  # frames received from driver
+            self.dropped = 0  # frames discarded because ring was full
+            self.overflows = 0  # times ring was found full
+            self.high_water = 0  # largest number of unread frames
+
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='rx_pump ' + port.name)
+            self._thread.start()
+
+        def __len__(self):
+            """Return number of unread frames."""
+            return len(self._ready)
+
+        @property
+        def running(self) -> bool:
+            return self._running
+
+        def _next_slot(self):
+            """Return slot for next driver read, None if stopped."""
+            with self._cond:
+                if self.policy == self.BLOCK and \
+                   len(self._ready) >= self.capacity:
+                    self.overflows += 1
+                    self._cond.wait_for(
+                        lambda: len(self._ready) < self.capacity or
+                        not self._running)
+                if not self._running:
+                    return None
+                return self._free.pop()
+
+        def _run(self):
+            handle = self._port._handle
+            read = MgslReadWithStatus
+            record = self._port.rx_stats.record
+            frame_size = self.frame_size
+            status = INT()
+            while self._running:
+                slot = self._next_slot()
+                if slot is None:
+                    break
+                status.value = RxStatus_OK
+                count = read(handle, self._slot_args[slot], frame_size, status)
+                reverse = self._port._bit_reverse
+                if count and reverse is not None:
+                    reverse.reverse_bits_into(self._slot_args[slot], count)
+                with self._cond:
+                    if not count:
+                        self._free.append(slot)
+                        if self._running and not self._port.blocked_io:
+                            # polled I/O, avoid spinning
+                            self._cond.wait(0.001)
+                        continue
+                    self.frames += 1
+                    record(status.value, count)
+                    if len(self._ready) >= self.capacity:
+                        self.overflows += 1
+                        self.dropped += 1
+                        if self.policy == self.DROP_NEWEST:
+                            self._free.append(slot)
+                            continue
+                        self._free.append(self._ready.popleft())
+                    self._lengths[slot] = count
+                    self._status[slot] = status.value
+                    self._ready.append(slot)
+                    if len(self._ready) > self.high_water:
+                        self.high_water = len(self._ready)
+                    self._cond.notify_all()
+
+        def get(self, timeout:float=None):
+            """
+            Return next received frame as (memoryview, status).
+            timeout = optional wait time in seconds, 0 = do not wait
+            returns None if no frame is available or pump is stopped
+            The memoryview references ring storage and is valid until
+            the next get() or release() call.
+            """
+            cond = self._cond
+            with cond:
+                self._release()
+                if not self._ready:
+                    if timeout == 0 or not self._running:
+                        return None
+                    cond.wait_for(lambda: self._ready or not self._running,
+                                  timeout)
+                    if not self._ready:
+                        return None
+                slot = self._ready.popleft()
+                self._held = slot
+                start = slot * self.frame_size
+                return (self._view[start:start + self._lengths[slot]],
+                        self._status[slot])
+
+        def _release(self):
+            if self._held is not None:
+                self._free.append(self._held)
+                self._held = None
+                self._cond.notify_all()
+
+        def release(self):
+            """Return slot of frame from last get() to the ring."""
+            with self._cond:
+                self._release()
+
+        def stop(self):
+            """Stop receive thread. Unread frames remain available."""
+            with self._cond:
+                if not self._running:
+                    return
+                self._running = False
+                self._cond.notify_all()
+            while self._thread.is_alive():
+                MgslCancelReceive(self._port._handle)
+                self._thread.join(0.1)
+
+        def __repr__(self):
+            return 'RxPump object at ' + hex(id(self)) + '\n' + \
+                'capacity = ' + str(self.capacity) + '\n' + \
+                'frame_size = ' + str(self.frame_size) + '\n' + \
+                'unread = ' + str(len(self)) + '\n' + \
+                'frames = ' + str(self.frames) + '\n' + \
+                'dropped = ' + str(self.dropped) + '\n' + \
+                'overflows = ' + str(self.overflows) + '\n' + \
+                'high_water = ' + str(self.high_water) + '\n'
+
+        def __str__(self):
+            return self.__repr__()
+
+    class StreamReader():
+        """
+        Adaptive size reader for byte stream protocols (ASYNC, RAW,
+        BISYNC, MONOSYNC). Create with Port.stream_reader().
+        Each read() returns received data coalesced into one chunk,
+        sized from the arrival rate so the first byte of a chunk is
+        returned within the latency budget.
+        """
+
+        # weight of newest arrival rate sample in rate estimate
+        RATE_WEIGHT = 0.25
+
+        def __init__(self, port, latency:float, max_size:int):
+            assert latency > 0, str.format("latency must be > 0")
+            assert 0 < max_size <= port._defaults.max_data_size, \
+                str.format("max_size must be 1 to max_data_size")
+            self._port = port
+            self._clock = time.monotonic
+            self._sleep = time.sleep
+            self.latency = latency
+            self.max_size = max_size
+            self.line_rate = port._stream_byte_rate()
+            # arrival rate estimate in bytes per second
+            self.rate = float(self.line_rate)
+            self._last = None
+
+            self.chunks = 0  # chunks returned
+            self.reads = 0  # driver read calls
+            self.bytes = 0  # bytes returned
+
+        @property
+        def size(self) -> int:
+            """Return target chunk size for current rate estimate."""
+            size = int(self.rate * self.latency)
+            if size < 1:
+                return 1
+            if size > self.max_size:
+                return self.max_size
+            return size
+
+        def read(self) -> bytearray:
+            """
+            Return chunk of received data.
+            returns None if no data is available (polled I/O) or
+            the read was cancelled
+            """
+            port = self._port
+            clock = self._clock
+            size = self.size
+            data = port.read(size)
+            self.reads += 1
+            if data is None:
+                return None
+            now = clock()
+            deadline = now + self.latency
+            rate = self.rate
+            while len(data) < size:
+                # wait for rest of chunk within latency budget,
+                # then take only what has arrived
+                wait = (size - len(data)) / rate if rate else 0.0
+                if now + wait > deadline:
+                    wait = deadline - now
+                if wait <= 0:
+                    break
+                self._sleep(wait)
+                available = port.receive_count()
+                if not available:
+                    break
+                more = port.read(min(available, size - len(data)))
+                self.reads += 1
+                if more is None:
+                    break
+                data += more
+                now = clock()
+
+            # update arrival rate from time since previous chunk,
+            # limited to line rate when known
+            if self._last is not None and now > self._last:
+                sample = len(data) / (now - self._last)
+                if self.line_rate and sample > self.line_rate:
+                    sample = self.line_rate
+                self.rate += (sample - self.rate) * self.RATE_WEIGHT
+            self._last = now
+            self.chunks += 1
+            self.bytes += len(data)
+            return data
+
+        def __iter__(self):
+            """Iterate over received chunks until read() returns None."""
+            while True:
+                data = self.read()
+                if data is None:
+                    return
+                yield data
+
+        def __repr__(self):
+            return 'StreamReader object at ' + hex(id(self)) + '\n' + \
+                'latency = ' + str(self.latency) + '\n' + \
+                'line_rate = ' + str(self.line_rate) + '\n' + \
+                'rate = ' + str(int(self.rate)) + '\n' + \
+                'size = ' + str(self.size) + '\n' + \
+                'chunks = ' + str(self.chunks) + '\n' + \
+                'reads = ' + str(self.reads) + '\n' + \
+                'bytes = ' + str(self.bytes) + '\n'
+
+        def __str__(self):
+            return self.__repr__()
+
+    class TxStats():
+        """Throughput of a Port.write_stream() call."""
+
+        def __init__(self, line_rate:int):
+            self.line_rate = line_rate  # bytes per second, 0 if unknown
+            self.bytes = 0  # bytes sent
+            self.chunks = 0  # chunks written
+            self.writes = 0  # driver write calls
+            self.seconds = 0.0  # time from first write until sent
+
+        @property
+        def rate(self) -> float:
+            """Return achieved throughput in bytes per second."""
+            return self.bytes / self.seconds if self.seconds else 0.0
+
+        @property
+        def utilization(self) -> float:
+            """Return achieved throughput as fraction of line rate."""
+            return self.rate / self.line_rate if self.line_rate else 0.0
+
+        def __repr__(self):
+            return 'TxStats object at ' + hex(id(self)) + '\n' + \
+                'bytes = ' + str(self.bytes) + '\n' + \
+                'chunks = ' + str(self.chunks) + '\n' + \
+                'writes = ' + str(self.writes) + '\n' + \
+                'seconds = ' + '%.3f' % self.seconds + '\n' + \
+                'rate = ' + str(int(self.rate)) + '\n' + \
+                'line_rate = ' + str(self.line_rate) + '\n' + \
+                'utilization = ' + '%.3f' % self.utilization + '\n'
+
+        def __str__(self):
+            return self.__repr__()
+
     def is_open(self):
         """Return open state for port."""
         return self._open
@@ -1582,17 +2748,135 @@ class Port():
     def close(self):
         """Close port."""
         if self.is_open():
+            self.stop_rx_pump()
+            for watcher in self._watchers:
+                watcher.stop()
+            self._watchers = []
             self._reset_pio()
             MgslClose(self._handle)
             self._open = False
+            self._resources = None
+            self._applied = None
+            self._options = {}
+            if self._wait_ol is not None:
+                CloseHandle(self._wait_ol.hEvent)
+                self._wait_ol = None
+            if self._select_ol is not None:
+                CloseHandle(self._select_ol.hEvent)
+                self._select_ol = None
 
     def write(self, buf:bytearray) -> bool:
         """Write send data to port."""
+        if self._bit_reverse is not None:
+            buf = self._bit_reverse.reverse_bits(buf)
         bytes_sent = MgslWrite(self._handle, buf, len(buf))
         if bytes_sent == len(buf):
             return True
         return False
 
+    def write_many(self, frames, offsets=None) -> list:
+        """
+        Write multiple send buffers (HDLC frames) back to back.
+        frames = iterable of buffers (bytes, bytearray, memoryview)
+                 or one contiguous buffer if offsets is specified
+        offsets = optional sequence of frame start offsets into frames,
+                  each frame ends at the next offset or the buffer end,
+                  ValueError if offsets decrease or exceed the buffer
+        returns list with True for each frame sent
+        Writing stops at the first short write, which is reported
+        as False in the final list entry.
+        """
+        held = None
+        if offsets is not None:
+            view = memoryview(frames).cast('B')
+            ends = list(offsets[1:])
+            ends.append(len(view))
+            for start, end in zip(offsets, ends):
+                if not 0 <= start <= end <= len(view):
+                    raise ValueError('offsets must be non-decreasing and '
+                                     'within buffer')
+            if self._bit_reverse is None:
+                # hold buffer once and pass each frame by address below
+                # instead of holding each frame slice in MgslWrite
+                held = _hold_buffer(view)
+            else:
+                frames = [view[start:end] for start, end in zip(offsets, ends)]
+        if self._bit_reverse is not None:
+            frames = map(self._bit_reverse.reverse_bits, frames)
+        handle = self._handle
+        write = MgslWrite
+        results = []
+        sent = results.append
+        try:
+            if held is not None:
+                base = held.buf
+                frames = [_char_array(end - start).from_address(base + start)
+                          for start, end in zip(offsets, ends)]
+            for frame in frames:
+                size = len(frame)
+                if write(handle, frame, size) != size:
+                    sent(False)
+                    break
+                sent(True)
+        finally:
+            if held is not None:
+                _release_buffer(held)
+        return results
+
+    def write_stream(self, source, chunk_size:int=MAX_ASYNC_TRANSMIT // 2,
+                     wait:bool=True) -> TxStats:
+        """
+        Write byte stream (ASYNC, RAW, BISYNC, MONOSYNC) of any size.
+        source = bytes like object or iterable of bytes like objects
+        chunk_size = bytes per driver write, default is half the ASYNC
+                     transmit buffer so the next chunk is queued while
+                     the previous chunk is sent
+        wait = wait until all data is sent before returning
+        returns Port.TxStats, bytes is less than the source size if
+        the write was cancelled or the port closed
+        """
+        assert self._settings.protocol != self.HDLC and \
+            self._settings.protocol != self.TDM, \
+            str.format("write_stream requires a byte stream protocol")
+        assert 0 < chunk_size <= MAX_ASYNC_TRANSMIT, \
+            str.format("chunk_size must be 1 to MAX_ASYNC_TRANSMIT")
+        try:
+            source = (memoryview(source),)
+        except TypeError:
+            pass
+        stats = self.TxStats(self._stream_byte_rate())
+        handle = self._handle
+        write = MgslWrite
+        reverse = self._bit_reverse
+        start = time.monotonic()
+        for buf in source:
+            view = memoryview(buf)
+            if view.format != 'B' or view.ndim != 1:
+                view = view.cast('B')
+            for offset in range(0, len(view), chunk_size):
+                chunk = view[offset:offset + chunk_size]
+                if reverse is not None:
+                    chunk = memoryview(reverse.reverse_bits(chunk))
+                stats.chunks += 1
+                while chunk:
+                    # driver may accept part of chunk if buffer is full
+                    count = write(handle, chunk, len(chunk))
+                    stats.writes += 1
+                    if not count:
+                        if self._blocked_io or not self.is_open():
+                            # cancelled or closed
+                            stats.seconds = time.monotonic() - start
+                            return stats
+                        # polled I/O, wait for room in transmit buffer
+                        time.sleep(0.001)
+                        continue
+                    stats.bytes += count
+                    chunk = chunk[count:]
+        if wait:
+            MgslWaitAllSent(handle)
+        stats.seconds = time.monotonic() - start
+        return stats
+
     def flush(self) -> bool:
         """Wait for pending send data to complete."""
         error = MgslWaitAllSent(self._handle)
@@ -1609,22 +2893,102 @@ class Port():
         elif self._default_read_size == 1:
             assert size > 0 and size <= self._defaults.max_data_size, \
                 str.format("size must be 1 to max_data_size")
-        buf = bytearray(size)
-        count = MgslRead(self._handle, buf, len(buf))
+        if len(self._read_buffer) < size:
+            # grow reusable receive buffer to largest requested size
+            self._read_buffer = bytearray(size)
+            self._read_buffer_arg = \
+                _char_array(size).from_buffer(self._read_buffer)
+        count = MgslRead(self._handle, self._read_buffer_arg, size)
         if count:
-            return buf[:count]
+            if self._bit_reverse is not None:
+                return self._read_buffer[:count].translate(
+                    self._bit_reverse.REVERSE)
+            return self._read_buffer[:count]
         return None
 
+    def read_into(self, buffer) -> int:
+        """
+        Read received data from port into caller supplied buffer.
+        buffer = writable bytearray or memoryview
+        returns number of bytes stored in buffer
+        For HDLC/TDM the buffer must hold the largest expected frame.
+        """
+        count = MgslRead(self._handle, buffer, len(buffer))
+        if count and self._bit_reverse is not None:
+            self._bit_reverse.reverse_bits_into(buffer, count)
+        return count
+
     def read_with_status(self, size:int) -> (bytearray, int):
-        """Read received data from port with status."""
-        buf = bytearray(size)
-        status = INT()
-        status.value = -1
-        count = MgslReadWithStatus(self._handle, buf, len(buf), status)
-        if status.value != -1:
-            return (buf[:count], status.value)
+        """
+        Read received data from port with status.
+        Frames are counted in rx_stats.
+        """
+        if len(self._read_buffer) < size:
+            # grow reusable receive buffer to largest requested size
+            self._read_buffer = bytearray(size)
+            self._read_buffer_arg = \
+                _char_array(size).from_buffer(self._read_buffer)
+        status = self._read_status
+        status.value = _RX_STATUS_NONE
+        count = MgslReadWithStatus(self._handle, self._read_buffer_arg,
+                                   size, status)
+        if status.value != _RX_STATUS_NONE:
+            self.rx_stats.record(status.value, count)
+            if self._bit_reverse is not None:
+                return (self._read_buffer[:count].translate(
+                    self._bit_reverse.REVERSE), status.value)
+            return (self._read_buffer[:count], status.value)
         return None
 
+    def start_rx_pump(self, capacity:int=64, frame_size:int=None,
+                      policy:int=RxPump.DROP_OLDEST):
+        """
+        Start background thread draining receive data into a ring buffer.
+        capacity = number of frame slots in ring
+        frame_size = slot size, default is max_data_size
+        policy = Port.RxPump.DROP_OLDEST, DROP_NEWEST or BLOCK
+        returns Port.RxPump object, use get() to take received frames
+        Do not call read() while the pump is running.
+        """
+        self.stop_rx_pump()
+        if frame_size is None:
+            frame_size = self._defaults.max_data_size
+        self._rx_pump = self.RxPump(self, capacity, frame_size, policy)
+        return self._rx_pump
+
+    def stream_reader(self, latency:float=0.01, max_size:int=None):
+        """
+        Return Port.StreamReader reading coalesced chunks of a byte
+        stream protocol (ASYNC, RAW, BISYNC, MONOSYNC).
+        latency = budget in seconds from arrival of the first byte of
+                  a chunk until it is returned
+        max_size = largest chunk size, default is max_data_size
+        Initial chunk size is set from async_data_rate (ASYNC) or
+        internal_clock_rate and then follows the observed arrival rate.
+        """
+        assert self._settings.protocol != self.HDLC and \
+            self._settings.protocol != self.TDM, \
+            str.format("stream reader requires a byte stream protocol")
+        if max_size is None:
+            max_size = self._defaults.max_data_size
+        return self.StreamReader(self, latency, max_size)
+
+    def _stream_byte_rate(self) -> int:
+        """Return line rate in bytes per second, 0 if unknown."""
+        settings = self._settings
+        if settings.protocol == self.ASYNC:
+            bits = 1 + settings.async_data_bits + settings.async_stop_bits
+            if settings.async_parity != self.OFF:
+                bits += 1
+            return settings.async_data_rate // bits
+        return settings.internal_clock_rate // 8
+
+    def stop_rx_pump(self):
+        """Stop background receive thread started by start_rx_pump()."""
+        if self._rx_pump is not None:
+            self._rx_pump.stop()
+            self._rx_pump = None
+
     def disable_receiver(self):
         """Disable receiver."""
         MgslEnableReceiver(self._handle, 0)
@@ -1656,11 +3020,89 @@ class Port():
         if not mask:
             return 0
         events = INT()
-        error = MgslWaitEventTimed(self._handle, mask, events, timeout)
+        error = MgslWaitEventTimed(self._handle, mask, events, timeout,
+                                   self._overlapped())
         if error:
             return 0
         return events.value
 
+    def _overlapped(self) -> OVERLAPPED:
+        # event wait overlapped structure reused until port is closed
+        if self._wait_ol is None:
+            self._wait_ol = create_overlapped()
+        return self._wait_ol
+
+    def _select_overlapped(self) -> OVERLAPPED:
+        # select() overlapped structure reused until port is closed,
+        # separate from wait() so the two can be used from different threads
+        if self._select_ol is None:
+            self._select_ol = create_overlapped()
+        return self._select_ol
+
+    @staticmethod
+    def select(ports:list, masks, timeout:int=INFINITE) -> list:
+        """
+        Wait for events on multiple ports from one thread.
+        ports = list of open Port objects (up to MAXIMUM_WAIT_OBJECTS)
+        masks = bitmask of events to wait for on each port (list)
+                or one bitmask used for all ports
+        timeout = optional wait timeout in milliseconds
+        returns list of (port, events) for ports with events,
+                empty list if timeout
+        If timeout is not specified, this call waits forever.
+        Each port has an overlapped structure for select() separate from
+        the one used by wait(), so select() calls including the same port
+        must not overlap. Waits still pending at return are cancelled with
+        MgslCancelWaitEvent(), which also ends a wait() in progress on the
+        same port. Raises OSError if a wait can't be started on a port.
+        """
+        if isinstance(masks, int):
+            masks = [masks] * len(ports)
+        assert len(ports) <= MAXIMUM_WAIT_OBJECTS, \
+            str.format("too many ports for one select")
+
+        # start a wait on each port, some may complete immediately
+        waits = []
+        ready = False
+        error = None
+        for port, mask in zip(ports, masks):
+            if not mask:
+                continue
+            ol = port._select_overlapped()
+            if ol is None:
+                error = (port, ERROR_GEN_FAILURE)
+                break
+            events = INT()
+            rc = MgslWaitEvent(port._handle, mask, events, ol)
+            if rc == ERROR_IO_PENDING:
+                waits.append((port, events, ol))
+                continue
+            if rc:
+                error = (port, rc)
+                break
+            waits.append((port, events, None))
+            ready = True
+
+        pending = [ol.hEvent for port, events, ol in waits if ol is not None]
+        if pending and not ready and error is None:
+            WaitForMultipleObjects(pending, False, timeout)
+
+        # collect completed waits and cancel the others
+        fired = []
+        for port, events, ol in waits:
+            if ol is not None and \
+               WaitForSingleObject(ol.hEvent, 0) == WAIT_TIMEOUT:
+                MgslCancelWaitEvent(port._handle)
+                WaitForSingleObject(ol.hEvent, INFINITE)
+            if events.value:
+                fired.append((port, events.value))
+
+        if error is not None:
+            port, rc = error
+            raise OSError(rc, str.format("MgslWaitEvent failed on {}",
+                                         port.name))
+        return fired
+
     def cancel_read(self):
         """Cancel blocked read() call."""
         MgslCancelReceive(self._handle)
@@ -1686,6 +3128,22 @@ class Port():
         gpio.dir = 0  # unused
         MgslSetGpio(self._handle, gpio)
 
+    def gpio_transaction(self) -> GPIOTransaction:
+        """Return Port.GPIOTransaction for batching GPIO changes."""
+        return Port.GPIOTransaction(self)
+
+    def play_gpio(self, waveform:GPIOWaveform) -> bool:
+        """
+        Apply steps of Port.GPIOWaveform to GPIO outputs in order.
+        Returns True if success, False if a step failed.
+        """
+        handle = self._handle
+        set_gpio = MgslSetGpio
+        for gpio in waveform._steps:
+            if set_gpio(handle, gpio):
+                return False
+        return True
+
     def get_gpio(self) -> int:
         """Return bitmap of GPIO states."""
         gpio = GPIO_DESC()
@@ -1715,15 +3173,50 @@ class Port():
         return gpio.dir
 
     def set_option(self, option:int, value:int):
+        self._options.pop(option, None)
         MgslSetOption(self._handle, option, value)
 
     def get_option(self, option:int) -> int:
-        value = INT()
+        """
+        Return option value.
+        Values of options other than MGSL_VOLATILE_OPTIONS are cached
+        until the option is set, settings are applied or port is closed.
+        """
+        value = self._options.get(option)
+        if value is not None:
+            return value
+        return self._read_option(option, INT())
+
+    def _read_option(self, option:int, value:INT) -> int:
+        """Read option from driver into value and update option cache."""
         error = MgslGetOption(self._handle, option, value)
         if error:
             return 0
+        if option not in MGSL_VOLATILE_OPTIONS and self._open:
+            self._options[option] = value.value
         return value.value
 
+    def get_options(self, options) -> dict:
+        """
+        Return dictionary of option: value for iterable of options.
+        Cached values are returned without calling the driver.
+        """
+        values = {}
+        value = None
+        for option in options:
+            cached = self._options.get(option)
+            if cached is None:
+                if value is None:
+                    value = INT()
+                cached = self._read_option(option, value)
+            values[option] = cached
+        return values
+
+    def set_options(self, options:dict):
+        """Set options from dictionary of option: value."""
+        for option, value in options.items():
+            self.set_option(option, value)
+
     def _set_default_read_size(self):
         if self._settings.protocol == self.HDLC or \
             self._settings.protocol == self.TDM:
@@ -1732,289 +3225,68 @@ class Port():
         else:
             self._default_read_size = 1
 
-    def apply_settings(self, settings):
-        """Apply settings in Port.Settings object to port."""
-        self._reset_pio()
-        self._settings = deepcopy(settings)
+    def apply_settings(self, settings, force: bool = False):
+        """
+        Apply settings in Port.Settings object to port.
+        force = issue all calls even if settings are already applied
+        Only the driver calls needed to change from the last applied
+        settings are issued. A protocol change changes most parameters,
+        so it is applied in full like force=True (including the PIO mode
+        work around) without comparing individual settings.
+        """
+        if settings.protocol != self._settings.protocol:
+            force = True
+        if force:
+            self._reset_pio()
+        old_settings = self._settings
+        self._settings = settings.copy()
         self._set_default_read_size()
 
-        self._msb_first = settings.msb_first
-
-        # convert tdm settings to 32 bit tdm_options value
-
-        if settings.tdm_sync_delay == 1:
-            tdm_options = TDM_SYNC_DELAY_1BIT
-        elif settings.tdm_sync_delay == 2:
-            tdm_options = TDM_SYNC_DELAY_2BITS
-        else:
-            tdm_options = 0
-
-        if settings.tdm_sync_frame:
-            tdm_options |= TDM_SYNC_FRAME_ON
-
-        if settings.tdm_sync_short:
-            tdm_options |= TDM_TX_SYNC_WIDTH_BIT
-
-        if settings.tdm_sync_invert:
-            tdm_options |= TDM_SYNC_POLARITY_INVERT
-
-        # tdm_options[15:8] 8 bit frame count
-        # valid tdm_frame_count: 1 to 256
-        if settings.tdm_frame_count and (settings.tdm_frame_count < 257):
-            tdm_options |= (settings.tdm_frame_count - 1) << 8
-
-        # tdm_options[7:3] 0=384 slots, 1-31 = 2-32 slots
-        # valid tdm_slot_count: 384 and 2-32
-        if (settings.tdm_slot_count > 1) and (settings.tdm_slot_count < 33):
-            tdm_options |= (settings.tdm_slot_count - 1) << 3
-
-        if settings.tdm_slot_bits == 8:
-            tdm_options |= TDM_SLOT_SIZE_8BITS
-        elif settings.tdm_slot_bits == 12:
-            tdm_options |= TDM_SLOT_SIZE_12BITS
-        elif settings.tdm_slot_bits == 16:
-            tdm_options |= TDM_SLOT_SIZE_16BITS
-        elif settings.tdm_slot_bits == 20:
-            tdm_options |= TDM_SLOT_SIZE_20BITS
-        elif settings.tdm_slot_bits == 24:
-            tdm_options |= TDM_SLOT_SIZE_24BITS
-        elif settings.tdm_slot_bits == 28:
-            tdm_options |= TDM_SLOT_SIZE_28BITS
-        else:
-            tdm_options |= TDM_SLOT_SIZE_32BITS
-
-        self._tdm_options = tdm_options
-
-        # translate Settings object into base API calls
-
-        params = MGSL_PARAMS()
-        params.Mode = settings.protocol
-        params.Loopback = settings.internal_loopback
-
-        params.Flags = 0
-
-        if settings.transmit_clock == Port.RXC_INPUT:
-            params.Flags |= HDLC_FLAG_TXC_RXCPIN
-        elif settings.transmit_clock == Port.INTERNAL:
-            params.Flags |= HDLC_FLAG_TXC_BRG
-        elif settings.transmit_clock == Port.RECOVERED:
-            params.Flags |= HDLC_FLAG_TXC_DPLL
-        if settings.transmit_clock_invert:
-            params.Flags |= HDLC_FLAG_TXC_INV
-
-        if settings.receive_clock == Port.TXC_INPUT:
-            params.Flags |= HDLC_FLAG_RXC_TXCPIN
-        elif settings.receive_clock == Port.INTERNAL:
-            params.Flags |= HDLC_FLAG_RXC_BRG
-        elif settings.receive_clock == Port.RECOVERED:
-            params.Flags |= HDLC_FLAG_RXC_DPLL
-        if settings.receive_clock_invert:
-            params.Flags |= HDLC_FLAG_RXC_INV
-
-        if settings.auto_rts:
-            params.Flags |= HDLC_FLAG_AUTO_RTS
-        if settings.auto_cts:
-            params.Flags |= HDLC_FLAG_AUTO_CTS
-        if settings.auto_dcd:
-            params.Flags |= HDLC_FLAG_AUTO_DCD
-
-        params.Encoding = settings.encoding
-        params.ClockSpeed = settings.internal_clock_rate
-
-        params.CrcType = settings.crc
-        if not settings.discard_data_with_error:
-            params.CrcType |= HDLC_CRC_RETURN_CRCERR_FRAME
-        if not settings.discard_received_crc:
-            params.CrcType |= HDLC_CRC_RETURN_CRC
-
-        params.Addr = settings.hdlc_address_filter
-
-        if settings.transmit_preamble_bits == 8:
-            params.PreambleLength = HDLC_PREAMBLE_LENGTH_8BITS
-        elif settings.transmit_preamble_bits == 16:
-            params.PreambleLength = HDLC_PREAMBLE_LENGTH_16BITS
-        elif settings.transmit_preamble_bits == 32:
-            params.PreambleLength = HDLC_PREAMBLE_LENGTH_32BITS
-        elif settings.transmit_preamble_bits == 64:
-            params.PreambleLength = HDLC_PREAMBLE_LENGTH_64BITS
+        if force or self._applied is None or \
+           settings.msb_first != old_settings.msb_first:
+            self._msb_first = settings.msb_first
+
+        key = settings._key()
+        tdm_options = _settings_tdm_options(key)
+        if force or self._applied is None or \
+           tdm_options != self._applied[0]:
+            self._tdm_options = tdm_options
+
+        if settings.protocol == self.BISYNC or \
+           settings.protocol == self.MONOSYNC:
+            if force or settings.protocol != old_settings.protocol or \
+               settings.sync_pattern != self.transmit_idle_pattern:
+                self.transmit_idle_pattern = settings.sync_pattern
+
+        # base clock rate determines internal clock divisor,
+        # reapply parameters if it changed since last applied
+        if settings.internal_clock_rate:
+            base_clock_rate = self.base_clock_rate
         else:
-            params.PreambleLength = HDLC_PREAMBLE_LENGTH_8BITS
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_NONE
-
-        if settings.transmit_preamble_bits == 0:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_NONE
-        elif settings.transmit_preamble_pattern == 0:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_ZEROS
-        elif settings.transmit_preamble_pattern == 0xff:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_ONES
-        elif settings.transmit_preamble_pattern == 0x55:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_10
-        elif settings.transmit_preamble_pattern == 0xaa:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_01
-        elif settings.transmit_preamble_pattern == 0x7e:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_FLAGS
-        else:
-            params.PreamblePattern = HDLC_PREAMBLE_PATTERN_NONE
-
-        params.DataRate = settings.async_data_rate
-        params.DataBits = settings.async_data_bits
-        params.StopBits = settings.async_stop_bits
-        params.Parity = settings.async_parity
-
-        if settings.protocol == self.BISYNC:
-            self.transmit_idle_pattern = settings.sync_pattern
-        elif settings.protocol == self.MONOSYNC:
-            self.transmit_idle_pattern = settings.sync_pattern
-
-        if settings.internal_clock_rate and \
-            self.base_clock_rate % (settings.internal_clock_rate * 16):
-            # x16 reference clock is not divisor of base clock
-            # fall back to x8 reference clock
-            params.Flags |= HDLC_FLAG_DPLL_DIV8
-
-        MgslSetParams(self._handle, params)
-
+            base_clock_rate = 0
+        data = _settings_params_data(key, base_clock_rate)
+        applied = (tdm_options, data, base_clock_rate)
+        if force or self._applied is None or \
+           applied[1:] != self._applied[1:]:
+            MgslSetParams(self._handle, MGSL_PARAMS.from_buffer_copy(data))
+            self._options.clear()
+        self._applied = applied
 
     def get_settings(self):
         """Return Port.Settings object containing current settings."""
-
         params = MGSL_PARAMS()
         error = MgslGetParams(self._handle, params)
         if error:
             return None
 
-        settings = Port.Settings()
-        settings.protocol = params.Mode
-        settings.internal_loopback = bool(params.Loopback)
-
-        rxc_flags = params.Flags & 0x8300
-        if rxc_flags & HDLC_FLAG_RXC_BRG:
-            settings.receive_clock = Port.INTERNAL
-        elif rxc_flags & HDLC_FLAG_RXC_DPLL:
-            settings.receive_clock = Port.RECOVERED
-        elif rxc_flags & HDLC_FLAG_RXC_TXCPIN:
-            settings.receive_clock = Port.TXC_INPUT
-        else:
-            settings.receive_clock = Port.RXC_INPUT
-
-        if params.Flags & HDLC_FLAG_RXC_INV:
-            settings.receive_clock_invert = True
-        else:
-            settings.receive_clock_invert = False
-
-        txc_flags = params.Flags & 0x0c08
-        if txc_flags & HDLC_FLAG_TXC_BRG:
-            settings.transmit_clock = Port.INTERNAL
-        elif txc_flags & HDLC_FLAG_TXC_DPLL:
-            settings.transmit_clock = Port.RECOVERED
-        elif txc_flags & HDLC_FLAG_TXC_RXCPIN:
-            settings.transmit_clock = Port.RXC_INPUT
-        else:
-            settings.transmit_clock = Port.TXC_INPUT
-
-        if params.Flags & HDLC_FLAG_TXC_INV:
-            settings.transmit_clock_invert = True
-        else:
-            settings.transmit_clock_invert = False
-
-        if params.Flags & HDLC_FLAG_AUTO_RTS:
-            settings.auto_rts = True
-        else:
-            settings.auto_rts = False
-        if params.Flags & HDLC_FLAG_AUTO_CTS:
-            settings.auto_cts = True
-        else:
-            settings.auto_cts = False
-        if params.Flags & HDLC_FLAG_AUTO_DCD:
-            settings.auto_dcd = True
-        else:
-            settings.auto_dcd = False
-
-        settings.encoding = params.Encoding
-        settings.internal_clock_rate = params.ClockSpeed
-
-        settings.crc = params.CrcType & HDLC_CRC_MODE
-        if params.CrcType & HDLC_CRC_RETURN_CRCERR_FRAME:
-            settings.discard_data_with_error = False
-        else:
-            settings.discard_data_with_error = True
-            
-        if params.CrcType & HDLC_CRC_RETURN_CRC:
-            settings.discard_received_crc = False
-        else:
-            settings.discard_received_crc = True
-
-        settings.hdlc_address_filter = params.Addr
-
-        if params.PreambleLength == HDLC_PREAMBLE_LENGTH_8BITS:
-            settings.transmit_preamble_bits = 8
-        elif params.PreambleLength == HDLC_PREAMBLE_LENGTH_16BITS:
-            settings.transmit_preamble_bits = 16
-        elif params.PreambleLength == HDLC_PREAMBLE_LENGTH_32BITS:
-            settings.transmit_preamble_bits = 32
-        elif params.PreambleLength == HDLC_PREAMBLE_LENGTH_64BITS:
-            settings.transmit_preamble_bits = 64
-        else:
-            settings.transmit_preamble_bits = 0
-
-        if params.PreamblePattern == HDLC_PREAMBLE_PATTERN_ZEROS:
-            settings.transmit_preamble_pattern = 0
-        elif params.PreamblePattern == HDLC_PREAMBLE_PATTERN_ONES:
-            settings.transmit_preamble_pattern = 0xff
-        elif params.PreamblePattern == HDLC_PREAMBLE_PATTERN_10:
-            settings.transmit_preamble_pattern = 0x55
-        elif params.PreamblePattern == HDLC_PREAMBLE_PATTERN_01:
-            settings.transmit_preamble_pattern = 0xaa
-        elif params.PreamblePattern == HDLC_PREAMBLE_PATTERN_FLAGS:
-            settings.transmit_preamble_pattern = 0x7e
-        else:
-            settings.transmit_preamble_pattern = 0
-            settings.transmit_preamble_bits = 0
-
-        settings.async_data_rate = params.DataRate
-        settings.async_data_bits = params.DataBits
-        settings.async_stop_bits = params.StopBits
-        settings.async_parity = params.Parity
-
-        # convert tdm settings to 32 tdm_options value
-        tdm_options = self._tdm_options
-
-        sync_delay = (tdm_options >> 18) & 3
-        if sync_delay == TDM_SYNC_DELAY_1BIT:
-            settings.tdm_sync_delay = 1
-        elif sync_delay == TDM_SYNC_DELAY_2BITS:
-            settings.tdm_sync_delay = 2
-        else:
-            settings.tdm_sync_delay = 0
-
-        if tdm_options & TDM_TX_SYNC_WIDTH_BIT:
-            settings.tdm_sync_short = True
-        else:
-            settings.tdm_sync_short = False
-
-        if tdm_options & TDM_SYNC_POLARITY_INVERT:
-            settings.tdm_sync_invert = True
-        else:
-            settings.tdm_sync_invert = False
-
-        settings.tdm_frame_count = ((tdm_options >> 8) & 0xff) + 1
-
-        slot_count = (tdm_options >> 3) & 0x1f
-        if slot_count == 0:
-            settings.tdm_slot_count = 384
-        else:
-            settings.tdm_slot_count = slot_count + 1
-
-        settings.tdm_slot_bits = 4 + ((tdm_options & 0x7) * 4)
-
+        settings = Port.Settings._from_key(
+            _params_settings_key(bytes(params), self._tdm_options))
         settings.msb_first = self._msb_first
-
-        if settings.protocol == self.BISYNC:
-            settings.sync_pattern = self.transmit_idle_pattern
-        elif settings.protocol == self.MONOSYNC:
+        if settings.protocol == self.BISYNC or \
+           settings.protocol == self.MONOSYNC:
             settings.sync_pattern = self.transmit_idle_pattern
 
-        self._settings = deepcopy(settings)
+        self._settings = settings.copy()
         self._set_default_read_size()
 
         return settings
@@ -2049,6 +3321,24 @@ class Port():
     def signals(self, signals:int):
         MgslSetSerialSignals(self._handle, signals)
 
+    def signals_snapshot(self) -> Signals:
+        """Return Port.Signals object with all serial signal states."""
+        signals = INT(0)
+        MgslGetSerialSignals(self._handle, signals)
+        return Port.Signals(signals.value)
+
+    def watch_signals(self, callback, signals:int=DSR|CTS|DCD|RI) -> SignalWatcher:
+        """
+        Start thread calling callback when input signals change.
+        callback = function(old, new) called with Port.Signals objects
+                   from the watcher thread
+        signals = bit mask of input signals (DSR, CTS, DCD, RI) to watch
+        returns Port.SignalWatcher object, use stop() to end watching
+        """
+        watcher = Port.SignalWatcher(self, callback, signals)
+        self._watchers.append(watcher)
+        return watcher
+
     @property
     def dtr(self) -> bool:
         return bool(self.signals & Port.DTR)
@@ -2189,6 +3479,23 @@ class Port():
     def transmit_count(self) -> int:
         return self.get_option(MGSL_OPT_TX_COUNT)
 
+    @property
+    def bit_reverse(self) -> bool:
+        """
+        True if bit order of each byte is reversed in software by read
+        and write methods (see mgbits), for equipment using a different
+        bit order than Settings.msb_first. Frames of the receive pump are
+        reversed in place in the pump thread.
+        """
+        return self._bit_reverse is not None
+
+    @bit_reverse.setter
+    def bit_reverse(self, x:bool):
+        if x:
+            self._bit_reverse = mgbits
+        else:
+            self._bit_reverse = None
+
     @property
     def blocked_io(self) -> bool:
         return self._blocked_io
@@ -2255,7 +3562,7 @@ class Port():
     def set_defaults(self, defaults):
         if not self.is_open() or not self._port_id:
             return
-        self._defaults = deepcopy(defaults)
+        self._defaults = defaults.copy()
         self._set_default_read_size()
 
         cfg = MGSL_PORT_CONFIG_EX()
@@ -2269,6 +3576,8 @@ class Port():
         if not defaults.termination:
             cfg.Flags |= MGSL_NO_TERMINATION
         MgslSetPortConfigEx(self._port_id, cfg)
+        # interface and termination options follow port configuration
+        self._options.clear()
 
     def get_defaults(self):
         if not self.is_open() or not self._port_id:
@@ -2282,7 +3591,7 @@ class Port():
         defaults.interface = cfg.Flags & MGSL_INTERFACE_MASK
         defaults.rts_output_enable = bool(cfg.Flags & MGSL_RTS_DRIVER_CONTROL)
         defaults.termination = not bool(cfg.Flags & MGSL_NO_TERMINATION)
-        self._defaults = deepcopy(defaults)
+        self._defaults = defaults.copy()
         self._set_default_read_size()
         return defaults
 
@@ -2291,6 +3600,8 @@ class Port():
         # when switching to protocol that does not support PIO mode.
         if not self.is_open():
             return
+        # protocol change may alter driver option state
+        self._options.clear()
         old_params = MGSL_PARAMS()
         MgslGetParams(self._handle, old_params)
         old_blocked_io = self.blocked_io
@@ -2307,69 +3618,88 @@ class Port():
         self.blocked_io = old_blocked_io
         MgslSetParams(self._handle, old_params)
 
-    def set_fsynth_rate(self, rate: int) -> bool:
+    def _assigned_resources(self) -> MGSL_ASSIGNED_RESOURCES:
+        # resources do not change while port is open
+        if self._resources is None:
+            entry = port_registry.lookup(self._name)
+            if entry is not None and entry.resources is not None:
+                self._resources = entry.resources
+                return self._resources
+            resources = MGSL_ASSIGNED_RESOURCES()
+            if MgslGetAssignedResources(self._handle, resources):
+                return None
+            self._resources = resources
+            port_registry.set_resources(self._name, resources)
+        return self._resources
+
+    def set_fsynth_rate(self, rate: int, force: bool = False,
+                        max_ppm: float = 100.0) -> bool:
         """
         Set frequency synthesizer to specified rate.
+        force = program synthesizer even if card is already at rate
+        max_ppm = maximum error of rates not in the frequency tables
         Return True if success (rate supported), otherwise False.
+        Rates not in the frequency tables are produced by trimming the
+        VCO divider of a table word with ics307_trim(). This only covers
+        rates near ics307_trim_rates(), other rates return False.
+        The achieved rate (rounded to Hz), scaled from the table rate of
+        the trimmed word, is used as the base clock rate.
+        All ports of a card share the synthesizer. The programmed rate
+        is remembered per card so other ports of the card skip
+        reprogramming when set to the same rate.
         """
-        resources = MGSL_ASSIGNED_RESOURCES()
-        error = MgslGetAssignedResources(self._handle, resources)
-        if error:
+        resources = self._assigned_resources()
+        if resources is None:
             return False
 
         # select table and GPIO bit positions for device type
         if resources.DeviceId == SYNCLINK_USB_DEVICE_ID:
-            freq_table = usb_table
-            mux = self.gpio[23]
-            clk = self.gpio[22]
-            sel = self.gpio[21]
-            dat = self.gpio[20]
+            freq_index = _usb_index
+            mux = 23
+            clk = 22
+            sel = 21
+            dat = 20
         else:
-            freq_table = gt4e_table
-            mux = self.gpio[15]
-            clk = self.gpio[14]
-            sel = self.gpio[13]
-            dat = self.gpio[12]
-
-        data = 0
-
-        # search for entry for requested output frequency
-        for entry in freq_table:
-            if entry.freq == rate:
-                data = entry.data
-                break
-
-        if data == 0:
-            return False
-
-        clk.state = False
-
-        # write 132 bit clock program word one bit at a time
-        for i in range(0, 132):
-            if (i % 32) == 0:
-                dword_val = data[int(i/32)]
-            if dword_val & (1 << 31):
-                dat.state = True
-            else:
-                dat.state = False
-            # pulse clock signal to load next bit
-            clk.state = True
-            clk.state = False
-            dword_val <<= 1
-
-        # pulse select signal to accept new word
-        sel.state = True
-        sel.state = False
-
-        # set base clock input multiplexer
-        # False = fixed frequency oscillator (default 14.7456MHz)
-        # True  = frequency syntheziser output
-        mux.state = True
+            freq_index = _gt4e_index
+            mux = 15
+            clk = 14
+            sel = 13
+            dat = 12
+
+        entry = freq_index.get(rate)
+        if entry is None:
+            entry = ics307_trim(rate, freq_index is _usb_index)
+            if entry is None or abs(entry.ppm) > max_ppm:
+                return False
+            rate = round(entry.achieved)
+
+        # reprogram unless card is at rate and mux selects synthesizer
+        card = _card_key(resources)
+        if force or _card_fsynth_rates.get(card) != rate or \
+           not self.get_gpio() & (1 << mux):
+            _card_fsynth_rates.pop(card, None)
+            waveform = _fsynth_waveform(tuple(entry.data), mux, clk, sel, dat)
+            if not self.play_gpio(waveform):
+                return False
+            _card_fsynth_rates[card] = rate
 
         # tell port the new rate
         self.base_clock_rate = rate
         return True
 
+    def get_card_base_clock_rate(self) -> int:
+        """
+        Return base clock rate of card containing this port: the
+        synthesizer rate set with set_fsynth_rate() by any port of the
+        card, otherwise the base clock rate of this port.
+        """
+        resources = self._assigned_resources()
+        if resources is not None:
+            rate = _card_fsynth_rates.get(_card_key(resources))
+            if rate is not None:
+                return rate
+        return self.base_clock_rate
+
     def __init__(self, name:str):
         self._handle = HANDLE()
         self._open = False
@@ -2379,6 +3709,18 @@ class Port():
         self._blocked_io = True
         self._defaults = self.Defaults()
         self._settings = self.Settings()
+        self._read_buffer = bytearray()
+        self._read_buffer_arg = None
+        self._read_status = INT()
+        self.rx_stats = self.RxStats()
+        self._rx_pump = None
+        self._wait_ol = None
+        self._select_ol = None
+        self._watchers = []
+        self._resources = None
+        self._applied = None
+        self._options = {}
+        self._bit_reverse = None
         self.gpio = []
         for bit in range(0,32):
             gpio = self.GPIO(self, bit)
@@ -2396,6 +3738,237 @@ class Port():
         return self.__repr__()
 
 
+# Port.Settings <-> driver parameter conversion
+#
+# Conversions are memoized by settings value (Port.Settings._key()) so
+# switching ports between a few known settings profiles does not repeat
+# them.
+
+def _flag_decode_table(choices: list, default) -> dict:
+    """
+    Return dictionary of all flag combinations: decoded value.
+    choices = list of (flag, value) in decreasing priority order
+    default = value if no flag is set
+    """
+    table = {0: default}
+    for flag, value in reversed(choices):
+        for flags in list(table):
+            table[flags | flag] = value
+    return table
+
+
+# Settings value: MGSL_PARAMS.Flags bits
+_TXC_FLAGS = {
+    Port.RXC_INPUT: HDLC_FLAG_TXC_RXCPIN,
+    Port.INTERNAL: HDLC_FLAG_TXC_BRG,
+    Port.RECOVERED: HDLC_FLAG_TXC_DPLL,
+}
+_RXC_FLAGS = {
+    Port.TXC_INPUT: HDLC_FLAG_RXC_TXCPIN,
+    Port.INTERNAL: HDLC_FLAG_RXC_BRG,
+    Port.RECOVERED: HDLC_FLAG_RXC_DPLL,
+}
+
+# MGSL_PARAMS.Flags bits: Settings value
+_TXC_MASK = HDLC_FLAG_TXC_BRG | HDLC_FLAG_TXC_DPLL | HDLC_FLAG_TXC_RXCPIN
+_TXC_DECODE = _flag_decode_table(
+    [(HDLC_FLAG_TXC_BRG, Port.INTERNAL),
+     (HDLC_FLAG_TXC_DPLL, Port.RECOVERED),
+     (HDLC_FLAG_TXC_RXCPIN, Port.RXC_INPUT)], Port.TXC_INPUT)
+_RXC_MASK = HDLC_FLAG_RXC_BRG | HDLC_FLAG_RXC_DPLL | HDLC_FLAG_RXC_TXCPIN
+_RXC_DECODE = _flag_decode_table(
+    [(HDLC_FLAG_RXC_BRG, Port.INTERNAL),
+     (HDLC_FLAG_RXC_DPLL, Port.RECOVERED),
+     (HDLC_FLAG_RXC_TXCPIN, Port.TXC_INPUT)], Port.RXC_INPUT)
+
+# Settings.transmit_preamble_bits: MGSL_PARAMS.PreambleLength
+_PREAMBLE_LENGTH = {
+    8: HDLC_PREAMBLE_LENGTH_8BITS,
+    16: HDLC_PREAMBLE_LENGTH_16BITS,
+    32: HDLC_PREAMBLE_LENGTH_32BITS,
+    64: HDLC_PREAMBLE_LENGTH_64BITS,
+}
+_PREAMBLE_LENGTH_DECODE = {v: k for k, v in _PREAMBLE_LENGTH.items()}
+
+# Settings.transmit_preamble_pattern: MGSL_PARAMS.PreamblePattern
+_PREAMBLE_PATTERN = {
+    0: HDLC_PREAMBLE_PATTERN_ZEROS,
+    0xff: HDLC_PREAMBLE_PATTERN_ONES,
+    0x55: HDLC_PREAMBLE_PATTERN_10,
+    0xaa: HDLC_PREAMBLE_PATTERN_01,
+    0x7e: HDLC_PREAMBLE_PATTERN_FLAGS,
+}
+_PREAMBLE_PATTERN_DECODE = {v: k for k, v in _PREAMBLE_PATTERN.items()}
+
+# Settings.tdm_sync_delay: tdm_options bits
+_TDM_SYNC_DELAY = {
+    1: TDM_SYNC_DELAY_1BIT,
+    2: TDM_SYNC_DELAY_2BITS,
+}
+_TDM_SYNC_DELAY_DECODE = {v: k for k, v in _TDM_SYNC_DELAY.items()}
+
+# Settings.tdm_slot_bits: tdm_options bits
+_TDM_SLOT_SIZE = {
+    8: TDM_SLOT_SIZE_8BITS,
+    12: TDM_SLOT_SIZE_12BITS,
+    16: TDM_SLOT_SIZE_16BITS,
+    20: TDM_SLOT_SIZE_20BITS,
+    24: TDM_SLOT_SIZE_24BITS,
+    28: TDM_SLOT_SIZE_28BITS,
+}
+
+
+@lru_cache(maxsize=64)
+def _settings_tdm_options(key: tuple) -> int:
+    """
+    Return 32 bit tdm_options value for settings.
+    key = Port.Settings._key() value
+    """
+    settings = Port.Settings._from_key(key)
+    tdm_options = _TDM_SYNC_DELAY.get(settings.tdm_sync_delay, 0)
+
+    if settings.tdm_sync_frame:
+        tdm_options |= TDM_SYNC_FRAME_ON
+
+    if settings.tdm_sync_short:
+        tdm_options |= TDM_TX_SYNC_WIDTH_BIT
+
+    if settings.tdm_sync_invert:
+        tdm_options |= TDM_SYNC_POLARITY_INVERT
+
+    # tdm_options[15:8] 8 bit frame count
+    # valid tdm_frame_count: 1 to 256
+    if settings.tdm_frame_count and (settings.tdm_frame_count < 257):
+        tdm_options |= (settings.tdm_frame_count - 1) << 8
+
+    # tdm_options[7:3] 0=384 slots, 1-31 = 2-32 slots
+    # valid tdm_slot_count: 384 and 2-32
+    if (settings.tdm_slot_count > 1) and (settings.tdm_slot_count < 33):
+        tdm_options |= (settings.tdm_slot_count - 1) << 3
+
+    tdm_options |= _TDM_SLOT_SIZE.get(settings.tdm_slot_bits,
+                                      TDM_SLOT_SIZE_32BITS)
+    return tdm_options
+
+
+@lru_cache(maxsize=64)
+def _settings_params_data(key: tuple, base_clock_rate: int) -> bytes:
+    """
+    Return contents of MGSL_PARAMS for settings.
+    key = Port.Settings._key() value
+    base_clock_rate = port base clock rate (used if internal_clock_rate set)
+    """
+    settings = Port.Settings._from_key(key)
+    params = MGSL_PARAMS()
+    params.Mode = settings.protocol
+    params.Loopback = settings.internal_loopback
+
+    flags = _TXC_FLAGS.get(settings.transmit_clock, 0) | \
+        _RXC_FLAGS.get(settings.receive_clock, 0)
+    if settings.transmit_clock_invert:
+        flags |= HDLC_FLAG_TXC_INV
+    if settings.receive_clock_invert:
+        flags |= HDLC_FLAG_RXC_INV
+    if settings.auto_rts:
+        flags |= HDLC_FLAG_AUTO_RTS
+    if settings.auto_cts:
+        flags |= HDLC_FLAG_AUTO_CTS
+    if settings.auto_dcd:
+        flags |= HDLC_FLAG_AUTO_DCD
+    if settings.internal_clock_rate and \
+        base_clock_rate % (settings.internal_clock_rate * 16):
+        # x16 reference clock is not divisor of base clock
+        # fall back to x8 reference clock
+        flags |= HDLC_FLAG_DPLL_DIV8
+    params.Flags = flags
+
+    params.Encoding = settings.encoding
+    params.ClockSpeed = settings.internal_clock_rate
+
+    params.CrcType = settings.crc
+    if not settings.discard_data_with_error:
+        params.CrcType |= HDLC_CRC_RETURN_CRCERR_FRAME
+    if not settings.discard_received_crc:
+        params.CrcType |= HDLC_CRC_RETURN_CRC
+
+    params.Addr = settings.hdlc_address_filter
+
+    params.PreambleLength = _PREAMBLE_LENGTH.get(
+        settings.transmit_preamble_bits, HDLC_PREAMBLE_LENGTH_8BITS)
+    if settings.transmit_preamble_bits == 0:
+        params.PreamblePattern = HDLC_PREAMBLE_PATTERN_NONE
+    else:
+        params.PreamblePattern = _PREAMBLE_PATTERN.get(
+            settings.transmit_preamble_pattern, HDLC_PREAMBLE_PATTERN_NONE)
+
+    params.DataRate = settings.async_data_rate
+    params.DataBits = settings.async_data_bits
+    params.StopBits = settings.async_stop_bits
+    params.Parity = settings.async_parity
+    return bytes(params)
+
+
+@lru_cache(maxsize=64)
+def _params_settings_key(data: bytes, tdm_options: int) -> tuple:
+    """
+    Return Port.Settings._key() value decoded from driver parameters.
+    data = contents of MGSL_PARAMS
+    tdm_options = 32 bit tdm_options value
+    msb_first and sync_pattern are not decoded (default values).
+    """
+    params = MGSL_PARAMS.from_buffer_copy(data)
+    flags = params.Flags
+    settings = Port.Settings()
+    settings.protocol = params.Mode
+    settings.internal_loopback = bool(params.Loopback)
+
+    settings.receive_clock = _RXC_DECODE[flags & _RXC_MASK]
+    settings.receive_clock_invert = bool(flags & HDLC_FLAG_RXC_INV)
+    settings.transmit_clock = _TXC_DECODE[flags & _TXC_MASK]
+    settings.transmit_clock_invert = bool(flags & HDLC_FLAG_TXC_INV)
+    settings.auto_rts = bool(flags & HDLC_FLAG_AUTO_RTS)
+    settings.auto_cts = bool(flags & HDLC_FLAG_AUTO_CTS)
+    settings.auto_dcd = bool(flags & HDLC_FLAG_AUTO_DCD)
+
+    settings.encoding = params.Encoding
+    settings.internal_clock_rate = params.ClockSpeed
+
+    settings.crc = params.CrcType & HDLC_CRC_MODE
+    settings.discard_data_with_error = \
+        not params.CrcType & HDLC_CRC_RETURN_CRCERR_FRAME
+    settings.discard_received_crc = not params.CrcType & HDLC_CRC_RETURN_CRC
+
+    settings.hdlc_address_filter = params.Addr
+
+    pattern = _PREAMBLE_PATTERN_DECODE.get(params.PreamblePattern)
+    if pattern is None:
+        settings.transmit_preamble_pattern = 0
+        settings.transmit_preamble_bits = 0
+    else:
+        settings.transmit_preamble_pattern = pattern
+        settings.transmit_preamble_bits = \
+            _PREAMBLE_LENGTH_DECODE.get(params.PreambleLength, 0)
+
+    settings.async_data_rate = params.DataRate
+    settings.async_data_bits = params.DataBits
+    settings.async_stop_bits = params.StopBits
+    settings.async_parity = params.Parity
+
+    settings.tdm_sync_delay = _TDM_SYNC_DELAY_DECODE.get(
+        tdm_options & (3 << 18), 0)
+    settings.tdm_sync_frame = bool(tdm_options & TDM_SYNC_FRAME_ON)
+    settings.tdm_sync_short = bool(tdm_options & TDM_TX_SYNC_WIDTH_BIT)
+    settings.tdm_sync_invert = bool(tdm_options & TDM_SYNC_POLARITY_INVERT)
+    settings.tdm_frame_count = ((tdm_options >> 8) & 0xff) + 1
+    slot_count = (tdm_options >> 3) & 0x1f
+    if slot_count == 0:
+        settings.tdm_slot_count = 384
+    else:
+        settings.tdm_slot_count = slot_count + 1
+    settings.tdm_slot_bits = 4 + ((tdm_options & 0x7) * 4)
+    return settings._key()
+
+
 # This code programs the frequency synthesizer on the SyncLink GT2e/GT4e
 # PCI express serial adapters and SyncLink USB device to a specified frequency
 # and selects the synthesizer output as the adapter base clock. ONLY the GT2e/GT4e
@@ -2453,6 +4026,181 @@ class FREQ_TABLE_ENTRY:
         self.data = data  # synth programming data
 
 
+# frequency synthesizer rate programmed on each card by this process
+# key = _card_key(resources), value = rate
+_card_fsynth_rates = {}
+
+
+def _card_key(resources: MGSL_ASSIGNED_RESOURCES) -> tuple:
+    """Return key identifying physical card from assigned resources."""
+    return (resources.BusType, resources.BusNumber,
+            resources.DeviceNumber, resources.serial_number())
+
+
+@lru_cache(maxsize=64)
+def _fsynth_waveform(data: tuple, mux: int, clk: int, sel: int, dat: int):
+    """
+    Return Port.GPIOWaveform programming frequency synthesizer.
+    data = 5 word programming data from frequency table
+    mux, clk, sel, dat = GPIO bit numbers of synthesizer signals
+    """
+    mux = 1 << mux
+    clk = 1 << clk
+    sel = 1 << sel
+    dat = 1 << dat
+
+    steps = [(clk, 0)]
+
+    # write 132 bit clock program word one bit at a time
+    for i in range(0, 132):
+        if (i % 32) == 0:
+            dword_val = data[int(i/32)]
+        # set data with clock low, then raise clock to load bit
+        steps.append((clk | dat, dat if dword_val & (1 << 31) else 0))
+        steps.append((clk, clk))
+        dword_val <<= 1
+    steps.append((clk, 0))
+
+    # pulse select signal to accept new word
+    steps.append((sel, sel))
+    steps.append((sel, 0))
+
+    # set base clock input multiplexer
+    # False = fixed frequency oscillator (default 14.7456MHz)
+    # True  = frequency syntheziser output
+    steps.append((mux, mux))
+    return Port.GPIOWaveform(steps)
+
+
+# ICS307-3 programming word trimming
+#
+# The synthesizer output is:
+#
+#   fout = fref * 2 * (VDW + 8) / ((RDW + 2) * OD)
+#
+# fref = 14.7456MHz reference
+# VDW  = VCO divider word, 11 bits at bit 108 of the 132 bit word
+#        (bits 9-19 of data[3])
+# RDW  = reference divider word
+# OD   = output divider
+#
+# Only the VDW field location can be derived from the frequency tables.
+# The encoding of RDW/OD and of the remaining configuration bits
+# (output selection, loop filter, VCO band, drive strength) is not
+# documented and is produced by the Versaclock software, so this is not
+# a general solver: RDW and OD are never searched.
+#
+# ics307_trim() keeps every other bit of a table word (the template)
+# and replaces VDW, which scales the output of that word in steps of
+# fout / (VDW + 8). The output is scaled from the table frequency of the
+# template, fout * (VDW + 8) / (template VDW + 8), so table words give
+# exactly their table rates (RDW and OD are not decoded, so a modelled
+# fref / divisor would not). VDW is limited to _ICS307_VCO_SPAN of the template
+# VDW so that the loop filter and VCO band selected by Versaclock remain
+# valid. The reachable rates are therefore a discrete set near the table
+# frequencies (ics307_trim_rates()), with steps from about 0.05% (large
+# VDW) to 2% (small VDW). A requested rate is only usable if it is
+# within the required ppm of one of these rates. Many common rates are
+# not (for example 1MHz, 1.8432MHz, 3.6864MHz, 10MHz, and 25MHz/60MHz/
+# 65MHz within 100ppm). Those need a Versaclock word added to the
+# frequency tables.
+
+ICS307_REF_FREQ = 14745600
+ICS307_MAX_FREQ = 66000000
+_ICS307_VDW_SHIFT = 9
+_ICS307_VDW_MASK = 0x7FF << _ICS307_VDW_SHIFT
+_ICS307_VCO_SPAN = 0.1
+
+
+class ICS307_TRIM:
+    def __init__(self, freq, achieved, vdw, template_freq, data):
+        self.freq = freq            # requested frequency
+        self.achieved = achieved    # output frequency of programming word
+        self.ppm = (achieved - freq) * 1e6 / freq  # error in parts per million
+        self.vdw = vdw              # VCO divider word
+        self.template_freq = template_freq  # table frequency of template word
+        self.data = data            # 5 word programming data
+
+    def __repr__(self):
+        return 'ICS307_TRIM(freq=%d, achieved=%.3f, ppm=%+.3f, ' \
+            'vdw=%d, template_freq=%d)' % (self.freq, self.achieved,
+                                           self.ppm, self.vdw,
+                                           self.template_freq)
+
+
+def _ics307_templates(table: list) -> list:
+    """
+    Return list of (freq, vdw, data) for each entry of frequency table.
+    table = gt4e_table or usb_table
+    """
+    templates = []
+    for entry in table:
+        vdw = (entry.data[3] & _ICS307_VDW_MASK) >> _ICS307_VDW_SHIFT
+        templates.append((entry.freq, vdw, tuple(entry.data)))
+    return templates
+
+
+def _ics307_vdw_range(template_vdw: int) -> range:
+    """Return VDW values allowed for template VDW."""
+    span = int(_ICS307_VCO_SPAN * (template_vdw + 8))
+    return range(max(0, template_vdw - span),
+                 min(0x7FF, template_vdw + span) + 1)
+
+
+@lru_cache(maxsize=2)
+def ics307_trim_rates(usb: bool = False) -> tuple:
+    """
+    Return sorted tuple of all output frequencies ics307_trim() can
+    produce (above 0 and up to ICS307_MAX_FREQ).
+    usb = True for SyncLink USB (CLK3 output), False for GT2e/GT4e (CLK1 output)
+    A rate is supported by set_fsynth_rate() if it is within max_ppm
+    of one of these frequencies.
+    """
+    rates = set()
+    for freq, template_vdw, data in \
+            (_usb_templates if usb else _gt4e_templates):
+        for vdw in _ics307_vdw_range(template_vdw):
+            achieved = freq * (vdw + 8) / (template_vdw + 8)
+            if achieved <= ICS307_MAX_FREQ:
+                rates.add(achieved)
+    return tuple(sorted(rates))
+
+
+@lru_cache(maxsize=256)
+def ics307_trim(rate: int, usb: bool = False) -> ICS307_TRIM:
+    """
+    Return ICS307_TRIM with the table word trimmed closest to rate.
+    rate = requested synthesizer output frequency in Hz
+    usb = True for SyncLink USB (CLK3 output), False for GT2e/GT4e (CLK1 output)
+    Return None if rate is out of range of all template words.
+    The result can have a large error, check ppm. Only VDW is changed,
+    see ics307_trim_rates() for the rates that can be produced.
+    Table frequencies reproduce the table words with achieved equal to
+    the table frequency.
+    """
+    if rate <= 0 or rate > ICS307_MAX_FREQ:
+        return None
+    best = None
+    best_error = None
+    for freq, template_vdw, data in \
+            (_usb_templates if usb else _gt4e_templates):
+        vdw = round(rate * (template_vdw + 8) / freq) - 8
+        if vdw not in _ics307_vdw_range(template_vdw):
+            continue
+        achieved = freq * (vdw + 8) / (template_vdw + 8)
+        # prefer least error, then least VCO change from template
+        error = (abs(achieved - rate), abs(vdw - template_vdw))
+        if best is None or error < best_error:
+            best = (achieved, vdw, freq, data)
+            best_error = error
+    if best is None:
+        return None
+    achieved, vdw, freq, data = best
+    data = list(data)
+    data[3] = (data[3] & ~_ICS307_VDW_MASK) | (vdw << _ICS307_VDW_SHIFT)
+    return ICS307_TRIM(rate, achieved, vdw, freq, data)
+
+
 # GT2e/GT4e
 #
 # Base Clock = dedicated 14.7456MHz oscillator
@@ -2568,3 +4316,11 @@ usb_table = [
     FREQ_TABLE_ENTRY(
         64000000, [0x20781400, 0x4D400000, 0x00000000, 0x00049E03, 0xF0000000])
 ]
+
+# tables indexed by frequency
+_gt4e_index = {entry.freq: entry for entry in gt4e_table}
+_usb_index = {entry.freq: entry for entry in usb_table}
+
+# trimming templates
+_gt4e_templates = _ics307_templates(gt4e_table)
+_usb_templates = _ics307_templates(usb_table)
@@ -0,0 +1,63 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Bit order conversion of serial data.
+#
+# Settings.msb_first selects the bit order used by the hardware. Data
+# captured in one bit order and analyzed in the other, or exchanged with
+# equipment using a different order than the hardware setting, is
+# converted by reversing the bits of each byte:
+#
+#   data = mgbits.reverse_bits(port.read())
+#   mgbits.reverse_bits_into(buffer)   # in place
+#
+# Port.bit_reverse = True applies the conversion on the Port read and
+# write path.
+#
+# Conversion uses a 256 entry bytes.translate table, so the whole buffer
+# is converted in C without a per byte Python loop. In place conversion
+# works through a memoryview in cache sized chunks to bound temporary
+# copies.
+#
+
+# byte value: byte value with bit order reversed
+REVERSE = bytes(int('{:08b}'.format(i)[::-1], 2) for i in range(256))
+
+# bytes converted per translate call by reverse_bits_into()
+_CHUNK_SIZE = 65536
+
+
+def reverse_bits(data):
+    """
+    Return copy of data with bit order of each byte reversed.
+    data = bytes like object
+    returns bytearray for bytearray data, otherwise bytes
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return data.translate(REVERSE)
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view.tobytes().translate(REVERSE)
+
+
+def reverse_bits_into(buffer, count: int = None) -> int:
+    """
+    Reverse bit order of each byte of buffer in place.
+    buffer = writable bytes like object (bytearray, memoryview,
+             ctypes array, NumPy array)
+    count = number of bytes to convert from start of buffer,
+            default is whole buffer
+    returns number of bytes converted
+    """
+    view = memoryview(buffer)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    if count is None:
+        count = len(view)
+    table = REVERSE
+    for start in range(0, count, _CHUNK_SIZE):
+        end = min(start + _CHUNK_SIZE, count)
+        view[start:end] = view[start:end].tobytes().translate(table)
+    return count
@@ -0,0 +1,148 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# HDLC frame check sequence (CRC) calculation and verification.
+#
+# CRC16 is CRC-16/X.25 (reflected CCITT polynomial 0x1021, used by
+# Port.CRC16) and CRC32 is the reflected CRC-32 used by Port.CRC32.
+# Both are sent least significant byte first after the frame data.
+#
+# Frames received with Settings.discard_received_crc = False include the
+# received frame check sequence, which verify() and check_frames() use to
+# classify frames in software:
+#
+#   frames = [port.read_with_status(4096) for i in range(count)]
+#   for frame, status in mgcrc.check_frames(frames, Port.CRC16):
+#       ...
+#
+# The calculations run in the C table driven CRC functions of the
+# standard library (binascii.crc_hqx and zlib.crc32). CRC32 reads any
+# contiguous buffer in place. crc_hqx calculates the unreflected CCITT
+# CRC, so CRC16 input bytes are bit reversed with bytes.translate, which
+# copies the data: bytes and bytearray up to _CHUNK_SIZE are copied once
+# by translate, other buffers (memoryview, ctypes array) and larger
+# data are copied twice per _CHUNK_SIZE chunk (tobytes and translate),
+# which bounds the temporary memory. This is a deliberate trade-off, a
+# reflected table CRC16 that reads buffers in place has to loop over
+# bytes in Python and runs at about 15MB/s against 50-250MB/s for the
+# copying C path (see benchmarks/bench_crc.py).
+#
+
+import binascii
+import zlib
+
+from mgapi import Port
+from mgapi import RxStatus_OK, RxStatus_CrcError, RxStatus_ShortFrame
+from mgbits import REVERSE as _REVERSE
+
+# CRC of a frame including its correct frame check sequence
+CRC16_GOOD = 0x0f47
+CRC32_GOOD = 0x2144df1c
+
+# crc: frame check sequence size in bytes
+FCS_SIZE = {Port.OFF: 0, Port.CRC16: 2, Port.CRC32: 4}
+
+# bytes bit reversed per bytes.translate call (bounds temporary copies)
+_CHUNK_SIZE = 16384
+
+
+def _reverse16(value: int) -> int:
+    return (_REVERSE[value & 0xff] << 8) | _REVERSE[value >> 8]
+
+
+def crc16(data, value: int = 0) -> int:
+    """
+    Return CRC16 (CRC-16/X.25) of data.
+    data = bytes like object
+    value = CRC of preceding data to continue a calculation
+    """
+    reverse = _REVERSE
+    crc = _reverse16(value ^ 0xffff)
+    data_type = type(data)
+    if (data_type is bytes or data_type is bytearray) and \
+       len(data) <= _CHUNK_SIZE:
+        # single copy by translate
+        crc = binascii.crc_hqx(data.translate(reverse), crc)
+        return _reverse16(crc) ^ 0xffff
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    for start in range(0, len(view), _CHUNK_SIZE):
+        chunk = view[start:start + _CHUNK_SIZE].tobytes()
+        crc = binascii.crc_hqx(chunk.translate(reverse), crc)
+    return _reverse16(crc) ^ 0xffff
+
+
+def crc32(data, value: int = 0) -> int:
+    """
+    Return CRC32 of data.
+    data = bytes like object
+    value = CRC of preceding data to continue a calculation
+    """
+    return zlib.crc32(data, value)
+
+
+def fcs(data, crc: int) -> bytes:
+    """
+    Return frame check sequence bytes for data.
+    crc = Port.OFF, Port.CRC16 or Port.CRC32
+    """
+    if crc == Port.CRC16:
+        return crc16(data).to_bytes(2, 'little')
+    if crc == Port.CRC32:
+        return zlib.crc32(data).to_bytes(4, 'little')
+    return b''
+
+
+def verify(frame, crc: int) -> bool:
+    """
+    Return True if frame check sequence at end of frame is correct.
+    frame = bytes like object with frame data and frame check sequence
+    crc = Port.OFF (always True), Port.CRC16 or Port.CRC32
+    """
+    if crc == Port.CRC16:
+        return len(frame) >= 2 and crc16(frame) == CRC16_GOOD
+    if crc == Port.CRC32:
+        return len(frame) >= 4 and zlib.crc32(frame) == CRC32_GOOD
+    return True
+
+
+def verify_frames(frames, crc: int) -> list:
+    """
+    Return list of verify() results for each frame.
+    frames = iterable of bytes like objects with frame check sequence
+    crc = Port.OFF, Port.CRC16 or Port.CRC32
+    """
+    if crc == Port.CRC32:
+        good = CRC32_GOOD
+        return [len(frame) >= 4 and zlib.crc32(frame) == good
+                for frame in frames]
+    if crc == Port.CRC16:
+        good = CRC16_GOOD
+        return [len(frame) >= 2 and crc16(frame) == good
+                for frame in frames]
+    return [True for frame in frames]
+
+
+def check_frames(frames, crc: int) -> list:
+    """
+    Return list of (frame, status) with status updated by CRC check.
+    frames = iterable of (frame, status) as returned by
+             Port.read_with_status() or Port.RxPump.get()
+    crc = Port.OFF, Port.CRC16 or Port.CRC32
+    Frames received with RxStatus_OK are changed to RxStatus_ShortFrame
+    if shorter than the frame check sequence and to RxStatus_CrcError
+    if the frame check sequence is incorrect. Other status values are
+    unchanged.
+    """
+    size = FCS_SIZE[crc]
+    results = []
+    for frame, status in frames:
+        if status == RxStatus_OK:
+            if len(frame) < size:
+                status = RxStatus_ShortFrame
+            elif not verify(frame, crc):
+                status = RxStatus_CrcError
+        results.append((frame, status))
+    return results
@@ -0,0 +1,318 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Software HDLC framing for RAW (external sync) mode.
+#
+# In RAW mode (Port.RAW) the serial controller sends and receives an
+# unframed bit stream. HdlcEncoder and HdlcDecoder implement HDLC framing
+# in software: flag (0x7e) insertion and hunting, zero bit stuffing and
+# destuffing, abort (7 or more ones) detection and CRC16/CRC32 frame
+# check sequences (see mgcrc) matching the hardware Port.CRC16 and
+# Port.CRC32 modes.
+#
+#   encoder = mgframe.HdlcEncoder(Port.CRC16)
+#   port.write(encoder.encode(frame) + encoder.flush())
+#
+#   decoder = mgframe.HdlcDecoder(Port.CRC16)
+#   for frame, status in decoder.decode(port.read()):
+#       ...
+#
+# Bits are sent least significant bit of each byte first, as with the
+# hardware HDLC mode and Settings.msb_first = False.
+#
+# Bit stuffing and destuffing process one byte at a time with tables
+# indexed by (count of preceding one bits, byte). Bytes containing a
+# flag or abort sequence fall back to processing one bit at a time.
+#
+
+from mgapi import Port
+from mgapi import RxStatus_OK, RxStatus_CrcError, RxStatus_ShortFrame
+from mgapi import RxStatus_Abort, RxStatus_BufferOverrun
+from mgcrc import FCS_SIZE, fcs, verify
+
+HDLC_FLAG = 0x7e
+
+
+def _stuff_table() -> list:
+    """
+    Return bit stuffing table.
+    index = ones << 8 | byte
+    ones  = count of preceding one bits (0-4)
+    entry = (stuffed bits, bit count, ones after byte)
+    """
+    table = []
+    for ones in range(5):
+        for byte in range(256):
+            bits = 0
+            count = 0
+            n = ones
+            for i in range(8):
+                bit = (byte >> i) & 1
+                bits |= bit << count
+                count += 1
+                if bit:
+                    n += 1
+                    if n == 5:
+                        # insert zero after five ones
+                        count += 1
+                        n = 0
+                else:
+                    n = 0
+            table.append((bits, count, n))
+    return table
+
+
+def _destuff_table() -> list:
+    """
+    Return bit destuffing table.
+    index = ones << 8 | byte
+    ones  = count of preceding one bits (0-5)
+    entry = (data bits, bit count, ones after byte) or None if the
+            byte contains six ones in a row (flag or abort)
+    """
+    table = []
+    for ones in range(6):
+        for byte in range(256):
+            bits = 0
+            count = 0
+            n = ones
+            for i in range(8):
+                if (byte >> i) & 1:
+                    n += 1
+                    if n == 6:
+                        break
+                    bits |= 1 << count
+                    count += 1
+                else:
+                    if n != 5:
+                        # zero following five ones is a stuffed bit
+                        count += 1
+                    n = 0
+            else:
+                table.append((bits, count, n))
+                continue
+            table.append(None)
+    return table
+
+
+_STUFF = _stuff_table()
+_DESTUFF = _destuff_table()
+
+
+class HdlcEncoder():
+    """
+    Streaming HDLC frame encoder.
+    Output of successive calls forms one continuous bit stream, bits
+    that do not fill a byte are kept for the next call.
+    """
+
+    def __init__(self, crc: int = Port.CRC16, flags: int = 1):
+        """
+        crc = Port.OFF, Port.CRC16 or Port.CRC32
+        flags = number of opening flags sent before each frame
+        """
+        assert crc in FCS_SIZE, str.format("invalid crc = {}", crc)
+        assert flags > 0, str.format("flags must be > 0")
+        self.crc = crc
+        self.flags = flags
+        self._bits = 0    # bits not yet output
+        self._count = 0   # number of bits in _bits
+
+    def _put(self, out: bytearray, bits: int, count: int):
+        # append raw (unstuffed) bits
+        bits = self._bits | (bits << self._count)
+        count += self._count
+        while count >= 8:
+            out.append(bits & 0xff)
+            bits >>= 8
+            count -= 8
+        self._bits = bits
+        self._count = count
+
+    def encode(self, frame) -> bytes:
+        """
+        Return bit stream for frame: opening flags, stuffed frame data
+        and frame check sequence, closing flag.
+        frame = bytes like object with frame data
+        """
+        out = bytearray()
+        for i in range(self.flags):
+            self._put(out, HDLC_FLAG, 8)
+
+        table = _STUFF
+        bits = self._bits
+        count = self._count
+        ones = 0
+        for data in (frame, fcs(frame, self.crc)):
+            for b in data:
+                stuffed, n, ones = table[ones << 8 | b]
+                bits |= stuffed << count
+                count += n
+                if count >= 32:
+                    out += (bits & 0xffffffff).to_bytes(4, 'little')
+                    bits >>= 32
+                    count -= 32
+        self._bits = bits
+        self._count = count
+
+        self._put(out, HDLC_FLAG, 8)
+        return bytes(out)
+
+    def abort(self) -> bytes:
+        """Return abort sequence (seven ones) padded to a byte boundary."""
+        out = bytearray()
+        self._put(out, 0x7f, 7)
+        return bytes(out) + self.flush()
+
+    def flush(self) -> bytes:
+        """
+        Return bits not yet output padded with ones (idle) to a byte
+        boundary.
+        """
+        out = bytearray()
+        if self._count:
+            count = 8 - self._count
+            self._put(out, (1 << count) - 1, count)
+        return bytes(out)
+
+
+class HdlcDecoder():
+    """
+    Streaming HDLC frame decoder.
+    Receive data of successive decode() calls is treated as one
+    continuous bit stream.
+    """
+
+    def __init__(self, crc: int = Port.CRC16, max_frame_size: int = 65535,
+                 discard_received_crc: bool = True):
+        """
+        crc = Port.OFF, Port.CRC16 or Port.CRC32
+        max_frame_size = maximum frame size including frame check sequence
+        discard_received_crc = remove frame check sequence from frames
+        """
+        assert crc in FCS_SIZE, str.format("invalid crc = {}", crc)
+        self.crc = crc
+        self.max_frame_size = max_frame_size
+        self.discard_received_crc = discard_received_crc
+        self.reset()
+
+    def reset(self):
+        """Discard partial frame and hunt for flag."""
+        self._in_frame = False
+        self._ones = 0
+        self._bits = 0
+        self._count = 0
+        self._frame = bytearray()
+
+    def _end_frame(self, frames: list, frame: bytearray, bits: int, count: int):
+        """Check frame ended by flag and append (frame, status) to frames."""
+        # remove the flag bits (zero and five ones) added as data
+        if count < 6:
+            if not frame:
+                # shared or idle flags
+                return
+            bits = frame.pop() | (bits << 8)
+            count += 8
+        count -= 6
+        if count:
+            # frame is not a multiple of 8 bits (residue)
+            frames.append((bytes(frame), RxStatus_CrcError))
+            return
+        fcs_size = FCS_SIZE[self.crc]
+        if len(frame) <= fcs_size:
+            if frame:
+                frames.append((bytes(frame), RxStatus_ShortFrame))
+            return
+        if not verify(frame, self.crc):
+            frames.append((bytes(frame), RxStatus_CrcError))
+        elif self.discard_received_crc:
+            frames.append((bytes(frame[:len(frame) - fcs_size]), RxStatus_OK))
+        else:
+            frames.append((bytes(frame), RxStatus_OK))
+
+    def decode(self, data) -> list:
+        """
+        Decode receive data and return list of (frame, status) for frames
+        ended in data.
+        status = RxStatus_OK, RxStatus_CrcError (bad frame check sequence
+                 or frame not multiple of 8 bits), RxStatus_ShortFrame,
+                 RxStatus_Abort (partial frame data) or
+                 RxStatus_BufferOverrun (frame exceeds max_frame_size)
+        Frames with errors include the received frame check sequence.
+        """
+        frames = []
+        table = _DESTUFF
+        in_frame = self._in_frame
+        ones = self._ones
+        bits = self._bits
+        count = self._count
+        frame = self._frame
+        max_size = self.max_frame_size
+
+        for b in data:
+            if ones < 6:
+                entry = table[ones << 8 | b]
+                if entry is not None:
+                    data_bits, n, ones = entry
+                    if in_frame:
+                        bits |= data_bits << count
+                        count += n
+                        if count >= 32:
+                            frame += (bits & 0xffffffff).to_bytes(4, 'little')
+                            bits >>= 32
+                            count -= 32
+                            if len(frame) > max_size:
+                                frames.append((bytes(frame),
+                                               RxStatus_BufferOverrun))
+                                in_frame = False
+                    continue
+
+            # byte contains flag or abort, process one bit at a time
+            for i in range(8):
+                if (b >> i) & 1:
+                    ones += 1
+                    if ones < 6:
+                        if in_frame:
+                            bits |= 1 << count
+                            count += 1
+                    elif ones == 7 and in_frame:
+                        # abort, report unless only idle ones follow flag
+                        if frame or count > 5:
+                            while count >= 8:
+                                frame.append(bits & 0xff)
+                                bits >>= 8
+                                count -= 8
+                            frames.append((bytes(frame), RxStatus_Abort))
+                        in_frame = False
+                else:
+                    if ones == 6:
+                        # flag ends current frame and starts next frame
+                        if in_frame:
+                            while count >= 8:
+                                frame.append(bits & 0xff)
+                                bits >>= 8
+                                count -= 8
+                            self._end_frame(frames, frame, bits, count)
+                        in_frame = True
+                        frame = bytearray()
+                        bits = 0
+                        count = 0
+                    elif ones != 5 and in_frame:
+                        count += 1
+                    ones = 0
+            if not in_frame:
+                frame = bytearray()
+                bits = 0
+                count = 0
+
+        if not in_frame:
+            frame = bytearray()
+            bits = 0
+            count = 0
+        self._in_frame = in_frame
+        self._ones = ones
+        self._bits = bits
+        self._count = count
+        self._frame = frame
+        return frames
@@ -0,0 +1,240 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Software model of serial line encodings (requires NumPy).
+#
+# encode() converts data bits to line levels and decode() converts line
+# levels back to data bits for each Settings.encoding value:
+#
+#   Port.NRZ                level = bit
+#   Port.NRZB               level = inverted bit
+#   Port.NRZI_MARK          1 = transition, 0 = no transition
+#   Port.NRZI_SPACE (NRZI)  0 = transition, 1 = no transition
+#   Port.FM1                transition at start of every bit cell,
+#                           1 = extra transition at mid cell
+#   Port.FM0                transition at start of every bit cell,
+#                           0 = extra transition at mid cell
+#   Port.MANCHESTER         1 = high to low at mid cell,
+#                           0 = low to high at mid cell
+#   Port.DIFF_BIPHASE_LEVEL transition at mid cell of every bit cell,
+#                           0 = extra transition at start of cell
+#
+# Bits and levels are NumPy uint8 arrays of 0 and 1. NRZ encodings have
+# one level per bit. Biphase encodings (FM0, FM1, MANCHESTER and
+# DIFF_BIPHASE_LEVEL) have two levels per bit, one for each half of the
+# bit cell. Use sample() to reduce an oversampled logic analyzer capture
+# to one level per symbol, and unpack_bits()/pack_bits() to convert
+# between bytes and bits:
+#
+#   bits = mglinecode.unpack_bits(frame_bytes)
+#   levels = mglinecode.encode(bits, Port.FM0)
+#   symbols = mglinecode.sample(capture, samples_per_symbol=8)
+#   data = mglinecode.pack_bits(mglinecode.decode(symbols, Port.FM0))
+#
+# Differential encodings depend on the line level before the first bit
+# (level argument). Transitions are computed for whole arrays at once:
+# the running level of differential encodings is a cumulative XOR of
+# per bit transitions, and biphase cells are built and split as pairs
+# of half cell levels.
+#
+
+import numpy as np
+
+from mgapi import Port
+
+
+def unpack_bits(data, msb_first: bool = False) -> np.ndarray:
+    """
+    Return uint8 array of bits of data in transmit order.
+    data = bytes like object
+    msb_first = True if bit 7 of each byte is sent first
+    """
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8),
+                         bitorder='big' if msb_first else 'little')
+
+
+def pack_bits(bits, msb_first: bool = False) -> bytes:
+    """
+    Return bytes of bits in transmit order, inverse of unpack_bits().
+    A final partial byte is padded with zero bits.
+    """
+    return np.packbits(np.asarray(bits, dtype=np.uint8),
+                       bitorder='big' if msb_first else 'little').tobytes()
+
+
+def sample(capture, samples_per_symbol: float, offset: float = None) -> np.ndarray:
+    """
+    Return line level at the center of each symbol of an oversampled
+    capture.
+    capture = array like of samples, nonzero = high
+    samples_per_symbol = samples per level of encode() output
+                         (per bit for NRZ, per half bit for biphase)
+    offset = sample index of the center of the first symbol,
+             default is half a symbol
+    """
+    capture = np.asarray(capture)
+    if offset is None:
+        offset = samples_per_symbol / 2
+    count = int((len(capture) - offset) / samples_per_symbol) + 1 \
+        if len(capture) > offset else 0
+    index = (offset + np.arange(count) * samples_per_symbol).astype(np.intp)
+    return (capture[index] != 0).astype(np.uint8)
+
+
+def symbols_per_bit(encoding: int) -> int:
+    """Return number of levels per bit of encoding (1 or 2)."""
+    assert encoding in _CODECS, str.format("invalid encoding = {}", encoding)
+    return 2 if encoding in _BIPHASE else 1
+
+
+def _bits(bits) -> np.ndarray:
+    return np.asarray(bits, dtype=np.uint8) & 1
+
+
+def _previous(levels: np.ndarray, level: int) -> np.ndarray:
+    """Return levels delayed by one with level first."""
+    previous = np.empty_like(levels)
+    if len(levels):
+        previous[0] = level
+        previous[1:] = levels[:-1]
+    return previous
+
+
+def _cells(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Return interleaved first and second half cell levels."""
+    return np.stack((first, second), axis=1).reshape(-1)
+
+
+def _halves(levels) -> (np.ndarray, np.ndarray):
+    """Return first and second half cell levels of complete cells."""
+    levels = _bits(levels)
+    levels = levels[:len(levels) & ~1]
+    return levels[0::2], levels[1::2]
+
+
+def _encode_nrz(bits, level):
+    return _bits(bits)
+
+
+def _decode_nrz(levels, level):
+    return _bits(levels)
+
+
+def _encode_nrzb(bits, level):
+    return _bits(bits) ^ 1
+
+
+def _decode_nrzb(levels, level):
+    return _bits(levels) ^ 1
+
+
+def _encode_nrzi_mark(bits, level):
+    # transition for 1
+    return np.bitwise_xor.accumulate(_bits(bits)) ^ np.uint8(level)
+
+
+def _decode_nrzi_mark(levels, level):
+    levels = _bits(levels)
+    return levels ^ _previous(levels, level)
+
+
+def _encode_nrzi_space(bits, level):
+    # transition for 0
+    return np.bitwise_xor.accumulate(_bits(bits) ^ 1) ^ np.uint8(level)
+
+
+def _decode_nrzi_space(levels, level):
+    levels = _bits(levels)
+    return levels ^ _previous(levels, level) ^ 1
+
+
+def _encode_fm(bits, level, space):
+    # transition at start of each cell plus mid cell transition
+    # for 1 (FM1) or 0 (FM0)
+    mid = _bits(bits) ^ space
+    end = np.bitwise_xor.accumulate(mid ^ 1) ^ np.uint8(level)
+    return _cells(_previous(end, level) ^ 1, end)
+
+
+def _decode_fm(levels, level, space):
+    first, second = _halves(levels)
+    return first ^ second ^ space
+
+
+def _encode_fm1(bits, level):
+    return _encode_fm(bits, level, 0)
+
+
+def _decode_fm1(levels, level):
+    return _decode_fm(levels, level, 0)
+
+
+def _encode_fm0(bits, level):
+    return _encode_fm(bits, level, 1)
+
+
+def _decode_fm0(levels, level):
+    return _decode_fm(levels, level, 1)
+
+
+def _encode_manchester(bits, level):
+    bits = _bits(bits)
+    return _cells(bits, bits ^ 1)
+
+
+def _decode_manchester(levels, level):
+    first, second = _halves(levels)
+    return first
+
+
+def _encode_diff_biphase_level(bits, level):
+    # mid cell transition in every cell, start transition for 0
+    end = np.bitwise_xor.accumulate(_bits(bits)) ^ np.uint8(level)
+    return _cells(end ^ 1, end)
+
+
+def _decode_diff_biphase_level(levels, level):
+    first, second = _halves(levels)
+    return first ^ _previous(second, level) ^ 1
+
+
+# encoding: (encoder, decoder)
+_CODECS = {
+    Port.NRZ: (_encode_nrz, _decode_nrz),
+    Port.NRZB: (_encode_nrzb, _decode_nrzb),
+    Port.NRZI_MARK: (_encode_nrzi_mark, _decode_nrzi_mark),
+    Port.NRZI_SPACE: (_encode_nrzi_space, _decode_nrzi_space),
+    Port.FM1: (_encode_fm1, _decode_fm1),
+    Port.FM0: (_encode_fm0, _decode_fm0),
+    Port.MANCHESTER: (_encode_manchester, _decode_manchester),
+    Port.DIFF_BIPHASE_LEVEL: (_encode_diff_biphase_level,
+                              _decode_diff_biphase_level),
+}
+
+_BIPHASE = frozenset((Port.FM1, Port.FM0, Port.MANCHESTER,
+                      Port.DIFF_BIPHASE_LEVEL))
+
+
+def encode(bits, encoding: int, level: int = 0) -> np.ndarray:
+    """
+    Return uint8 array of line levels for data bits.
+    bits = array like of data bits in transmit order
+    encoding = Settings.encoding value (Port.NRZ, Port.FM0, ...)
+    level = line level before the first bit (differential encodings)
+    """
+    assert encoding in _CODECS, str.format("invalid encoding = {}", encoding)
+    return _CODECS[encoding][0](bits, level & 1)
+
+
+def decode(levels, encoding: int, level: int = 0) -> np.ndarray:
+    """
+    Return uint8 array of data bits for line levels.
+    levels = array like of line levels, one per bit (NRZ encodings)
+             or per half bit starting at a bit cell (biphase encodings)
+    encoding = Settings.encoding value (Port.NRZ, Port.FM0, ...)
+    level = line level before the first bit (differential encodings)
+    An incomplete biphase cell at the end of levels is ignored.
+    """
+    assert encoding in _CODECS, str.format("invalid encoding = {}", encoding)
+    return _CODECS[encoding][1](levels, level & 1)
@@ -0,0 +1,895 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Simulated SyncLink devices for running mgapi without hardware.
+#
+# SimBackend implements the mgapi driver backend functions in Python so
+# that Port and applications can be run and load tested on any platform.
+#
+#   import mgapi, mgsim
+#   mgapi.set_backend(mgsim.SimBackend())
+#
+# or set environment variable MGAPI_BACKEND=sim before starting a program.
+#
+# The default backend contains one 2 port card (MGMP1P1, MGMP1P2) with
+# the ports wired to each other through a loopback (null modem) cable:
+#
+#   TxD -> peer RxD
+#   RTS -> peer CTS and DCD
+#   DTR -> peer DSR
+#
+# Send data is delivered to the peer at the rate set by MGSL_PARAMS:
+# DataRate for ASYNC, ClockSpeed for synchronous modes. A ClockSpeed of 0
+# (external clocks) delivers immediately. HDLC and TDM writes are delivered
+# as frames, other modes as a byte stream. MGSL_PARAMS.Loopback sends data
+# to the same port.
+#
+
+import ctypes
+import heapq
+import threading
+import time
+from collections import deque
+
+from mgapi import HANDLE, INFINITE, WAIT_OBJECT_0, WAIT_TIMEOUT
+from mgapi import ERROR_BAD_DEVICE, ERROR_DEVICE_IN_USE, ERROR_IO_PENDING
+from mgapi import MGSL_PARAMS, MGSL_PORT, MGSL_PORT_CONFIG_EX
+from mgapi import MGSL_INVALID_HANDLE, MGSL_MAX_PORTS, MAX_ASYNC_TRANSMIT
+from mgapi import MGSL_MODE_ASYNC, MGSL_MODE_HDLC, MGSL_MODE_TDM
+from mgapi import MGSL_INTERFACE_RS232, MGSL_OPT_INTERFACE
+from mgapi import ASYNC_PARITY_NONE, HDLC_CRC_MODE, HDLC_CRC_16_CCITT
+from mgapi import HDLC_CRC_32_CCITT, HDLC_CRC_RETURN_CRC, HDLC_TXIDLE_FLAGS
+from mgapi import MGSL_OPT_CLOCK_BASE_FREQ, MGSL_OPT_RX_COUNT
+from mgapi import MGSL_OPT_TX_COUNT, MGSL_OPT_RX_POLL, MGSL_OPT_TX_POLL
+from mgapi import MGSL_OPT_RX_DISCARD_TOO_LARGE
+from mgapi import RxStatus_OK, RxStatus_BufferOverrun, RxStatus_BufferTooSmall
+from mgapi import SerialSignal_CTS, SerialSignal_DCD, SerialSignal_DSR
+from mgapi import SerialSignal_DTR, SerialSignal_RI, SerialSignal_RTS
+from mgapi import MgslEvent_CtsActive, MgslEvent_CtsInactive
+from mgapi import MgslEvent_DcdActive, MgslEvent_DcdInactive
+from mgapi import MgslEvent_DsrActive, MgslEvent_DsrInactive
+from mgapi import MgslEvent_RiActive, MgslEvent_RiInactive
+from mgapi import MgslEvent_ExitHuntMode, MgslEvent_IdleReceived
+from mgapi import SYNCLINK_GT2_DEVICE_ID
+import mgcrc
+
+# (signal, active event, inactive event) for input signal events
+_SIGNAL_EVENTS = (
+    (SerialSignal_DSR, MgslEvent_DsrActive, MgslEvent_DsrInactive),
+    (SerialSignal_CTS, MgslEvent_CtsActive, MgslEvent_CtsInactive),
+    (SerialSignal_DCD, MgslEvent_DcdActive, MgslEvent_DcdInactive),
+    (SerialSignal_RI, MgslEvent_RiActive, MgslEvent_RiInactive)
+)
+
+# Win32 values not used by mgapi
+ERROR_INVALID_HANDLE = 6
+WAIT_FAILED = 0xFFFFFFFF
+
+# PCI bus type reported in assigned resources
+_BUS_TYPE_PCI = 5
+
+_DEFAULT_BASE_CLOCK = 14745600
+
+
+def _handle_value(handle) -> int:
+    """Return integer value of HANDLE object or integer handle."""
+    if isinstance(handle, ctypes._SimpleCData):
+        return handle.value
+    return handle
+
+
+def _byte_view(buf) -> memoryview:
+    """Return unsigned byte memoryview of buffer."""
+    view = memoryview(buf)
+    if view.format != 'B':
+        view = view.cast('B')
+    return view
+
+
+class SimEvent():
+    """Simulated Win32 event object."""
+
+    def __init__(self, manual_reset: bool, state: bool):
+        self.manual_reset = manual_reset
+        self.signalled = state
+
+
+class SimCard():
+    """Simulated serial adapter card."""
+
+    def __init__(self, name: str, device_id: int, bus_number: int,
+                 device_number: int, serial_number: str):
+        self.name = name
+        self.device_id = device_id
+        self.bus_number = bus_number
+        self.device_number = device_number
+        self.serial_number = serial_number
+        self.ports = []
+        # GPIO signals are shared by all ports of a card
+        self.gpio_state = 0
+        self.gpio_dir = 0
+
+
+class SimPort():
+    """State of one simulated serial port."""
+
+    def __init__(self, name: str, port_id: int, card: SimCard):
+        self.name = name
+        self.port_id = port_id
+        self.card = card
+        self.peer = None
+        self.handle = None
+        self.max_frame_size = 4096
+        self.config_flags = MGSL_INTERFACE_RS232
+        self.reset()
+
+    def reset(self):
+        """Reset port state for open."""
+        self.params = MGSL_PARAMS()
+        self.options = {
+            MGSL_OPT_CLOCK_BASE_FREQ: _DEFAULT_BASE_CLOCK,
+            MGSL_OPT_INTERFACE: self.config_flags & 0xf
+        }
+        self.idle_mode = HDLC_TXIDLE_FLAGS
+        self.outputs = 0
+        self.rx_enabled = False
+        self.tx_enabled = False
+        self.rx_frames = deque()
+        self.rx_stream = bytearray()
+        self.rx_cancels = 0
+        self.tx_cancels = 0
+        self.tx_generation = 0
+        self.tx_pending = 0
+        self.tx_busy_until = 0.0
+        self.event_waits = []
+        self.gpio_waits = []
+
+    def framed(self) -> bool:
+        """Return True if protocol delivers data as frames."""
+        return self.params.Mode in (MGSL_MODE_HDLC, MGSL_MODE_TDM)
+
+    def purge_rx(self):
+        self.rx_frames.clear()
+        del self.rx_stream[:]
+
+    def rx_count(self) -> int:
+        """Return number of received bytes available."""
+        if self.framed():
+            return sum(len(frame) for frame, status in self.rx_frames)
+        return len(self.rx_stream)
+
+    def tx_capacity(self) -> int:
+        """Return size of transmit buffer in bytes."""
+        if self.params.Mode == MGSL_MODE_ASYNC:
+            return MAX_ASYNC_TRANSMIT
+        return 8 * self.max_frame_size
+
+    def crc_size(self) -> int:
+        crc = self.params.CrcType & HDLC_CRC_MODE
+        if crc == HDLC_CRC_16_CCITT:
+            return 2
+        elif crc == HDLC_CRC_32_CCITT:
+            return 4
+        return 0
+
+    def line_time(self, size: int) -> float:
+        """Return seconds needed to send size bytes, 0 if not paced."""
+        params = self.params
+        if params.Mode == MGSL_MODE_ASYNC:
+            rate = params.DataRate
+            bits = 1 + params.DataBits + params.StopBits
+            if params.Parity != ASYNC_PARITY_NONE:
+                bits += 1
+            bits *= size
+        else:
+            rate = params.ClockSpeed
+            if params.Mode == MGSL_MODE_HDLC:
+                # opening/closing flags and frame check
+                bits = (size + self.crc_size() + 2) * 8
+            else:
+                bits = size * 8
+        if not rate:
+            return 0.0
+        return bits / rate
+
+
+class SimBackend():
+    """
+    Driver backend simulating SyncLink devices in process.
+    Implements the functions listed in mgapi.BACKEND_FUNCTIONS.
+    """
+
+    def __init__(self, port_count: int = 2,
+                 device_id: int = SYNCLINK_GT2_DEVICE_ID):
+        """
+        Create backend with one card of port_count ports.
+        Use port_count=0 to start empty and add cards with add_card().
+        """
+        self._lock = threading.Condition()
+        self._cards = []
+        self._ports = []
+        self._objects = {}
+        self._next_handle = 0x100
+        self._schedule = []
+        self._sequence = 0
+        self._scheduler = None
+        if port_count:
+            self.add_card(port_count, device_id)
+
+    #
+    # Simulation control
+    #
+
+    def add_card(self, port_count: int = 2,
+                 device_id: int = SYNCLINK_GT2_DEVICE_ID) -> list:
+        """
+        Add card with specified number of ports and return port names.
+        Ports are named MGMP<card>P<port>, each odd numbered port is
+        connected to the following even numbered port.
+        """
+        with self._lock:
+            number = len(self._cards) + 1
+            card = SimCard('MGMP' + str(number), device_id, number, 0,
+                           'SIM' + str(number).zfill(5))
+            self._cards.append(card)
+            for i in range(1, port_count + 1):
+                port = SimPort(card.name + 'P' + str(i),
+                               len(self._ports) + 1, card)
+                card.ports.append(port)
+                self._ports.append(port)
+            for i in range(0, port_count - 1, 2):
+                self._connect(card.ports[i], card.ports[i + 1])
+            return [port.name for port in card.ports]
+
+    def connect(self, name_a: str, name_b: str):
+        """
+        Connect two ports with a loopback cable.
+        Connecting a port to itself simulates a loopback plug.
+        """
+        with self._lock:
+            self._connect(self._by_name(name_a), self._by_name(name_b))
+
+    def disconnect(self, name: str):
+        """Remove cable from port."""
+        with self._lock:
+            self._connect(self._by_name(name), None)
+
+    def receive(self, name: str, data, status: int = RxStatus_OK):
+        """Deliver data to port as if received from the line."""
+        with self._lock:
+            port = self._by_name(name)
+            if port.handle is not None and port.rx_enabled:
+                self._store_rx(port, bytes(_byte_view(data)), status)
+            self._lock.notify_all()
+
+    def _connect(self, port, peer):
+        if port.peer is not None:
+            port.peer.peer = None
+        if peer is not None:
+            if peer.peer is not None:
+                peer.peer.peer = None
+            peer.peer = port
+        port.peer = peer
+
+    def _by_name(self, name: str) -> SimPort:
+        for port in self._ports:
+            if port.name == name.upper():
+                return port
+        raise KeyError(name)
+
+    def _port(self, handle) -> SimPort:
+        port = self._objects.get(_handle_value(handle))
+        if isinstance(port, SimPort):
+            return port
+        return None
+
+    def _overlapped_event(self, ol) -> SimEvent:
+        """
+        Return event of overlapped structure, reset as Windows does
+        when an overlapped request starts.
+        """
+        event = self._objects.get(_handle_value(ol.hEvent))
+        if not isinstance(event, SimEvent):
+            return None
+        event.signalled = False
+        return event
+
+    def _new_handle(self, obj) -> int:
+        handle = self._next_handle
+        self._next_handle += 1
+        self._objects[handle] = obj
+        return handle
+
+    #
+    # Signals and events
+    #
+
+    def _signals(self, port: SimPort) -> int:
+        signals = port.outputs
+        peer = port.peer
+        if peer is not None and peer.handle is not None:
+            if peer.outputs & SerialSignal_RTS:
+                signals |= SerialSignal_CTS | SerialSignal_DCD
+            if peer.outputs & SerialSignal_DTR:
+                signals |= SerialSignal_DSR
+        return signals
+
+    def _signal_states(self, port: SimPort) -> int:
+        """Return event bits describing current input signal states."""
+        signals = self._signals(port)
+        states = 0
+        for signal, active, inactive in _SIGNAL_EVENTS:
+            states |= active if signals & signal else inactive
+        return states
+
+    def _fire(self, port: SimPort, events: int):
+        """Complete pending event waits satisfied by events."""
+        waits = []
+        for wait in port.event_waits:
+            mask, result, event = wait
+            if mask & events:
+                result.value = mask & events
+                if event is not None:
+                    event.signalled = True
+            else:
+                waits.append(wait)
+        port.event_waits = waits
+
+    def _set_outputs(self, port: SimPort, outputs: int):
+        """Change output signals and fire resulting input events."""
+        ports = [port]
+        if port.peer is not None and port.peer is not port:
+            ports.append(port.peer)
+        before = [self._signal_states(p) for p in ports]
+        port.outputs = outputs & (SerialSignal_DTR | SerialSignal_RTS)
+        for p, old in zip(ports, before):
+            new = self._signal_states(p)
+            if new != old:
+                self._fire(p, new & ~old)
+        self._lock.notify_all()
+
+    def _fire_gpio(self, port: SimPort):
+        waits = []
+        for wait in port.gpio_waits:
+            gpio, event = wait
+            if ~(port.card.gpio_state ^ gpio.state) & gpio.smask:
+                gpio.state = port.card.gpio_state
+                if event is not None:
+                    event.signalled = True
+            else:
+                waits.append(wait)
+        port.gpio_waits = waits
+
+    def _cancel_waits(self, port: SimPort):
+        for mask, result, event in port.event_waits:
+            result.value = 0
+            if event is not None:
+                event.signalled = True
+        port.event_waits = []
+
+    def _cancel_gpio_waits(self, port: SimPort):
+        for gpio, event in port.gpio_waits:
+            if event is not None:
+                event.signalled = True
+        port.gpio_waits = []
+
+    #
+    # Data transfer
+    #
+
+    def _transmit(self, port: SimPort, data: bytes):
+        """Queue send data for delivery at the configured line rate."""
+        now = time.monotonic()
+        port.tx_pending += len(data)
+        start = max(now, port.tx_busy_until)
+        done = start + port.line_time(len(data))
+        port.tx_busy_until = done
+        if done <= now:
+            self._deliver(port, port.tx_generation, data)
+            return
+        self._sequence += 1
+        heapq.heappush(self._schedule,
+                       (done, self._sequence, port, port.tx_generation, data))
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(target=self._run_scheduler,
+                                               name='mgsim', daemon=True)
+            self._scheduler.start()
+        self._lock.notify_all()
+
+    def _run_scheduler(self):
+        with self._lock:
+            while True:
+                if not self._schedule:
+                    self._lock.wait()
+                    continue
+                delay = self._schedule[0][0] - time.monotonic()
+                if delay > 0:
+                    self._lock.wait(delay)
+                    continue
+                done, sequence, port, generation, data = \
+                    heapq.heappop(self._schedule)
+                self._deliver(port, generation, data)
+
+    def _deliver(self, port: SimPort, generation: int, data: bytes):
+        """Complete transmission of data and pass it to receiving port."""
+        if generation != port.tx_generation:
+            # transmit cancelled
+            return
+        port.tx_pending -= len(data)
+        dest = port if port.params.Loopback else port.peer
+        if dest is not None and dest.handle is not None and dest.rx_enabled:
+            if dest.framed():
+                self._receive_frame(dest, data)
+            else:
+                self._store_rx(dest, data, RxStatus_OK)
+            if dest.event_waits:
+                events = MgslEvent_ExitHuntMode
+                if not port.tx_pending:
+                    events |= MgslEvent_IdleReceived
+                self._fire(dest, events)
+        self._lock.notify_all()
+
+    def _receive_frame(self, port: SimPort, frame: bytes):
+        addr = port.params.Addr & 0xff
+        if addr != 0xff and frame and frame[0] not in (addr, 0xff):
+            # HDLC address filter
+            return
+        if port.params.Mode == MGSL_MODE_HDLC and \
+           port.params.CrcType & HDLC_CRC_RETURN_CRC:
+            # return received frame check sequence with frame
+            frame += mgcrc.fcs(frame, port.params.CrcType & HDLC_CRC_MODE)
+        if len(frame) > port.max_frame_size:
+            if port.options.get(MGSL_OPT_RX_DISCARD_TOO_LARGE):
+                return
+            self._store_rx(port, frame[:port.max_frame_size],
+                           RxStatus_BufferOverrun)
+            return
+        self._store_rx(port, frame, RxStatus_OK)
+
+    def _store_rx(self, port: SimPort, data: bytes, status: int):
+        if port.framed():
+            port.rx_frames.append((data, status))
+        else:
+            port.rx_stream += data
+
+    def _receive(self, handle, buf, size: int, status) -> int:
+        with self._lock:
+            port = self._port(handle)
+            if port is None:
+                return 0
+            cancels = port.rx_cancels
+            blocking = not port.options.get(MGSL_OPT_RX_POLL)
+            while not (port.rx_frames or port.rx_stream):
+                if not blocking or port.handle is None or \
+                   port.rx_cancels != cancels:
+                    return 0
+                self._lock.wait()
+            view = _byte_view(buf)
+            size = min(size, len(view))
+            if port.rx_frames:
+                data, rx_status = port.rx_frames.popleft()
+                if len(data) > size:
+                    data = data[:size]
+                    rx_status = RxStatus_BufferTooSmall
+            else:
+                data = port.rx_stream[:size]
+                del port.rx_stream[:size]
+                rx_status = RxStatus_OK
+            view[:len(data)] = data
+            if status is not None:
+                status.value = rx_status
+            return len(data)
+
+    #
+    # Win32 Functions
+    #
+
+    def GetLastError(self) -> int:
+        return 0
+
+    def WaitForSingleObject(self, handle, timeout: int) -> int:
+        with self._lock:
+            event = self._objects.get(_handle_value(handle))
+            if not isinstance(event, SimEvent):
+                return WAIT_FAILED
+            if timeout != INFINITE:
+                deadline = time.monotonic() + timeout / 1000
+            while not event.signalled:
+                if timeout == INFINITE:
+                    self._lock.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return WAIT_TIMEOUT
+                self._lock.wait(remaining)
+            if not event.manual_reset:
+                event.signalled = False
+            return WAIT_OBJECT_0
+
+    def WaitForMultipleObjects(self, handles: list, wait_all: bool, timeout: int) -> int:
+        with self._lock:
+            events = [self._objects.get(_handle_value(h)) for h in handles]
+            if not events or \
+               not all(isinstance(event, SimEvent) for event in events):
+                return WAIT_FAILED
+            if timeout != INFINITE:
+                deadline = time.monotonic() + timeout / 1000
+            while True:
+                if wait_all:
+                    if all(event.signalled for event in events):
+                        for event in events:
+                            if not event.manual_reset:
+                                event.signalled = False
+                        return WAIT_OBJECT_0
+                else:
+                    for i, event in enumerate(events):
+                        if event.signalled:
+                            if not event.manual_reset:
+                                event.signalled = False
+                            return WAIT_OBJECT_0 + i
+                if timeout == INFINITE:
+                    self._lock.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return WAIT_TIMEOUT
+                self._lock.wait(remaining)
+
+    def CreateEvent(self, manual_reset: bool, initial_state: bool) -> int:
+        with self._lock:
+            return self._new_handle(SimEvent(manual_reset, initial_state))
+
+    def ResetEvent(self, handle) -> int:
+        with self._lock:
+            event = self._objects.get(_handle_value(handle))
+            if not isinstance(event, SimEvent):
+                return 0
+            event.signalled = False
+            return 1
+
+    def CloseHandle(self, handle) -> int:
+        with self._lock:
+            if self._objects.pop(_handle_value(handle), None) is None:
+                return 0
+            return 1
+
+    #
+    # Device Access Functions
+    #
+
+    def MgslOpen(self, port_id: int, port: HANDLE) -> int:
+        with self._lock:
+            for p in self._ports:
+                if p.port_id == port_id:
+                    return self._open(p, port)
+            return ERROR_BAD_DEVICE
+
+    def MgslOpenByName(self, name: str, port: HANDLE) -> int:
+        with self._lock:
+            try:
+                p = self._by_name(name)
+            except KeyError:
+                return ERROR_BAD_DEVICE
+            return self._open(p, port)
+
+    def _open(self, p: SimPort, port: HANDLE) -> int:
+        if p.handle is not None:
+            return ERROR_DEVICE_IN_USE
+        p.reset()
+        p.handle = self._new_handle(p)
+        port.value = p.handle
+        return 0
+
+    def MgslClose(self, port: HANDLE) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            self._cancel_waits(p)
+            self._cancel_gpio_waits(p)
+            self._set_outputs(p, 0)
+            p.tx_generation += 1
+            p.tx_pending = 0
+            p.purge_rx()
+            del self._objects[p.handle]
+            p.handle = None
+            port.value = MGSL_INVALID_HANDLE
+            self._lock.notify_all()
+            return 0
+
+    #
+    # Device Configuration Functions
+    #
+
+    def MgslSetParams(self, port: HANDLE, params: MGSL_PARAMS) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            if params.Mode != p.params.Mode:
+                p.purge_rx()
+            p.params = MGSL_PARAMS.from_buffer_copy(params)
+            return 0
+
+    def MgslGetParams(self, port: HANDLE, params: MGSL_PARAMS) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            ctypes.memmove(ctypes.addressof(params),
+                           ctypes.addressof(p.params), ctypes.sizeof(params))
+            return 0
+
+    def MgslSetOption(self, port: HANDLE, option_id: int, option_value: int) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            p.options[option_id] = int(option_value)
+            self._lock.notify_all()
+            return 0
+
+    def MgslGetOption(self, port: HANDLE, option_id: int, option_value) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            if option_id == MGSL_OPT_RX_COUNT:
+                option_value.value = p.rx_count()
+            elif option_id == MGSL_OPT_TX_COUNT:
+                option_value.value = p.tx_pending
+            else:
+                option_value.value = p.options.get(option_id, 0)
+            return 0
+
+    def MgslGetPortConfigEx(self, port_id: int, port_config: MGSL_PORT_CONFIG_EX) -> int:
+        with self._lock:
+            for p in self._ports:
+                if p.port_id == port_id:
+                    port_config.Size = ctypes.sizeof(port_config)
+                    port_config.BusType = _BUS_TYPE_PCI
+                    port_config.BusNumber = p.card.bus_number
+                    port_config.DeviceID = p.card.device_id
+                    port_config.MaxFrameSize = p.max_frame_size
+                    port_config.Flags = p.config_flags
+                    return 0
+            return ERROR_BAD_DEVICE
+
+    def MgslSetPortConfigEx(self, port_id: int, port_config: MGSL_PORT_CONFIG_EX) -> int:
+        with self._lock:
+            for p in self._ports:
+                if p.port_id == port_id:
+                    p.max_frame_size = port_config.MaxFrameSize
+                    p.config_flags = port_config.Flags
+                    return 0
+            return ERROR_BAD_DEVICE
+
+    #
+    # Device Control/Status Functions
+    #
+
+    def MgslSetSerialSignals(self, port: HANDLE, signals: int) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            self._set_outputs(p, signals)
+            return 0
+
+    def MgslGetSerialSignals(self, port: HANDLE, signals) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            signals.value = self._signals(p)
+            return 0
+
+    def MgslWaitEvent(self, port: HANDLE, event_mask: int, events, ol) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            event = self._overlapped_event(ol)
+            # signal events complete immediately if already in desired state
+            current = event_mask & self._signal_states(p)
+            if current:
+                events.value = current
+                if event is not None:
+                    event.signalled = True
+                    self._lock.notify_all()
+                return 0
+            p.event_waits.append((event_mask, events, event))
+            return ERROR_IO_PENDING
+
+    def MgslCancelWaitEvent(self, port: HANDLE) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            self._cancel_waits(p)
+            self._lock.notify_all()
+            return 0
+
+    #
+    # General Purpose I/O Control/Status Functions
+    #
+
+    def MgslSetGpio(self, port: HANDLE, gpio) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            card = p.card
+            card.gpio_state = (card.gpio_state & ~gpio.smask) | (gpio.state & gpio.smask)
+            card.gpio_dir = (card.gpio_dir & ~gpio.dmask) | (gpio.dir & gpio.dmask)
+            for port in card.ports:
+                if port.gpio_waits:
+                    self._fire_gpio(port)
+                    self._lock.notify_all()
+            return 0
+
+    def MgslGetGpio(self, port: HANDLE, gpio) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            gpio.state = p.card.gpio_state
+            gpio.dir = p.card.gpio_dir
+            return 0
+
+    def MgslWaitGpio(self, port: HANDLE, gpio, ol) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            event = self._overlapped_event(ol)
+            if ~(p.card.gpio_state ^ gpio.state) & gpio.smask:
+                gpio.state = p.card.gpio_state
+                if event is not None:
+                    event.signalled = True
+                    self._lock.notify_all()
+                return 0
+            p.gpio_waits.append((gpio, event))
+            return ERROR_IO_PENDING
+
+    def MgslCancelWaitGpio(self, port: HANDLE) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            self._cancel_gpio_waits(p)
+            self._lock.notify_all()
+            return 0
+
+    #
+    # Data Communication Functions
+    #
+
+    def MgslCancelTransmit(self, port: HANDLE) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            p.tx_cancels += 1
+            p.tx_generation += 1
+            p.tx_pending = 0
+            p.tx_busy_until = 0.0
+            self._lock.notify_all()
+            return 0
+
+    def MgslEnableTransmitter(self, port: HANDLE, enable: int) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            p.tx_enabled = bool(enable)
+            return 0
+
+    def MgslSetIdleMode(self, port: HANDLE, mode: int) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            p.idle_mode = mode
+            return 0
+
+    def MgslWrite(self, port: HANDLE, buf, size: int) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return 0
+            view = _byte_view(buf)
+            size = min(size, len(view))
+            if size <= 0:
+                return 0
+            framed = p.framed()
+            if framed and size > p.max_frame_size:
+                return 0
+            cancels = p.tx_cancels
+            blocking = not p.options.get(MGSL_OPT_TX_POLL)
+            while True:
+                room = p.tx_capacity() - p.tx_pending
+                if framed:
+                    ready = room >= size or not p.tx_pending
+                else:
+                    ready = room > 0
+                if ready:
+                    break
+                if not blocking or p.handle is None or \
+                   p.tx_cancels != cancels:
+                    return 0
+                self._lock.wait()
+            if not framed:
+                size = min(size, room)
+            self._transmit(p, bytes(view[:size]))
+            return size
+
+    def MgslWaitAllSent(self, port: HANDLE) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            cancels = p.tx_cancels
+            while p.tx_pending and p.handle is not None and \
+                  p.tx_cancels == cancels:
+                self._lock.wait()
+            return 0
+
+    def MgslCancelReceive(self, port: HANDLE) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            p.rx_cancels += 1
+            self._lock.notify_all()
+            return 0
+
+    def MgslEnableReceiver(self, port: HANDLE, enable: int) -> int:
+        """enable = 0 (disable), 1 (enable) or 2 (force hunt mode)"""
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            if not enable:
+                p.purge_rx()
+            p.rx_enabled = bool(enable)
+            return 0
+
+    def MgslRead(self, port: HANDLE, buf, size: int) -> int:
+        return self._receive(port, buf, size, None)
+
+    def MgslReadWithStatus(self, port: HANDLE, buf, size: int, status) -> int:
+        return self._receive(port, buf, size, status)
+
+    #
+    # Misc Functions
+    #
+
+    def MgslGetAssignedResources(self, port: HANDLE, port_res) -> int:
+        with self._lock:
+            p = self._port(port)
+            if p is None:
+                return ERROR_INVALID_HANDLE
+            card = p.card
+            port_res.BusType = _BUS_TYPE_PCI
+            port_res.BusNumber = card.bus_number
+            port_res.DeviceNumber = card.device_number
+            port_res.DeviceId = card.device_id
+            serial = card.serial_number.encode('ascii')
+            for i in range(0, len(port_res.SerialNumber)):
+                port_res.SerialNumber[i] = serial[i] if i < len(serial) else 0
+            return 0
+
+    def MgslEnumeratePorts(self, ports: []) -> int:
+        with self._lock:
+            ports.clear()
+            for p in self._ports[:MGSL_MAX_PORTS]:
+                entry = MGSL_PORT()
+                entry.PortID = p.port_id
+                entry.DeviceID = p.card.device_id
+                name = p.name.encode('ascii')
+                for i in range(0, len(name)):
+                    entry.DeviceName[i] = name[i]
+                ports.append(entry)
+            return 0
@@ -0,0 +1,154 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# Sync pattern hunting in RAW (external sync) captures (requires NumPy).
+#
+# Port.BISYNC and Port.MONOSYNC receivers synchronize on
+# Settings.sync_pattern in hardware. Data captured in RAW mode (Port.RAW)
+# is not synchronized: sync words can start at any bit of a byte.
+# SyncHunter finds all occurrences of an 8 or 16 bit sync pattern at any
+# of the 8 bit alignments in a continuous stream of receive data:
+#
+#   hunter = mgsync.SyncHunter(0x16, 8)
+#   while True:
+#       offsets = hunter.search(port.read())
+#       if hunter.alignment is not None:
+#           ...
+#
+# Offsets are bit positions in the stream counted from the first bit
+# received, offset % 8 is the alignment (bit position in the byte) of a
+# match. The pattern is matched as the receiver would see it if
+# byte aligned: 16 bit patterns are sent high byte first and msb_first
+# selects the bit order of each byte on the line (Settings.msb_first).
+#
+# Each byte position is compared against the pattern at all 8 alignments
+# with vectorized shifts of a window holding the pattern and the
+# following byte, so there is no per bit or per byte Python code.
+#
+
+import numpy as np
+
+import mgbits
+
+# byte value: byte value with bit order reversed
+_REVERSE = np.frombuffer(mgbits.REVERSE, dtype=np.uint8)
+
+
+class SyncHunter():
+    """
+    Streaming sync pattern hunter.
+    Receive data of successive search() calls is treated as one
+    continuous bit stream.
+    """
+
+    def __init__(self, pattern: int, bits: int = 8, msb_first: bool = True):
+        """
+        pattern = sync pattern value
+        bits = pattern size in bits (8 or 16)
+        msb_first = True if first bit of each byte on the line is bit 7
+        """
+        assert bits in (8, 16), str.format("invalid bits = {}", bits)
+        assert 0 <= pattern < (1 << bits), \
+            str.format("pattern must fit in {} bits", bits)
+        self.pattern = pattern
+        self.bits = bits
+        self.msb_first = msb_first
+        # pattern in line bit order (first bit on line is MSB)
+        line = pattern.to_bytes(bits // 8, 'big')
+        if not msb_first:
+            line = mgbits.reverse_bits(line)
+        self._line_pattern = line
+        self._match = np.uint32(int.from_bytes(line, 'big'))
+        self._mask = np.uint32((1 << bits) - 1)
+        self.reset()
+
+    def reset(self):
+        """Discard stream position, carried data and match counts."""
+        self._carry = np.zeros(0, dtype=np.uint8)
+        self._position = 0    # stream bit offset of start of _carry
+        self.counts = [0] * 8  # matches found at each alignment
+
+    @property
+    def matches(self) -> int:
+        """Return number of matches found since reset."""
+        return sum(self.counts)
+
+    @property
+    def alignment(self):
+        """
+        Return alignment (0-7) with the most matches since reset,
+        or None if no match has been found.
+        """
+        if not self.matches:
+            return None
+        return self.counts.index(max(self.counts))
+
+    def search(self, data) -> np.ndarray:
+        """
+        Search receive data and return sorted array of stream bit
+        offsets of pattern matches.
+        data = bytes like object with receive data, None (no data
+               returned by Port.read()) returns an empty array
+        The last pattern size bytes of data are searched together with
+        the next call, use flush() at end of a capture.
+        """
+        if data is None:
+            return np.zeros(0, dtype=np.int64)
+        buf = np.frombuffer(data, dtype=np.uint8)
+        if not self.msb_first:
+            buf = _REVERSE[buf]
+        if len(self._carry):
+            buf = np.concatenate((self._carry, buf))
+        size = self.bits // 8
+        count = len(buf) - size
+        if count <= 0:
+            self._carry = buf.copy()
+            return np.zeros(0, dtype=np.int64)
+
+        # window = byte, following pattern size bytes (line bit order)
+        window = buf[:count].astype(np.uint32)
+        for i in range(1, size + 1):
+            window = (window << np.uint32(8)) | buf[i:i + count]
+
+        found = []
+        for shift in range(8):
+            bits = (window >> np.uint32(8 - shift)) & self._mask
+            index = np.flatnonzero(bits == self._match)
+            if len(index):
+                self.counts[shift] += len(index)
+                found.append(self._position + index * 8 + shift)
+
+        self._carry = buf[count:].copy()
+        self._position += count * 8
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        if len(found) == 1:
+            return found[0]
+        return np.sort(np.concatenate(found))
+
+    def flush(self) -> np.ndarray:
+        """
+        Return array of stream bit offsets of a byte aligned match in
+        the data carried from the last search() call, and discard
+        that data.
+        """
+        offsets = np.zeros(0, dtype=np.int64)
+        if self._carry.tobytes() == self._line_pattern:
+            self.counts[0] += 1
+            offsets = np.array([self._position], dtype=np.int64)
+        self._position += len(self._carry) * 8
+        self._carry = np.zeros(0, dtype=np.uint8)
+        return offsets
+
+
+def find_sync(data, pattern: int, bits: int = 8,
+              msb_first: bool = True) -> np.ndarray:
+    """
+    Return sorted array of bit offsets of all pattern matches in data.
+    data = bytes like object with complete capture
+    pattern, bits, msb_first = see SyncHunter
+    """
+    hunter = SyncHunter(pattern, bits, msb_first)
+    offsets = hunter.search(data)
+    return np.concatenate((offsets, hunter.flush()))
@@ -0,0 +1,197 @@
+#
+# This file is part of the mgapi package that implements an
+# interface to the Microgate serial API for Windows.
+#
+# TDM slot demultiplexer and multiplexer (requires NumPy).
+#
+# In TDM mode (Port.TDM) each TDM frame contains tdm_slot_count slots of
+# tdm_slot_bits bits and each receive buffer contains tdm_frame_count
+# TDM frames. TdmChannelizer splits receive data into per slot channel
+# sample arrays and interleaves per channel transmit samples into TDM
+# frames:
+#
+#   tdm = mgtdm.TdmChannelizer.from_settings(port.get_settings())
+#   channels = tdm.demux(port.read())   # shape (slot_count, frames)
+#   port.write(tdm.mux(channels))
+#
+# Slots are packed back to back in the bit stream. msb_first selects the
+# bit order on the line, matching Settings.msb_first, and the bit order
+# of samples follows it:
+#
+#   msb_first = False  bit 0 of each byte is sent first and the first
+#                      bit of a slot is bit 0 (LSB) of the sample, so
+#                      slots are little endian and 8 bit slots have the
+#                      byte values returned by Port.read()
+#   msb_first = True   bit 7 of each byte is sent first and the first
+#                      bit of a slot is the MSB of the sample, so slots
+#                      are big endian (8 bit slots are again the bytes
+#                      returned by Port.read())
+#
+# Slot widths are unpacked without per sample Python code: byte aligned
+# 8, 16 and 32 bit slots by viewing the data as little or big endian
+# integers, other widths (12, 20, 24, 28) by combining each group of
+# bytes holding two samples into one 64 bit integer and splitting it
+# with shifts.
+#
+
+import numpy as np
+
+from mgapi import Port
+
+# slot bits: (msb_first view dtype, lsb first view dtype, sample dtype)
+# for byte aligned slots
+_ALIGNED = {
+    8: (np.dtype('u1'), np.dtype('u1'), np.dtype(np.uint8)),
+    16: (np.dtype('>u2'), np.dtype('<u2'), np.dtype(np.uint16)),
+    32: (np.dtype('>u4'), np.dtype('<u4'), np.dtype(np.uint32)),
+}
+
+
+def sample_dtype(slot_bits: int) -> np.dtype:
+    """Return smallest unsigned NumPy dtype holding slot_bits bits."""
+    if slot_bits <= 8:
+        return np.dtype(np.uint8)
+    if slot_bits <= 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def unpack_samples(data, slot_bits: int, msb_first: bool = False) -> np.ndarray:
+    """
+    Return 1 dimensional array of samples packed in data.
+    data = bytes like object
+    slot_bits = bits per sample (multiple of 4 from 8 to 32)
+    msb_first = False: first bit of a slot is sample bit 0 (LSB)
+                True: first bit of a slot is the sample MSB
+    Incomplete samples at the end of data are ignored.
+    """
+    assert slot_bits in (8, 12, 16, 20, 24, 28, 32), \
+        str.format("invalid slot_bits = {}", slot_bits)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    count = len(buf) * 8 // slot_bits
+
+    aligned = _ALIGNED.get(slot_bits)
+    if aligned is not None:
+        view_dtype = aligned[0] if msb_first else aligned[1]
+        size = count * view_dtype.itemsize
+        return buf[:size].view(view_dtype).astype(aligned[2], copy=False)
+
+    # groups of slot_bits / 4 bytes hold two samples
+    group = slot_bits // 4
+    groups = -(-len(buf) // group)
+    if groups * group != len(buf):
+        buf = np.concatenate(
+            (buf, np.zeros(groups * group - len(buf), dtype=np.uint8)))
+    columns = buf.reshape(groups, group).astype(np.uint64)
+    order = range(group) if msb_first else range(group - 1, -1, -1)
+    value = np.zeros(groups, dtype=np.uint64)
+    for i in order:
+        value = (value << np.uint64(8)) | columns[:, i]
+    # first sample in high bits (MSB first) or low bits (LSB first)
+    high = value >> np.uint64(slot_bits)
+    low = value & np.uint64((1 << slot_bits) - 1)
+    samples = np.empty(groups * 2, dtype=sample_dtype(slot_bits))
+    samples[0::2] = high if msb_first else low
+    samples[1::2] = low if msb_first else high
+    return samples[:count]
+
+
+def pack_samples(samples, slot_bits: int, msb_first: bool = False) -> bytes:
+    """
+    Return samples packed into bytes, inverse of unpack_samples().
+    samples = 1 dimensional array like of sample values
+    slot_bits = bits per sample (multiple of 4 from 8 to 32)
+    msb_first = False: first bit of a slot is sample bit 0 (LSB)
+                True: first bit of a slot is the sample MSB
+    A final partial byte is padded with zero bits.
+    """
+    assert slot_bits in (8, 12, 16, 20, 24, 28, 32), \
+        str.format("invalid slot_bits = {}", slot_bits)
+    samples = np.asarray(samples)
+    count = len(samples)
+    size = -(-count * slot_bits // 8)
+
+    aligned = _ALIGNED.get(slot_bits)
+    if aligned is not None:
+        view_dtype = aligned[0] if msb_first else aligned[1]
+        return samples.astype(view_dtype).tobytes()
+
+    group = slot_bits // 4
+    if count % 2:
+        samples = np.append(samples, 0)
+    mask = np.uint64((1 << slot_bits) - 1)
+    pairs = samples.astype(np.uint64).reshape(-1, 2) & mask
+    if msb_first:
+        value = (pairs[:, 0] << np.uint64(slot_bits)) | pairs[:, 1]
+    else:
+        value = (pairs[:, 1] << np.uint64(slot_bits)) | pairs[:, 0]
+    columns = np.empty((len(value), group), dtype=np.uint8)
+    for i in range(group):
+        byte = group - 1 - i if msb_first else i
+        columns[:, i] = (value >> np.uint64(8 * byte)) & np.uint64(0xff)
+    return columns.reshape(-1)[:size].tobytes()
+
+
+class TdmChannelizer():
+    """Split TDM data into slot channels and interleave channels."""
+
+    def __init__(self, slot_count: int, slot_bits: int, frame_count: int = 1,
+                 msb_first: bool = False):
+        """
+        slot_count = slots per TDM frame (2-32 or 384)
+        slot_bits = bits per slot (8, 12, 16, 20, 24, 28 or 32)
+        frame_count = TDM frames per receive buffer
+        msb_first = Settings.msb_first, False: first bit of a slot is
+                    sample bit 0 (LSB), True: first bit is the sample MSB
+        """
+        assert slot_count > 0, str.format("slot_count must be > 0")
+        assert frame_count > 0, str.format("frame_count must be > 0")
+        assert slot_bits in (8, 12, 16, 20, 24, 28, 32), \
+            str.format("invalid slot_bits = {}", slot_bits)
+        self.slot_count = slot_count
+        self.slot_bits = slot_bits
+        self.frame_count = frame_count
+        self.msb_first = msb_first
+        self.dtype = sample_dtype(slot_bits)
+
+    @classmethod
+    def from_settings(cls, settings: Port.Settings):
+        """Return TdmChannelizer for TDM configuration of Port.Settings."""
+        return cls(settings.tdm_slot_count, settings.tdm_slot_bits,
+                   settings.tdm_frame_count, settings.msb_first)
+
+    @property
+    def frame_size(self) -> int:
+        """Return size in bytes of frame_count TDM frames (receive buffer)."""
+        return -(-self.frame_count * self.slot_count * self.slot_bits // 8)
+
+    def demux(self, data) -> np.ndarray:
+        """
+        Return array of shape (slot_count, frames) with samples of each
+        slot (channel) in data.
+        data = bytes like object with one or more TDM frames
+        Rows are strided views of the unpacked samples, use
+        np.ascontiguousarray() for contiguous channel buffers.
+        Incomplete TDM frames at the end of data are ignored.
+        """
+        samples = unpack_samples(data, self.slot_bits, self.msb_first)
+        frames = len(samples) // self.slot_count
+        return samples[:frames * self.slot_count].reshape(
+            frames, self.slot_count).T
+
+    def mux(self, channels) -> bytes:
+        """
+        Return TDM frames interleaving channel samples.
+        channels = array like of shape (slot_count, frames), sample
+                   values are truncated to slot_bits
+        """
+        channels = np.asarray(channels)
+        assert channels.ndim == 2 and channels.shape[0] == self.slot_count, \
+            str.format("channels must have shape (slot_count, frames)")
+        return pack_samples(channels.T.reshape(-1), self.slot_bits,
+                            self.msb_first)
+
+    def __repr__(self):
+        return 'TdmChannelizer(slot_count=%d, slot_bits=%d, frame_count=%d, ' \
+            'msb_first=%s)' % (self.slot_count, self.slot_bits,
+                               self.frame_count, self.msb_first)
@@ -479,36 +479,38 @@ class CommunicationApp:
     def update_led_states(self):
         while self.update_leds:
             if self.port1:
+                signals = self.port1.signals_snapshot()
                 # Update CTS LED for Port 1
-                if self.port1.cts:
+                if signals.cts:
                     self.cts_port1_led.config(bg="green")
                 else:
                     self.cts_port1_led.config(bg="red")
 
                 # Update DSR LED for Port 1
-                if self.port1.dsr:
+                if signals.dsr:
                     self.dsr_port1_led.config(bg="green")
                 else:
                     self.dsr_port1_led.config(bg="red")
 
-                if self.port1.dcd:
+                if signals.dcd:
                     self.dcd_port1_led.config(bg="green")
                 else:
                     self.dcd_port1_led.config(bg="red")
 
             if self.port2:
+                signals = self.port2.signals_snapshot()
                 # Update CTS LED for Port 2
-                if self.port2.cts:
+                if signals.cts:
                     self.cts_port2_led.config(bg="green")
                 else:
                     self.cts_port2_led.config(bg="red")
                 # Update DSR LED for Port 2
-                if self.port2.dsr:
+                if signals.dsr:
                     self.dsr_port2_led.config(bg="green")
                 else:
                     self.dsr_port2_led.config(bg="red")
                 # Update DCD LED for Port 2
-                if self.port2.dcd:
+                if signals.dcd:
                     self.dcd_port2_led.config(bg="green")
                 else:
                     self.dcd_port2_led.config(bg="red")